@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Accuracy and speed benchmark of the sun engines against astral.
+
+Sweeps a grid of latitudes (including near-polar) and longitudes over every
+day of a year. For each engine and grid point it records worst-case and mean
+error in minutes against astral, days where the engine and astral disagree
+on whether the sun rises/sets at all, and calls per second. The report is
+written as json.
+
+Engines:
+    float  - `sun._calc_sun_time`
+    fixed  - `sun_fixed.calc_sun_time`
+    batch  - `sun.sun_times`
+    lut    - `sun_lut.lookup` on a binary LUT generated by `sun.sun_times`
+    fit    - `sun.fitted_sun_time` with coefficients fitted for the location
+
+Example:
+    python calculations/benchmark_sun.py --year 2025 -o sun_benchmark.json
+"""
+
+import argparse
+import datetime
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from astral import Observer
+from astral.sun import sunrise as a_sunrise
+from astral.sun import sunset as a_sunset
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sun  # noqa: E402  pylint: disable=wrong-import-position
+import sun_fixed  # noqa: E402  pylint: disable=wrong-import-position
+import sun_lut  # noqa: E402  pylint: disable=wrong-import-position
+from fit_sun import fit_coefs  # noqa: E402  pylint: disable=wrong-import-position
+from generate_lut import write_bin  # noqa: E402  pylint: disable=wrong-import-position
+
+LATITUDES = [-60.0, -45.0, -30.0, 0.0, 30.0, 45.0, 52.0, 60.0, 65.0, 70.0]
+LONGITUDES = [-150.0, -74.0, 0.0, 6.17, 120.0]
+
+# engine(lat, lon, days) -> (rise, set, elapsed seconds), NaN where there is no rise/set
+EngineResult = tuple[np.ndarray, np.ndarray, float]
+
+
+def _to_hours(dt: datetime.datetime) -> float:
+    return dt.hour + dt.minute / 60 + dt.second / 3600 + dt.microsecond / 3.6e9
+
+
+def astral_times(lat: float, lon: float, days: list[datetime.date]) -> tuple[np.ndarray, np.ndarray]:
+    """Reference times from astral, NaN where astral finds no rise/set."""
+    observer = Observer(lat, lon)
+    rise = np.full(len(days), np.nan)
+    set_ = np.full(len(days), np.nan)
+    for i, day in enumerate(days):
+        for arr, fn in ((rise, a_sunrise), (set_, a_sunset)):
+            try:
+                arr[i] = _to_hours(fn(observer, day, tzinfo=datetime.timezone.utc))
+            except ValueError:
+                pass
+    return rise, set_
+
+
+def _scalar(fn: Callable) -> Callable[..., EngineResult]:
+    """Wrap a scalar `(isRiseTime, year, month, day, lat, lon)` engine."""
+
+    def engine(lat: float, lon: float, days: list[datetime.date]) -> EngineResult:
+        rise = np.full(len(days), np.nan)
+        set_ = np.full(len(days), np.nan)
+        t_start = time.perf_counter()
+        for i, day in enumerate(days):
+            try:
+                rise[i] = fn(True, day.year, day.month, day.day, lat, lon)
+            except ValueError:
+                pass
+            try:
+                set_[i] = fn(False, day.year, day.month, day.day, lat, lon)
+            except ValueError:
+                pass
+        return rise, set_, time.perf_counter() - t_start
+
+    return engine
+
+
+def batch_engine(lat: float, lon: float, days: list[datetime.date]) -> EngineResult:
+    t_start = time.perf_counter()
+    _, rise, set_ = sun.sun_times(days[0], days[-1], lat, lon)
+    return rise, set_, time.perf_counter() - t_start
+
+
+def lut_engine(lat: float, lon: float, days: list[datetime.date]) -> EngineResult:
+    dates, rise_ref, set_ref = sun.sun_times(days[0], days[-1], lat, lon)
+    missing = np.isnan(rise_ref) | np.isnan(set_ref)
+    rows = [
+        (str(d), 0.0 if m else float(r), 0.0 if m else float(s))
+        for d, r, s, m in zip(dates, rise_ref, set_ref, missing)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = str(Path(tmp) / "sun_lut.bin")
+        write_bin(rows, file_path)
+
+        rise = np.full(len(days), np.nan)
+        set_ = np.full(len(days), np.nan)
+        t_start = time.perf_counter()
+        for i, day in enumerate(days):
+            rise[i], set_[i] = sun_lut.lookup(day.isoformat(), file_path)
+        elapsed = time.perf_counter() - t_start
+
+    rise[missing] = np.nan
+    set_[missing] = np.nan
+    return rise, set_, elapsed
+
+
+def fit_engine(lat: float, lon: float, days: list[datetime.date]) -> EngineResult:
+    _, rise_ref, set_ref = sun.sun_times(days[0], days[-1], lat, lon)
+    ydays = np.array([d.timetuple().tm_yday for d in days])
+    rise_coefs = fit_coefs(ydays, rise_ref, 4)
+    set_coefs = fit_coefs(ydays, set_ref, 4)
+
+    rise = np.full(len(days), np.nan)
+    set_ = np.full(len(days), np.nan)
+    t_start = time.perf_counter()
+    for i, yday in enumerate(ydays):
+        rise[i] = sun.fitted_sun_time(rise_coefs, int(yday))
+        set_[i] = sun.fitted_sun_time(set_coefs, int(yday))
+    elapsed = time.perf_counter() - t_start
+
+    rise[np.isnan(rise_ref)] = np.nan
+    set_[np.isnan(set_ref)] = np.nan
+    return rise, set_, elapsed
+
+
+ENGINES: dict[str, Callable[..., EngineResult]] = {
+    "float": _scalar(sun._calc_sun_time),
+    "fixed": _scalar(sun_fixed.calc_sun_time),
+    "batch": batch_engine,
+    "lut": lut_engine,
+    "fit": fit_engine,
+}
+
+
+def compare(calculated: np.ndarray, expected: np.ndarray) -> dict:
+    """Error statistics in minutes, wrap-around at 24 h is handled."""
+    both = ~np.isnan(calculated) & ~np.isnan(expected)
+    diff = np.abs(calculated[both] - expected[both])
+    err_min = np.minimum(diff, 24 - diff) * 60
+
+    return {
+        "max_error_min": float(err_min.max()) if err_min.size else None,
+        "mean_error_min": float(err_min.mean()) if err_min.size else None,
+        "mismatch_days": int(np.sum(np.isnan(calculated) != np.isnan(expected))),
+    }
+
+
+def run_benchmark(
+    year: int,
+    latitudes: list[float] = LATITUDES,
+    longitudes: list[float] = LONGITUDES,
+    engines: list[str] | None = None,
+) -> dict:
+    """Run all engines over the grid, returns the report."""
+    engines = engines or list(ENGINES)
+    start = datetime.date(year, 1, 1)
+    days = [start + datetime.timedelta(days=i) for i in range((datetime.date(year + 1, 1, 1) - start).days)]
+
+    results = []
+    for lat in latitudes:
+        for lon in longitudes:
+            ref_rise, ref_set = astral_times(lat, lon, days)
+            for name in engines:
+                rise, set_, elapsed = ENGINES[name](lat, lon, days)
+                calls = 2 * len(days)
+                results.append(
+                    {
+                        "engine": name,
+                        "lat": lat,
+                        "lon": lon,
+                        "rise": compare(rise, ref_rise),
+                        "set": compare(set_, ref_set),
+                        "calls_per_s": calls / elapsed if elapsed > 0 else math.inf,
+                    }
+                )
+
+    summary = {}
+    for name in engines:
+        rows = [r for r in results if r["engine"] == name]
+        stats = [r[k] for r in rows for k in ("rise", "set")]
+        max_errors = [s["max_error_min"] for s in stats if s["max_error_min"] is not None]
+        mean_errors = [s["mean_error_min"] for s in stats if s["mean_error_min"] is not None]
+        summary[name] = {
+            "max_error_min": max(max_errors) if max_errors else None,
+            "mean_error_min": sum(mean_errors) / len(mean_errors) if mean_errors else None,
+            "mismatch_days": sum(s["mismatch_days"] for s in stats),
+            "calls_per_s": sum(r["calls_per_s"] for r in rows) / len(rows),
+        }
+
+    return {
+        "year": year,
+        "latitudes": latitudes,
+        "longitudes": longitudes,
+        "summary": summary,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=datetime.date.today().year)
+    parser.add_argument("--engines", nargs="*", choices=list(ENGINES), default=None)
+    parser.add_argument("-o", "--output", default="sun_benchmark.json")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.year, engines=args.engines)
+
+    print(f"{'engine':8} {'max err [min]':>14} {'mean err [min]':>15} {'mismatch':>9} {'calls/s':>12}")
+    for name, s in report["summary"].items():
+        print(
+            f"{name:8} {s['max_error_min']:14.2f} {s['mean_error_min']:15.3f} "
+            f"{s['mismatch_days']:9d} {s['calls_per_s']:12.0f}"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 #!/usr/bin/python
 
-# motor and speed calculations
+# motor and speed calculations, the model is in door_mechanics.py
 
 
 # %% Constants
-import math
+from door_mechanics import Mechanics
 
 motor_torque = 0.03  # Nm
 motor_rps = 1 / 4  # revolutions per second
@@ -13,36 +13,28 @@ door_weight = 0.7  # kg
 d_motor = 0.012  # m
 r_motor = d_motor / 2
 
-F_motor = motor_torque / r_motor  # N
-print(f"{F_motor=:.3f} N")
-
-
 d_outer = 0.04  # m
 d_inner = 0.02  # m
 
-F_pulley = F_motor * d_outer / d_inner  # N
-print(f"{F_pulley=:.3f} N")
+lift_height = 0.4  # m
 
-print(f"Max weigth: {F_pulley / 9.81:.3f} kg")
+# 12 teeth on motor, 40 on pulley
+door = Mechanics(motor_torque=motor_torque, door_mass=door_weight, gear_ratio=d_outer / d_motor, d_inner=d_inner)
 
 # F = T/r
+F_motor = motor_torque / r_motor  # N
+print(f"{F_motor=:.3f} N")
 
+F_pulley = door.drum_force  # N
+print(f"{F_pulley=:.3f} N")
 
-gear_ratio = d_outer / d_motor  # 12 teeth on motor, 40 on pulley
-
-pulley_circumference = d_inner * math.pi
-
-lift_height = 0.4  # m
+print(f"Max weigth: {door.max_mass:.3f} kg")
 
 # % ---- calculations ----
-rps = motor_rps / gear_ratio
-
-feed_rate = rps * pulley_circumference  # m/s
-
+feed_rate = door.feed_rate(motor_rps)  # m/s
 print(f"{feed_rate=:.3f} m/s")
 
-
-t_lift = lift_height / feed_rate  # s
+t_lift = door.lift_time(lift_height, motor_rps)  # s
 print(f"{t_lift=:.2f} s")
 
-#
+print(f"mm per motor revolution: {door.mm_per_rev:.2f} mm")
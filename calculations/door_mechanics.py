@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Door mechanics model, plays back the step schedule of a door move.
+
+The model is the motor, gear and drum chain of `calculations.py`: pull-out
+torque constant up to a corner rate and falling linearly above, scaled by
+the drive mode, a gear ratio between motor and pulley, and a drum winding
+up the door. The default motor values are rough 28BYJ-48 datasheet values,
+calibrate them against a door that stalls. A step
+schedule (delay per half step of each step, as `uln2003.Ramp` produces it)
+gives the door speed and acceleration per step. From those follow the
+torque needed for the door mass, gravity and friction, and the stall margin
+(available / needed torque, below 1 the motor loses steps).
+
+The mechanics parameters may be numpy arrays, all results broadcast over
+them, so a parameter grid is evaluated at once per schedule.
+
+Example:
+    python calculations/door_mechanics.py --mass 0.5 0.7 1.0 --torque 0.02 0.03 \\
+        --cruise 950 700 500 --ramp-steps 0 128
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import sys
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _load_uln2003() -> types.ModuleType:
+    """The firmware stepper driver, with stand-ins for the hardware modules it imports.
+
+    Loaded from its file, also if tests replaced `uln2003` in sys.modules.
+    """
+    stand_ins = {
+        "board": types.SimpleNamespace(),
+        "digitalio": types.SimpleNamespace(),
+        "microcontroller": types.SimpleNamespace(delay_us=lambda us: None),
+    }
+    with mock.patch.dict(sys.modules, stand_ins):
+        spec = importlib.util.spec_from_file_location("_mechanics_uln2003", SRC / "uln2003.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+uln2003 = _load_uln2003()
+
+G = 9.81  # m/s^2
+
+# firmware constants, see uln2003 and door
+STEPS_PER_REV = uln2003.FULL_ROTATION  # phase sequences per revolution
+HALF_STEPS_PER_STEP = 8  # a Stepper step is 8 half steps in every drive mode
+STEP_DELAY_US = uln2003.STEP_DELAY_US  # start speed of the ramps
+CRUISE_DELAY_US = uln2003.CRUISE_DELAY_US
+RAMP_STEPS = uln2003.RAMP_STEPS
+MM_PER_REV = 19.6  # door.MM_PER_REV, calibrated on the door
+TRAVEL_MM = 330
+
+# pull-out torque of the drive modes relative to full step (two coils on)
+MODE_TORQUE = {"wave": 0.7, "half": 0.85, "full": 1.0}
+
+
+@dataclass
+class Mechanics:
+    """Motor, transmission and door. Any field may be a numpy array."""
+
+    motor_torque: float = 0.034  # Nm, full step pull-out torque at low speed
+    corner_rate: float = 1000.0  # half steps/s up to which the torque is constant
+    max_rate: float = 3000.0  # half steps/s where the pull-out torque drops to 0
+    door_mass: float = 0.7  # kg
+    gear_ratio: float = 0.04 / 0.012  # pulley gear / motor gear, 40 / 12 teeth
+    d_inner: float = 0.02  # m, drum the string winds on
+    friction: float = 0.2  # N, guides and string
+    efficiency: float = 0.9  # gears and drum
+
+    @property
+    def drum_force(self):
+        """Force on the string at low speed (N)."""
+        return self.motor_torque * self.gear_ratio / (self.d_inner / 2)
+
+    @property
+    def max_mass(self):
+        """Heaviest door the motor can hold (kg), without friction and losses."""
+        return self.drum_force / G
+
+    @property
+    def mm_per_rev(self):
+        """Door travel per motor revolution (mm), the geometric MM_PER_REV."""
+        return self.d_inner * math.pi / self.gear_ratio * 1000
+
+    def feed_rate(self, motor_rps: float):
+        """Door speed (m/s) at motor_rps motor revolutions per second."""
+        return motor_rps / self.gear_ratio * self.d_inner * math.pi
+
+    def lift_time(self, height: float, motor_rps: float):
+        """Time (s) to lift the door by height (m)."""
+        return height / self.feed_rate(motor_rps)
+
+    def available_torque(self, rate, mode: str = "half"):
+        """Pull-out torque (Nm) at a half step rate (1/s)."""
+        falloff = np.clip((self.max_rate - rate) / (self.max_rate - self.corner_rate), 0, 1)
+        return self.motor_torque * MODE_TORQUE[mode] * falloff
+
+    def needed_torque(self, accel, lifting: bool = True):
+        """Motor torque (Nm) for a door acceleration (m/s^2, along the move).
+
+        Lowering, the motor holds the door back against gravity, friction and
+        losses help it.
+        """
+        if lifting:
+            force = self.door_mass * (G + accel) + self.friction
+            return force * (self.d_inner / 2) / self.gear_ratio / self.efficiency
+        force = np.abs(self.door_mass * (accel - G) - self.friction)
+        return force * (self.d_inner / 2) / self.gear_ratio * self.efficiency
+
+
+def ramp_delays(
+    total_steps: int,
+    start_delay: int = STEP_DELAY_US,
+    cruise_delay: int = CRUISE_DELAY_US,
+    ramp_steps: int = RAMP_STEPS,
+) -> np.ndarray:
+    """Delay per half step (us) of each step of a `uln2003.Ramp`."""
+    ramp = uln2003.Ramp(total_steps, start_delay, cruise_delay, ramp_steps)
+    return np.fromiter(map(ramp.delay, range(total_steps)), dtype=np.int64, count=total_steps)
+
+
+def move_schedule(
+    distance_mm: float = TRAVEL_MM,
+    mm_per_rev: float = MM_PER_REV,
+    start_delay: int = STEP_DELAY_US,
+    cruise_delay: int = CRUISE_DELAY_US,
+    ramp_steps: int = RAMP_STEPS,
+    slice_steps: int | None = None,
+) -> list[np.ndarray]:
+    """Step delays of a door move over distance_mm, one array per run from rest.
+
+    With slice_steps, the door pauses after every slice (`step_motion(pause=True)`)
+    and each slice has its own ramp; with slice_steps None the move is one
+    ramp (blocking open/close, or slices run back to back). A constant speed
+    schedule has cruise_delay == start_delay.
+    """
+    total = int(distance_mm / mm_per_rev * STEPS_PER_REV)
+    if slice_steps is None or slice_steps > total:
+        slice_steps = total
+    slices = []
+    for done in range(0, total, max(slice_steps, 1)):
+        slices.append(ramp_delays(min(slice_steps, total - done), start_delay, cruise_delay, ramp_steps))
+    return slices
+
+
+def simulate(
+    schedule: list[np.ndarray],
+    mechanics: Mechanics,
+    lifting: bool = True,
+    mode: str = "half",
+    pause_s: float = 0.0,
+) -> dict:
+    """Play back a schedule, returns travel time (s), travel (mm), the minimum
+    stall margin over all steps and whether the motor stalls. The door starts
+    each slice from rest, pause_s is the time between slices.
+    """
+    mm_per_step = mechanics.mm_per_rev / STEPS_PER_REV
+    steps = sum(len(delays) for delays in schedule)
+    time_s = sum(int(delays.sum()) for delays in schedule) * HALF_STEPS_PER_STEP / 1e6
+    time_s += pause_s * max(len(schedule) - 1, 0)
+
+    # the load depends on a step and its previous one, few distinct pairs
+    pairs = np.unique(
+        np.concatenate([np.stack([delays, np.concatenate([[0], delays[:-1]])]) for delays in schedule], axis=1),
+        axis=1,
+    )
+    delay, prev = (np.asarray(p, dtype=float) for p in pairs)
+    step_s = delay * HALF_STEPS_PER_STEP / 1e6
+    prev_speed = np.divide(1.0, prev * HALF_STEPS_PER_STEP / 1e6, out=np.zeros_like(prev), where=prev > 0)
+    speed = 1 / step_s  # steps/s
+
+    m_per_step = np.asarray(mm_per_step)[..., None] / 1000
+    accel = (speed - prev_speed) / step_s * m_per_step
+    rate = 1e6 / delay  # half steps/s
+
+    expand = Mechanics(**{k: np.asarray(v)[..., None] for k, v in vars(mechanics).items()})
+    margin = expand.available_torque(rate, mode) / expand.needed_torque(accel, lifting)
+    min_margin = margin.min(axis=-1)
+    return {
+        "time_s": time_s,
+        "travel_mm": steps * mm_per_step,
+        "min_margin": min_margin,
+        "stall": min_margin < 1,
+    }
+
+
+def sweep(
+    schedules: dict[str, list], mechanics: dict[str, list], lifting: bool = True, mode: str = "half"
+) -> list[dict]:
+    """Evaluate every combination of the schedule and mechanics parameters.
+
+    Schedules (keyword arguments of `move_schedule`) are built one by one,
+    the mechanics grid is evaluated at once for each of them.
+    """
+    grid = np.meshgrid(*(np.asarray(v, dtype=float) for v in mechanics.values()), indexing="ij")
+    model = Mechanics(**dict(zip(mechanics, grid)))
+
+    rows = []
+    for values in itertools.product(*schedules.values()):
+        schedule_args = dict(zip(schedules, values))
+        result = simulate(move_schedule(**schedule_args), model, lifting, mode)
+        margins = np.broadcast_to(result["min_margin"], grid[0].shape if grid else ())
+        travel = np.broadcast_to(result["travel_mm"], margins.shape)
+        for idx in np.ndindex(margins.shape):
+            rows.append(
+                {
+                    **schedule_args,
+                    **{k: round(float(g[idx]), 4) for k, g in zip(mechanics, grid)},
+                    "time_s": round(result["time_s"], 2),
+                    "travel_mm": round(float(travel[idx]), 1),
+                    "min_margin": round(float(margins[idx]), 2),
+                    "stall": bool(margins[idx] < 1),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mass", type=float, nargs="+", default=[Mechanics.door_mass], help="door mass, kg")
+    parser.add_argument("--torque", type=float, nargs="+", default=[Mechanics.motor_torque], help="motor torque, Nm")
+    parser.add_argument("--ratio", type=float, nargs="+", default=[Mechanics.gear_ratio], help="gear ratio")
+    parser.add_argument("--cruise", type=int, nargs="+", default=[CRUISE_DELAY_US], help="us per half step")
+    parser.add_argument("--start-delay", type=int, nargs="+", default=[STEP_DELAY_US], help="us per half step")
+    parser.add_argument("--ramp-steps", type=int, nargs="+", default=[RAMP_STEPS])
+    parser.add_argument("--mm-per-rev", type=float, nargs="+", default=[MM_PER_REV])
+    parser.add_argument("--distance", type=float, default=TRAVEL_MM, help="mm")
+    parser.add_argument("--close", action="store_true", help="lower the door instead of lifting it")
+    parser.add_argument("--mode", choices=sorted(MODE_TORQUE), default="full")
+    parser.add_argument("-o", "--output", help="write the rows as json")
+    args = parser.parse_args()
+
+    schedules = {
+        "distance_mm": [args.distance],
+        "mm_per_rev": args.mm_per_rev,
+        "start_delay": args.start_delay,
+        "cruise_delay": args.cruise,
+        "ramp_steps": args.ramp_steps,
+    }
+    mechanics = {"door_mass": args.mass, "motor_torque": args.torque, "gear_ratio": args.ratio}
+    rows = sweep(schedules, mechanics, lifting=not args.close, mode=args.mode)
+
+    columns = [
+        "mm_per_rev", "start_delay", "cruise_delay", "ramp_steps", *mechanics, "time_s", "travel_mm", "min_margin"
+    ]
+    print(" ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>12}" for c in columns) + ("  STALL" if row["stall"] else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Extend an existing sun LUT with the missing days, instead of regenerating it.
+
+The last date is read from the end of the file (csv) or the header (bin),
+only new days are calculated and appended. With `--chunk` the new days are
+also written to a separate file, which can be uploaded and appended on the
+device with the `append_lut` command (see `sun_lut.append_chunk`).
+
+Example:
+    python calculations/extend_lut.py calculations/sun_lut.bin 51.365967,6.172045 --end 2035-12-31 --chunk sun_lut_chunk.bin
+"""
+
+import argparse
+import datetime
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sun_lut  # noqa: E402  pylint: disable=wrong-import-position
+from generate_lut import lut_rows, parse_latlon, write_lut  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def _last_csv_line(file_path: str | Path, block_size: int = 256) -> str:
+    """Read the last non-empty line by seeking backwards from the end."""
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            lines = data.strip().splitlines()
+            if len(lines) > 1 or (pos == 0 and lines):
+                return lines[-1].decode()
+    raise ValueError(f"{file_path} is empty")
+
+
+def last_date(file_path: str | Path) -> datetime.date:
+    """Return the last date in a csv or binary LUT."""
+    if str(file_path).endswith(".bin"):
+        with open(file_path, "rb") as f:
+            epoch_day, count, _ = sun_lut.read_header(f)
+        return datetime.date(1970, 1, 1) + datetime.timedelta(days=epoch_day + count - 1)
+
+    return datetime.date.fromisoformat(_last_csv_line(file_path).split(",")[0])
+
+
+def append_rows(rows: list[tuple[str, float, float]], file_path: str | Path) -> None:
+    """Append rows to a csv or binary LUT without rewriting it."""
+    if str(file_path).endswith(".bin"):
+        with open(file_path, "r+b") as f:
+            epoch_day, count, scale = sun_lut.read_header(f)
+            f.seek(0, os.SEEK_END)
+            for _, open_time, close_time in rows:
+                f.write(sun_lut.pack_record(open_time, close_time, scale))
+            f.seek(0)
+            f.write(sun_lut.pack_header(epoch_day, count + len(rows), scale))
+    else:
+        with open(file_path, "a") as f:
+            for date, open_time, close_time in rows:
+                f.write(f"{date},{open_time:.2f},{close_time:.2f}\n")
+
+
+def extend_lut(
+    file_path: str | Path,
+    end: datetime.date,
+    lat: float,
+    lon: float,
+    before_sunrise: float = 0.0,
+    after_sunset: float = 0.0,
+    not_before: float = 0.0,
+    chunk_path: str | Path | None = None,
+) -> int:
+    """Append days after the last date in file_path up to end. Returns number of days added."""
+    start = last_date(file_path) + datetime.timedelta(days=1)
+    if start > end:
+        return 0
+
+    rows = lut_rows(start, end, lat, lon, before_sunrise, after_sunset, not_before)
+    append_rows(rows, file_path)
+    if chunk_path is not None:
+        write_lut(rows, chunk_path)
+
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("lut", help="csv or bin LUT to extend")
+    parser.add_argument("latlon", help="location as 'lat,lon'")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("--before-sunrise", type=float, default=0.0)
+    parser.add_argument("--after-sunset", type=float, default=0.0)
+    parser.add_argument("--not-before", type=float, default=0.0)
+    parser.add_argument("--chunk", help="also write the new days to this file")
+    args = parser.parse_args()
+
+    lat, lon = parse_latlon(args.latlon)
+    added = extend_lut(
+        args.lut,
+        args.end,
+        lat,
+        lon,
+        args.before_sunrise,
+        args.after_sunset,
+        args.not_before,
+        args.chunk,
+    )
+    print(f"Added {added} days to {args.lut}")
+
+
+if __name__ == "__main__":
+    main()
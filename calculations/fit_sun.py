@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Fit harmonic coefficients for sunrise and sunset at one location.
+
+The device evaluates them with `sun.fitted_sun_time` (`SUN_ENGINE = "fit"`),
+which costs one sin/cos pair and a few multiply-adds instead of the full
+solar algorithm or a multi-year LUT. More harmonics means more flash and
+CPU, but lower error. The maximum error against `sun._calc_sun_time` over
+the fitted range is reported and stored with the coefficients.
+
+Example:
+    python calculations/fit_sun.py 51.365967,6.172045 --start 2024-01-01 --end 2030-12-31 -n 4
+"""
+
+import argparse
+import datetime
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sun  # noqa: E402  pylint: disable=wrong-import-position
+from generate_lut import parse_latlon  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def _design_matrix(ydays: np.ndarray, harmonics: int) -> np.ndarray:
+    """Columns [1, cos(x), sin(x), cos(2x), sin(2x), ...], same order as `fitted_sun_time`."""
+    x = 2 * math.pi * (ydays - 1) / sun.YEAR_DAYS
+    columns = [np.ones_like(x)]
+    for k in range(1, harmonics + 1):
+        columns += [np.cos(k * x), np.sin(k * x)]
+    return np.column_stack(columns)
+
+
+def _unwrap(hours: np.ndarray) -> np.ndarray:
+    """Keep times continuous around the 0/24 h wrap, relative to the median."""
+    center = np.nanmedian(hours)
+    return hours - 24 * np.round((hours - center) / 24)
+
+
+def fit_coefs(ydays: np.ndarray, hours: np.ndarray, harmonics: int) -> list[float]:
+    """Least squares fit of harmonic coefficients, NaN (polar) days are skipped."""
+    valid = ~np.isnan(hours)
+    A = _design_matrix(ydays[valid], harmonics)
+    coefs, *_ = np.linalg.lstsq(A, _unwrap(hours[valid]), rcond=None)
+    return [float(c) for c in coefs]
+
+
+def max_error(
+    coefs: list[float],
+    isRiseTime: bool,
+    start: datetime.date,
+    end: datetime.date,
+    lat: float,
+    lon: float,
+) -> float:
+    """Largest difference in hours between `sun.fitted_sun_time` and `sun._calc_sun_time`."""
+    worst = 0.0
+    day = start
+    while day <= end:
+        try:
+            expected = sun._calc_sun_time(isRiseTime, day.year, day.month, day.day, lat, lon)
+        except ValueError:  # polar day or night
+            day += datetime.timedelta(days=1)
+            continue
+
+        yday = day.timetuple().tm_yday
+        diff = abs(sun.fitted_sun_time(coefs, yday) - expected)
+        worst = max(worst, min(diff, 24 - diff))
+        day += datetime.timedelta(days=1)
+
+    return worst
+
+
+def fit_location(
+    lat: float,
+    lon: float,
+    start: datetime.date,
+    end: datetime.date,
+    harmonics: int = 4,
+) -> dict:
+    """Fit rise and set coefficients, returns the content of `sun_coefs.json`."""
+    dates, rise, set_ = sun.sun_times(start, end, lat, lon)
+    ydays = (dates - dates.astype("datetime64[Y]")).astype(int) + 1
+
+    result: dict = {
+        "lat": lat,
+        "lon": lon,
+        "start": str(start),
+        "end": str(end),
+        "harmonics": harmonics,
+    }
+    for name, hours, isRiseTime in (("rise", rise, True), ("set", set_, False)):
+        coefs = fit_coefs(ydays, hours, harmonics)
+        result[name] = coefs
+        result[f"{name}_max_error_h"] = max_error(coefs, isRiseTime, start, end, lat, lon)
+
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("latlon", help="location as 'lat,lon'")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("-n", "--harmonics", type=int, default=4)
+    parser.add_argument("-o", "--output", default="sun_coefs.json")
+    args = parser.parse_args()
+
+    lat, lon = parse_latlon(args.latlon)
+    result = fit_location(lat, lon, args.start, args.end, args.harmonics)
+
+    print(f"{len(result['rise'])} coefficients per curve")
+    print(f"max error rise: {result['rise_max_error_h'] * 60:.2f} min")
+    print(f"max error set:  {result['set_max_error_h'] * 60:.2f} min")
+
+    with open(args.output, "w") as f:
+        json.dump(result, f)
+    print(f"Written {args.output}")
+
+
+if __name__ == "__main__":
+    main()
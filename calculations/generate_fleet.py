@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Generate sun LUTs for a fleet of doors in parallel.
+
+Sites are read from a json file, one entry per device:
+
+    [
+        {"name": "coop1", "latlon": "51.365967,6.172045", "after_sunset": 0.5},
+        {"name": "coop2", "latlon": "48.1,11.5", "not_before": 7.0}
+    ]
+
+Each site is computed with `generate_lut.lut_rows` in a separate process and
+written to `<out_dir>/<name>.csv` (or `.bin`). A hash of the inputs is kept in
+`<out_dir>/fleet_manifest.json`, sites whose inputs did not change are skipped.
+Sites with days without sunrise or sunset (polar day or night) cannot be put
+in a LUT, they fail with a message and the other sites are still generated.
+
+Example:
+    python calculations/generate_fleet.py fleet.json --start 2025-01-01 --end 2030-12-31 --out-dir luts
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from generate_lut import lut_rows, parse_latlon, write_lut  # noqa: E402  pylint: disable=wrong-import-position
+
+MANIFEST_FILE = "fleet_manifest.json"
+
+
+def site_rows(
+    site: dict, start: datetime.date, end: datetime.date
+) -> list[tuple[str, float, float]]:
+    """Calculate (date, open, close) rows for a site with `lut_rows`.
+
+    Raises ValueError if the sun does not rise or set on a day.
+    """
+    lat, lon = parse_latlon(site["latlon"])
+    rows = lut_rows(
+        start,
+        end,
+        lat,
+        lon,
+        float(site.get("before_sunrise", 0.0)),
+        float(site.get("after_sunset", 0.0)),
+        float(site.get("not_before", 0.0)),
+    )
+    for date, open_time, close_time in rows:
+        if math.isnan(open_time) or math.isnan(close_time):
+            raise ValueError(f"no sunrise or sunset on {date} (polar day or night) at {lat},{lon}")
+    return rows
+
+
+def site_hash(site: dict, start: datetime.date, end: datetime.date, fmt: str) -> str:
+    """Hash of everything that determines the output, including the sun algorithm."""
+    h = hashlib.sha256()
+    h.update(json.dumps(site, sort_keys=True).encode())
+    h.update(f"{start}|{end}|{fmt}".encode())
+    h.update((SRC_DIR / "sun.py").read_bytes())
+    h.update((SRC_DIR / "sun_lut.py").read_bytes())
+    return h.hexdigest()
+
+
+def _generate_site(args: tuple) -> tuple[str, str | None]:
+    """Worker: generate and write the LUT of one site, returns the name and an error."""
+    site, start, end, file_path = args
+    try:
+        rows = site_rows(site, start, end)
+    except ValueError as e:
+        return site["name"], str(e)
+    write_lut(rows, file_path)
+    return site["name"], None
+
+
+def generate_fleet(
+    sites: list[dict],
+    start: datetime.date,
+    end: datetime.date,
+    out_dir: str | Path,
+    fmt: str = "csv",
+    jobs: int | None = None,
+) -> dict[str, str]:
+    """Generate LUTs for all changed sites.
+
+    Returns {name: "generated" | "skipped" | "failed: <reason>"}.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = out_dir / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    result = {}
+    todo = []
+    hashes = {}
+    for site in sites:
+        name = site["name"]
+        file_path = out_dir / f"{name}.{fmt}"
+        hashes[name] = site_hash(site, start, end, fmt)
+        if manifest.get(name) == hashes[name] and file_path.exists():
+            result[name] = "skipped"
+        else:
+            todo.append((site, start, end, file_path))
+
+    if todo:
+        try:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+                for name, error in pool.map(_generate_site, todo):
+                    if error is not None:
+                        result[name] = f"failed: {error}"
+                        continue
+                    manifest[name] = hashes[name]
+                    result[name] = "generated"
+        finally:
+            # keep finished sites even if one of them failed
+            manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sites", help="json file with a list of sites")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument("--out-dir", default="luts")
+    parser.add_argument("--format", choices=["csv", "bin"], default="csv")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+
+    with open(args.sites, "r") as f:
+        sites = json.load(f)
+
+    result = generate_fleet(sites, args.start, args.end, args.out_dir, args.format, args.jobs)
+    for name, status in result.items():
+        print(f"{name}: {status}")
+    if any(status.startswith("failed") for status in result.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
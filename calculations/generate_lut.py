@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Generate a sun lookup table (`sun_lut.csv`) with the vectorized `sun.sun_times`.
+
+Replaces the notebook workflow. Output format is the one read by
+`timing.extract_floats_from_file`: `date,open,close` in decimal hours UTC.
+Output files ending with `.bin` are written in the binary `sun_lut` format.
+
+Example:
+    python calculations/generate_lut.py 51.365967,6.172045 --start 2024-01-15 --end 2030-12-31
+    python calculations/generate_lut.py --from-csv sun_lut.csv -o sun_lut.bin
+"""
+
+import argparse
+import datetime
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sun  # noqa: E402  pylint: disable=wrong-import-position
+import sun_lut  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def lut_rows(
+    start: datetime.date,
+    end: datetime.date,
+    lat: float,
+    lon: float,
+    before_sunrise: float = 0.0,
+    after_sunset: float = 0.0,
+    not_before: float = 0.0,
+) -> list[tuple[str, float, float]]:
+    """Calculate (date, open, close) rows, offsets work like in `UpdateDoorTimesTask`."""
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    dates, rise, set_ = sun.sun_times(start, end, lat, lon)
+    open_times = np.maximum(rise - before_sunrise, not_before)
+    close_times = set_ + after_sunset
+
+    return [
+        (str(d), float(o), float(c))
+        for d, o, c in zip(dates, open_times, close_times)
+    ]
+
+
+def write_csv(rows: list[tuple[str, float, float]], file_path: str | Path) -> None:
+    """Write rows to a csv file, same format as the notebook produced."""
+    with open(file_path, "w") as f:
+        for date, open_time, close_time in rows:
+            f.write(f"{date},{open_time:.2f},{close_time:.2f}\n")
+
+
+def read_csv(file_path: str | Path) -> list[tuple[str, float, float]]:
+    """Read rows from a csv LUT."""
+    rows = []
+    with open(file_path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            date, open_time, close_time = line.strip().split(",")
+            rows.append((date, float(open_time), float(close_time)))
+    return rows
+
+
+def write_bin(
+    rows: list[tuple[str, float, float]],
+    file_path: str | Path,
+    scale: int = sun_lut.DEFAULT_SCALE,
+) -> None:
+    """Write rows to a binary LUT. Dates must be consecutive days."""
+    if not rows:
+        raise ValueError("No rows to write")
+
+    epoch_day = sun_lut.parse_date(rows[0][0])
+    with open(file_path, "wb") as f:
+        f.write(sun_lut.pack_header(epoch_day, len(rows), scale))
+        for idx, (date, open_time, close_time) in enumerate(rows):
+            if sun_lut.parse_date(date) != epoch_day + idx:
+                raise ValueError(f"Gap in dates at {date}")
+            f.write(sun_lut.pack_record(open_time, close_time, scale))
+
+
+def write_lut(rows: list[tuple[str, float, float]], file_path: str | Path) -> None:
+    """Write csv or binary LUT, depending on file extension."""
+    if str(file_path).endswith(".bin"):
+        write_bin(rows, file_path)
+    else:
+        write_csv(rows, file_path)
+
+
+def csv_to_bin(csv_path: str | Path, bin_path: str | Path) -> None:
+    """Convert a csv LUT to the binary format."""
+    write_bin(read_csv(csv_path), bin_path)
+
+
+def parse_latlon(value: str) -> tuple[float, float]:
+    """Parse 'lat,lon', same format as LOCATION_LATLON."""
+    lat, lon = [float(v) for v in value.strip().strip("[]").split(",")]
+    return lat, lon
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("latlon", nargs="?", help="location as 'lat,lon'")
+    parser.add_argument("--start", type=datetime.date.fromisoformat)
+    parser.add_argument("--end", type=datetime.date.fromisoformat)
+    parser.add_argument("--before-sunrise", type=float, default=0.0)
+    parser.add_argument("--after-sunset", type=float, default=0.0)
+    parser.add_argument("--not-before", type=float, default=0.0)
+    parser.add_argument("--from-csv", help="convert an existing csv LUT instead")
+    parser.add_argument("-o", "--output", default="sun_lut.csv")
+    args = parser.parse_args()
+
+    if args.from_csv:
+        rows = read_csv(args.from_csv)
+        write_lut(rows, args.output)
+        print(f"Converted {len(rows)} rows to {args.output}")
+        return
+
+    if args.latlon is None or args.start is None or args.end is None:
+        parser.error("latlon, --start and --end are required")
+
+    lat, lon = parse_latlon(args.latlon)
+    rows = lut_rows(
+        args.start,
+        args.end,
+        lat,
+        lon,
+        args.before_sunrise,
+        args.after_sunset,
+        args.not_before,
+    )
+    write_lut(rows, args.output)
+    print(f"Written {len(rows)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
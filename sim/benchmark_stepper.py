@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Benchmark the Python overhead of `uln2003.Stepper.step` with mock pins.
+
+`delay_us` is replaced by a function that only records a timestamp, so the
+interval between two phases is the time spent in Python for one phase. This
+time adds to STEP_DELAY_US on the device; its spread is the step jitter.
+
+Compares the original loop (slice, zip, four pin writes per phase) with the
+precomputed step tables, using the digitalio and the register pin writer,
+and the full step drive mode, which has half the phases per step. The
+"+timer" variant has the `PhaseTimer` instrumentation on, its cost shows up
+in the intervals.
+Absolute numbers are for the host, the ratio carries over to the device.
+
+Example:
+    python sim/benchmark_stepper.py --steps 2048
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+class MockPin:
+    """`DigitalInOut` replacement, counts writes."""
+
+    writes = 0
+
+    def __init__(self, pin=None):
+        self.pin = pin
+        self.direction = None
+        self._value = False
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        MockPin.writes += 1
+        self._value = value
+
+    def deinit(self):
+        pass
+
+
+class MockAddressRange:
+    """`memorymap.AddressRange` replacement for the GPIO set/clear registers,
+    counts writes and keeps the output state in `gpio_out`.
+    """
+
+    writes = 0
+    gpio_out = 0
+
+    def __init__(self, start, length):
+        self.start = start
+        self.length = length
+
+    def __setitem__(self, index, value):
+        MockAddressRange.writes += 1
+        mask = int.from_bytes(value, "little")
+        if self.start == uln2003.RegisterPinWriter.GPIO_BASE + uln2003.RegisterPinWriter.OUT_W1TS:
+            MockAddressRange.gpio_out |= mask
+        else:
+            MockAddressRange.gpio_out &= ~mask
+
+
+class DelayRecorder:
+    """`delay_us` replacement, records perf_counter_ns into a preallocated buffer."""
+
+    def __init__(self, size: int):
+        self.stamps = [0] * size
+        self.n = 0
+
+    def __call__(self, us):
+        if self.n < len(self.stamps):
+            self.stamps[self.n] = time.perf_counter_ns()
+            self.n += 1
+
+    def intervals_us(self) -> list[float]:
+        return [(b - a) / 1000 for a, b in zip(self.stamps[: self.n - 1], self.stamps[1 : self.n])]
+
+
+PINS = [types.SimpleNamespace(name=f"GPIO{n}") for n in (2, 3, 4, 5)]
+
+digitalio = types.SimpleNamespace(DigitalInOut=MockPin, Direction=types.SimpleNamespace(OUTPUT=1))
+microcontroller = types.SimpleNamespace(
+    delay_us=lambda us: None, pin=types.SimpleNamespace(**{pin.name: pin for pin in PINS})
+)
+
+# hardware modules for importing uln2003 on a host, kept if already present (tests)
+sys.modules.setdefault("board", types.SimpleNamespace(D2=PINS[0], D3=PINS[1], D4=PINS[2], D5=PINS[3]))
+sys.modules.setdefault("digitalio", digitalio)
+sys.modules.setdefault("microcontroller", microcontroller)
+sys.modules.setdefault("memorymap", types.SimpleNamespace(AddressRange=MockAddressRange))
+
+import uln2003  # noqa: E402  pylint: disable=wrong-import-position
+
+# the mocks above, also if other fakes were installed first
+uln2003.digitalio = digitalio
+uln2003.microcontroller = microcontroller
+
+
+def legacy_step(stepper, count, direction=1):
+    """`Stepper.step` before the step tables, for comparison."""
+    pins = stepper.pins
+    try:
+        for _ in range(count):
+            for bit in stepper.mode[::direction]:
+                for pin, value in zip(pins, bit):
+                    pin.value = value
+                uln2003.delay_us(stepper.delay)
+    finally:
+        stepper.reset()
+
+
+def run(
+    name: str, writer_kind: str, steps: int, legacy: bool = False, mode: str = "half", timing_samples: int = 0
+) -> dict:
+    """Step `steps` steps forward, return interval statistics."""
+    writer = uln2003.make_pin_writer(PINS, writer_kind)
+    stepper = uln2003.Stepper(PINS, writer=writer, mode=mode, timing_samples=timing_samples)
+
+    # writes of the reset at the end of each move
+    MockPin.writes = 0
+    MockAddressRange.writes = 0
+    stepper.reset()
+    reset_writes = MockPin.writes + MockAddressRange.writes
+
+    recorder = DelayRecorder(steps * len(stepper.mode))
+    uln2003.delay_us = recorder
+    MockPin.writes = 0
+    MockAddressRange.writes = 0
+    try:
+        if legacy:
+            legacy_step(stepper, steps, 1)
+        else:
+            stepper.step(steps, 1)
+    finally:
+        uln2003.delay_us = microcontroller.delay_us
+
+    intervals = recorder.intervals_us()
+    phases = recorder.n
+    writes = MockPin.writes + MockAddressRange.writes - reset_writes
+    quantiles = statistics.quantiles(intervals, n=100)
+    return {
+        "name": name,
+        "mean_us": statistics.fmean(intervals),
+        "p99_us": quantiles[98],
+        "max_us": max(intervals),
+        "stdev_us": statistics.stdev(intervals),
+        "writes_per_phase": writes / phases,
+        "phases_per_step": phases / steps,
+        "us_per_step": statistics.fmean(intervals) * phases / steps,
+    }
+
+
+def run_benchmark(steps: int = 2048) -> list[dict]:
+    return [
+        run("legacy", "digitalio", steps, legacy=True),
+        run("table/digitalio", "digitalio", steps),
+        run("table/register", "register", steps),
+        run("full/register", "register", steps, mode="full"),
+        run("full/register+timer", "register", steps, mode="full", timing_samples=512),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=2048)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.steps)
+    print(
+        f"{'variant':20} {'mean [us]':>10} {'p99 [us]':>9} {'max [us]':>9} {'stdev':>7} "
+        f"{'writes/phase':>13} {'phases/step':>12} {'us/step':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:20} {r['mean_us']:10.2f} {r['p99_us']:9.2f} {r['max_us']:9.1f} "
+            f"{r['stdev_us']:7.2f} {r['writes_per_phase']:13.2f} {r['phases_per_step']:12.0f} "
+            f"{r['us_per_step']:8.2f}"
+        )
+    print(f"overhead vs legacy: {results[1]['mean_us'] / results[0]['mean_us']:.0%} (digitalio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""Virtual-clock simulation of the door controller.
+
+Runs `daily_tasks`, `Door` (with a fake stepper), the start-up of `controller`
+and the main loop logic of `main.py` against a virtual clock, with fake `rtc`,
+NTP, `wifi` and `board` modules. A year of operation takes seconds. The result is a timeline of
+events (boot, task runs, door moves, NTP syncs) and loop statistics.
+
+Example:
+    python sim/simulator.py --start 2025-01-01 --days 365
+    python sim/simulator.py --start 2025-03-01 --days 2 --loop-period 5 --ntp-fail
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import datetime
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+
+class VirtualClock:
+    """Replacement for the `time` module of the simulated modules.
+
+    `true_time` is the real (simulated) time, the device clock can drift away
+    from it and is corrected by NTP.
+    """
+
+    def __init__(self, start: float, drift_s_per_day: float = 0.0):
+        self.true_time = float(start)
+        self.offset = 0.0
+        self.drift_s_per_day = drift_s_per_day
+
+    def advance(self, seconds: float) -> None:
+        self.true_time += seconds
+        self.offset += self.drift_s_per_day * seconds / 86400
+
+    # time module interface, the device keeps UTC
+    def time(self) -> int:
+        return int(self.true_time + self.offset)
+
+    def monotonic(self) -> float:
+        return self.true_time
+
+    def localtime(self, secs: float | None = None) -> time.struct_time:
+        return time.gmtime(self.time() if secs is None else int(secs))
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+
+class FakeRTC:
+    """`rtc.RTC()`, reads and sets the device clock."""
+
+    def __init__(self, clock: VirtualClock):
+        self._clock = clock
+
+    @property
+    def datetime(self) -> time.struct_time:
+        return self._clock.localtime()
+
+    @datetime.setter
+    def datetime(self, value: time.struct_time) -> None:
+        self._clock.offset = calendar.timegm(value) - int(self._clock.true_time)
+
+
+class FakeNTP:
+    """`adafruit_ntp.NTP`, returns the true time or fails."""
+
+    def __init__(self, sim: "Simulation"):
+        self._sim = sim
+
+    @property
+    def datetime(self) -> time.struct_time:
+        if self._sim.ntp_fail:
+            self._sim.record("ntp_fail")
+            raise OSError("NTP timeout")
+        self._sim.record("ntp_sync", f"offset {self._sim.clock.offset:+.1f} s")
+        return time.gmtime(int(self._sim.clock.true_time))
+
+
+class FakePin:
+    value = 0
+
+
+class FakeStepper:
+    """Stepper without hardware, a move takes the same (virtual) time as the real one."""
+
+    PHASES = 8  # half step sequence
+    STEP_DELAY_US = 950  # without a ramp
+
+    def __init__(self, sim: "Simulation"):
+        self._sim = sim
+        self.pins = [FakePin() for _ in range(4)]
+        self.mode = [None] * self.PHASES
+        self.mode_name = "half"
+        self.position = 0
+        self.total_steps = 0
+        self.starts = 0  # steps that energized the coils from rest
+        self._held = None  # mode and direction of the coils held by the last step
+
+    def step(self, count: int, direction: int = 1, ramp=None, offset: int = 0, hold: bool = False) -> None:
+        if count > 0 and self._held != (self.mode_name, direction):
+            self.starts += 1
+        if hold:
+            self._held = (self.mode_name, direction) if count > 0 else self._held
+        else:
+            self._held = None
+        self.position += count * direction
+        self.total_steps += count
+        delays_us = count * self.STEP_DELAY_US if ramp is None else ramp.step_delays_us(offset, count)
+        self._sim.clock.advance(delays_us * self.PHASES / 1e6)
+
+    def set_mode(self, name: str) -> None:
+        self.mode_name = name  # same speed in every mode, the duration does not change
+
+    @property
+    def held(self) -> bool:
+        """True while the coils are energized between steps."""
+        return self._held is not None
+
+    def reset(self) -> None:
+        self._held = None
+
+
+def _install_fake_modules() -> None:
+    """Hardware modules for importing the src modules on a host, kept if already present (tests)."""
+    fakes = {
+        "board": types.SimpleNamespace(D0=0, D1=1, D2=2, D3=3, D4=4, D5=5),
+        "digitalio": types.SimpleNamespace(
+            DigitalInOut=lambda pin: FakePin(), Direction=types.SimpleNamespace(OUTPUT=1)
+        ),
+        "microcontroller": types.SimpleNamespace(delay_us=lambda us: None),
+        "rtc": types.SimpleNamespace(RTC=None),
+        "adafruit_ntp": types.SimpleNamespace(NTP=None),
+        "socketpool": types.SimpleNamespace(SocketPool=lambda radio: None),
+        "wifi": types.SimpleNamespace(radio=None),
+    }
+    for name, module in fakes.items():
+        sys.modules.setdefault(name, module)
+
+
+_install_fake_modules()
+
+import controller  # noqa: E402  pylint: disable=wrong-import-position
+import daily_tasks  # noqa: E402  pylint: disable=wrong-import-position
+import door  # noqa: E402  pylint: disable=wrong-import-position
+import logger  # noqa: E402  pylint: disable=wrong-import-position
+import sun  # noqa: E402  pylint: disable=wrong-import-position
+import timing  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def _load_src_module(name: str) -> types.ModuleType:
+    """Load a src module from its file, also if tests replaced it in sys.modules."""
+    spec = importlib.util.spec_from_file_location(f"_sim_{name}", SRC / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# speed ramps of the real stepper driver, for the durations of the fake stepper
+uln2003 = _load_src_module("uln2003")
+
+# main loop parameters of main.py
+from controller import (  # noqa: E402  pylint: disable=wrong-import-position
+    MOTION_MQTT_INTERVAL,
+    MQTT_LOOP_TIMEOUT,
+    MQTT_MIN_TIMEOUT,
+)
+
+_MISSING = object()
+
+
+class Simulation:
+    """Simulated controller, use as context manager.
+
+    `loop_period` is the max wait per main loop iteration (5 s on the device,
+    waiting for mqtt). With None the loop jumps straight to the next deadline,
+    which is what makes simulating a year fast.
+    """
+
+    def __init__(
+        self,
+        start: datetime.datetime,
+        latlon: str = "51.365967,6.172045",
+        settings: dict[str, str] | None = None,
+        loop_period: float | None = None,
+        drift_s_per_day: float = 0.0,
+    ):
+        self.clock = VirtualClock(calendar.timegm(start.utctimetuple()), drift_s_per_day)
+        self.settings = {"LOCATION_LATLON": latlon, **(settings or {})}
+        self.loop_period = loop_period
+        self.ntp_fail = False
+
+        self.events: list[tuple[str, str, str]] = []  # (device time, event, detail)
+        self.iterations = 0
+        self.motion_iterations = 0  # iterations running a slice of a door move
+        self.motion_polls = 0  # mqtt polls during door moves
+        self._next_mqtt_poll = 0.0
+        self.loop_cpu_s = 0.0
+
+        self.door: door.Door | None = None
+        self.tasks: tuple = ()
+        self.scheduler: daily_tasks.Scheduler | None = None
+        self._tick = timing.Tick(0)
+
+        self._saved: list[tuple[object, str, object]] = []
+        self._saved_env: dict[str, str | None] = {}
+        self._tmp: tempfile.TemporaryDirectory | None = None
+        self._cwd = ""
+
+    # ------------------------------ setup ------------------------------
+    def _patch(self, obj: object, name: str, value: object) -> None:
+        self._saved.append((obj, name, getattr(obj, name, _MISSING)))
+        setattr(obj, name, value)
+
+    def _log(self, level: str):
+        def log(message):
+            self.record(level, str(message))
+
+        return log
+
+    def __enter__(self) -> "Simulation":
+        for module in (daily_tasks, door, timing, logger):
+            self._patch(module, "time", self.clock)
+        self._patch(timing, "rtc", types.SimpleNamespace(RTC=lambda: FakeRTC(self.clock)))
+        self._patch(
+            timing, "adafruit_ntp", types.SimpleNamespace(NTP=lambda pool, tz_offset=0: FakeNTP(self))
+        )
+        self._patch(timing, "socketpool", types.SimpleNamespace(SocketPool=lambda radio: None))
+        self._patch(timing, "wifi", types.SimpleNamespace(radio=None))
+        self._patch(timing, "print", lambda *args, **kwargs: None)  # shadows the builtin
+        self._patch(door, "Stepper", lambda pins: FakeStepper(self))
+        self._patch(door, "FULL_ROTATION", 512)
+        self._patch(door, "Ramp", uln2003.Ramp)
+        self._patch(logger, "debug", lambda message, *args: None)
+        self._patch(daily_tasks, "gc", types.SimpleNamespace(collect=lambda: None, mem_free=lambda: 100_000))
+        for level in ("info", "warning", "error"):
+            self._patch(logger, level, self._log(level))
+
+        for key, value in self.settings.items():
+            self._saved_env[key] = os.environ.get(key)
+            os.environ[key] = value
+        sun.clear_cache()
+
+        # door state file lives in the working directory
+        self._tmp = tempfile.TemporaryDirectory()
+        self._cwd = os.getcwd()
+        os.chdir(self._tmp.name)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        os.chdir(self._cwd)
+        if self._tmp is not None:
+            self._tmp.cleanup()
+        for obj, name, value in reversed(self._saved):
+            if value is _MISSING:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, value)
+        self._saved = []
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        sun.clear_cache()
+
+    # ------------------------------ simulation ------------------------------
+    def record(self, event: str, detail: str = "") -> None:
+        stamp = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(*self.clock.localtime()[0:6])
+        self.events.append((stamp, event, detail))
+
+    def boot(self) -> None:
+        """Start up like main.py: create door and tasks, set door times, init open/close.
+
+        A move started by init_open_close is run by the following loop iterations.
+        """
+        self.record("boot")
+        controller.set_clock()
+        self.door = door.Door()  # opens the door if the last state is unknown or moving
+        self.record("door", self.door.state)
+        self.tasks, self.scheduler = controller.create_scheduler(self.door)
+        self._run_observed(lambda: controller.start(self.door, self.tasks, self.scheduler))
+
+    def reboot(self) -> None:
+        """Reset (watchdog, power loss), RAM state is lost, files are kept.
+
+        Entries of a held door journal are kept too, as if the file system
+        had written out its sector buffer.
+        """
+        self.record("reset")
+        door._journal.release()
+        self.boot()
+
+    def _run_observed(self, fn) -> None:
+        """Run fn and record task executions and door state changes."""
+        counts = [task.exec_count for task in self.tasks]
+        state = self.door.state
+        fn()
+        for task, count in zip(self.tasks, counts):
+            if task.exec_count != count:
+                self.record("task", task.name)
+        if self.door.state != state:
+            self.record("door", self.door.state)
+
+    def step(self, max_wait: float | None = None) -> None:
+        """One main loop iteration, waits at most max_wait (true) seconds."""
+        t_start = time.perf_counter()
+        self._run_observed(lambda: self.scheduler.run_due(self._tick.update()))
+        poll = self.clock.true_time >= self._next_mqtt_poll
+        if self.door.moving:
+            self._run_observed(lambda: self.door.step_motion(poll))
+            self.motion_iterations += 1
+        else:
+            self.scheduler.collect_garbage()
+        self.loop_cpu_s += time.perf_counter() - t_start
+        self.iterations += 1
+
+        if self.door.moving:
+            if not poll:
+                return  # next slice right away, on the same speed ramp
+            wait = MQTT_MIN_TIMEOUT  # serve mqtt between slices of a move
+            self.motion_polls += 1
+        elif self.loop_period is None:
+            wait = self.scheduler.time_until_next()
+            wait = MQTT_LOOP_TIMEOUT if wait is None else max(wait, MQTT_MIN_TIMEOUT)
+        else:
+            wait = self.scheduler.wait_time(MQTT_MIN_TIMEOUT, self.loop_period)
+        if max_wait is not None:
+            wait = min(wait, max_wait)
+        self.clock.advance(wait)  # waiting for mqtt messages
+        self._next_mqtt_poll = self.clock.true_time + MOTION_MQTT_INTERVAL
+
+    def run_until(self, end: datetime.datetime) -> None:
+        """Run the main loop until the (true) time reaches end."""
+        end_ts = calendar.timegm(end.utctimetuple())
+        while self.clock.true_time < end_ts:
+            self.step(end_ts - self.clock.true_time)
+
+    def door_events(self) -> list[tuple[str, str]]:
+        """(time, state) of door state changes, without the moving state."""
+        return [
+            (stamp, detail)
+            for stamp, event, detail in self.events
+            if event == "door" and detail != door.STATE_MOVING
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat, default=datetime.datetime(2025, 1, 1))
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--latlon", default="51.365967,6.172045")
+    parser.add_argument("--loop-period", type=float, default=None, help="max wait per loop, 5 on the device")
+    parser.add_argument("--drift", type=float, default=0.0, help="clock drift, seconds per day")
+    parser.add_argument("--ntp-fail", action="store_true", help="NTP never answers")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    sim = Simulation(args.start, args.latlon, loop_period=args.loop_period, drift_s_per_day=args.drift)
+    sim.ntp_fail = args.ntp_fail
+
+    t_start = time.perf_counter()
+    with sim:
+        sim.boot()
+        sim.run_until(args.start + datetime.timedelta(days=args.days))
+    elapsed = time.perf_counter() - t_start
+
+    if not args.quiet:
+        for stamp, event, detail in sim.events:
+            print(f"{stamp} {event:8} {detail}")
+
+    doors = sim.door_events()
+    print(f"simulated {args.days} days in {elapsed:.2f} s")
+    print(f"door moves: {len(doors)}, loop iterations: {sim.iterations}")
+    if sim.iterations:
+        print(f"loop cost: {sim.loop_cpu_s / sim.iterations * 1e6:.1f} us per iteration")
+    for task in sim.tasks:
+        print(f"{task.name:18} {task.stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
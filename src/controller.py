@@ -0,0 +1,54 @@
+"""
+Main loop parameters and start-up sequence of the controller.
+
+Shared by `main.py` and the simulator, importing it has no side effects:
+`main.py` owns the watchdog, wifi and mqtt.
+"""
+
+import os
+
+import logger
+import timing
+from daily_tasks import Scheduler, TASK_STATE_FILE, create_tasks, init_open_close
+
+MQTT_LOOP_TIMEOUT = 5.0  # max seconds to wait for mqtt messages per loop
+MQTT_MIN_TIMEOUT = 1.0  # minimqtt does not accept a timeout below its socket timeout
+# seconds between mqtt polls while the door moves. A poll stops the motor for
+# MQTT_MIN_TIMEOUT with the coils holding the door: a shorter interval reacts
+# sooner to commands, a longer one moves the door faster.
+MOTION_MQTT_INTERVAL = float(os.getenv("DOOR_MQTT_INTERVAL", "10"))
+STATUS_INTERVAL = 10  # seconds between status messages
+
+
+def set_clock():
+    """set time, the RTC keeps it over a soft reset, SetClockTask syncs daily"""
+    if not timing.is_rtc_set():
+        timing.update_ntp_time()
+
+
+def create_scheduler(door) -> tuple:
+    """create the daily tasks of door and their scheduler, returns (tasks, scheduler)"""
+    tasks = create_tasks(door)
+    return tasks, Scheduler(list(tasks), state_file=TASK_STATE_FILE)
+
+
+def start(door, tasks, scheduler) -> bool:
+    """resume the daily tasks after a (re)start, returns True if their state was restored
+
+    Sets today's door times and opens or closes the door if it missed a move,
+    without redoing today's tasks. A move started here is run by the main loop.
+    """
+    open_task, close_task, _, set_door_timing_task = tasks
+
+    restored = scheduler.load_state()
+    if restored:
+        logger.info("Restored task state")
+
+    set_door_timing_task.main()  # unconditionally, execute() skips it before exec_time
+
+    logger.info(f"Door state: {door.state}")
+
+    init_open_close(open_task, close_task, door_reset=door.recalibrated)
+    scheduler.reschedule()
+    scheduler.save_state()
+    return restored
@@ -1,39 +1,201 @@
 """
 Tasks module for scheduling and executing daily tasks.
+
+Besides the daily `Task`, `IntervalTask` and `CronTask` run housekeeping
+(log truncation, gc, status publishing) on their own cadence. All tasks
+share the scheduling core: `is_due`, `next_run` and `execute`.
 """
 
+import gc
 import os
+import struct
 import time
 import logger
 import timing
 from door import Door, STATE_CLOSED, STATE_OPEN
 import sun
 
+STATS_SIZE = 16  # executions kept per task
+
+TASK_STATE_FILE = "task_state.bin"
+TASK_STATE_MAGIC = b"TSK1"
+
+GC_INTERVAL = 60  # min seconds between explicit garbage collections
+GC_MIN_IDLE = 2.0  # collect only if nothing is due for this long
+MEM_TREND_SIZE = 32  # mem_free samples kept
+
+
+class TaskStats:
+    """Execution telemetry of a task.
+
+    Lateness (seconds between due time and start) and duration of `main()`
+    of the last `size` executions are kept in preallocated ring buffers,
+    totals and maxima over the whole uptime in counters.
+    """
+
+    __slots__ = (
+        "size",
+        "lateness",
+        "duration",
+        "_idx",
+        "runs",
+        "failures",
+        "max_lateness",
+        "max_duration",
+        "last_error",
+        "_summary",
+    )
+
+    def __init__(self, size: int = STATS_SIZE):
+        self.size = size
+        self.lateness = [0.0] * size
+        self.duration = [0.0] * size
+        self._idx = 0
+        self.runs = 0
+        self.failures = 0
+        self.max_lateness = 0.0
+        self.max_duration = 0.0
+        self.last_error = ""
+        self._summary = {"runs": 0, "fail": 0, "late_max": 0.0, "late_avg": 0.0, "exec_max": 0.0}
+
+    def record(self, lateness: float, duration: float):
+        """Record a successful execution."""
+        self.lateness[self._idx] = lateness
+        self.duration[self._idx] = duration
+        self._idx = (self._idx + 1) % self.size
+        self.runs += 1
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.max_duration = max(self.max_duration, duration)
+
+    def record_failure(self, error: Exception):
+        """Record a failed execution."""
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def samples(self) -> list[tuple[float, float]]:
+        """Return (lateness, duration) of the kept executions, oldest first."""
+        n = min(self.runs, self.size)
+        start = (self._idx - n) % self.size
+        return [
+            (self.lateness[(start + i) % self.size], self.duration[(start + i) % self.size])
+            for i in range(n)
+        ]
+
+    def summary(self) -> dict:
+        """Compact summary for the status message, the same dict is updated each call."""
+        n = min(self.runs, self.size)
+        late_sum = 0.0
+        for i in range(n):
+            late_sum += self.lateness[i]
+        summary = self._summary
+        summary["runs"] = self.runs
+        summary["fail"] = self.failures
+        summary["late_max"] = round(self.max_lateness, 1)
+        summary["late_avg"] = round(late_sum / n, 1) if n else 0.0
+        summary["exec_max"] = round(self.max_duration, 1)
+        return summary
+
+    def dump(self) -> dict:
+        """Full telemetry, for the dump command."""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "max_lateness": self.max_lateness,
+            "max_duration": self.max_duration,
+            "samples": self.samples(),
+        }
+
+
+class MemTrend:
+    """Free memory after the explicit garbage collections, in a ring buffer."""
+
+    __slots__ = ("size", "times", "values", "_idx", "count", "_summary")
+
+    def __init__(self, size: int = MEM_TREND_SIZE):
+        self.size = size
+        self.times = [0] * size
+        self.values = [0] * size
+        self._idx = 0
+        self.count = 0
+        self._summary = {"free": 0, "min": 0, "trend_h": 0}
+
+    def record(self, t: int, mem_free: int):
+        """Record a sample."""
+        self.times[self._idx] = t
+        self.values[self._idx] = mem_free
+        self._idx = (self._idx + 1) % self.size
+        self.count += 1
+
+    def summary(self) -> dict:
+        """Last and lowest free memory and the trend in bytes per hour over
+        the kept samples. The same dict is updated each call.
+        """
+        summary = self._summary
+        n = min(self.count, self.size)
+        if n == 0:
+            return summary
+        newest = (self._idx - 1) % self.size
+        oldest = (self._idx - n) % self.size
+        lowest = self.values[newest]
+        for i in range(n):
+            lowest = min(lowest, self.values[i])
+        span = self.times[newest] - self.times[oldest]
+        summary["free"] = self.values[newest]
+        summary["min"] = lowest
+        summary["trend_h"] = (
+            (self.values[newest] - self.values[oldest]) * 3600 // span if span > 0 else 0
+        )
+        return summary
+
 
 class Task:
     """A task that runs once a day at a specified time."""
 
+    __slots__ = (
+        "name",
+        "exec_time",
+        "_yday_executed",
+        "_last_run",
+        "_exec_count",
+        "tick",
+        "stats",
+    )
+
+    persistent = True  # execution state is saved by the Scheduler
+
     def __init__(self, name: str, exec_time: float | None):
         self.name = name
         self.exec_time = exec_time
         self._yday_executed = -1 # used to reset executed flag on new day
+        self._last_run = 0  # time of the last execution
         self._exec_count = 0
+        self.tick = None  # tick of the running execution, for use in main()
+        self.stats = TaskStats()
 
     @property
     def exec_count(self) -> int:
         """Return the number of times the task has been executed."""
         return self._exec_count
 
+    def _current_tick(self) -> timing.Tick:
+        """Tick of the running execution, a snapshot of now if main() is called directly."""
+        return self.tick if self.tick is not None else timing.Tick()
+
+    def executed_on(self, tick: timing.Tick) -> bool:
+        """Return True if the task has been executed on the day of tick."""
+        return self._yday_executed == tick.yday
+
     @property
     def is_executed(self) -> bool:
         """Returns True if the task has been executed today."""
-        return self._yday_executed == time.localtime().tm_yday
+        return self.executed_on(timing.Tick())
 
     @is_executed.setter
     def is_executed(self, value: bool):
         """Set the executed flag."""
         if value:
-            self._yday_executed = time.localtime().tm_yday
+            self._yday_executed = timing.Tick().yday
         else:
             self._yday_executed = -1
 
@@ -41,22 +203,71 @@ class Task:
         """Main task function."""
         raise NotImplementedError  # pragma: no cover
 
-    def execute(self):
-        """Execute the task if the current time matches the execution time.
+    def is_due(self, tick: timing.Tick) -> bool:
+        """Return True if the task should run at tick."""
+        if self.exec_time is None:
+            return False
+        return tick.hours >= self.exec_time and self._yday_executed != tick.yday
+
+    def _mark_executed(self, tick: timing.Tick):
+        """Remember the execution at tick."""
+        self._yday_executed = tick.yday
+
+    def _due_time(self, tick: timing.Tick) -> float:
+        """Absolute time the execution at tick was due."""
+        return tick.time - (tick.hours - self.exec_time) * 3600
+
+    def execute(self, tick: timing.Tick | None = None):
+        """Execute the task if it is due at tick (default: now).
         Automatically resets execution flag on a new day.
         """
-        logger.debug(f"Executing: {self}")
+        logger.debug("Executing: %s", self)
+
+        if tick is None:
+            tick = timing.Tick()
+
+        if self.is_due(tick):
+            logger.debug("Executing task: %s %s", self.name, tick)
+            self.tick = tick
+            lateness = time.time() - self._due_time(tick)
+            t_start = time.monotonic()
+            try:
+                self.main()
+            except Exception as e:
+                self.stats.record_failure(e)
+                raise
+            finally:
+                self.tick = None
+            self.stats.record(lateness, time.monotonic() - t_start)
+            self._mark_executed(tick)
+            self._last_run = tick.time
+            self._exec_count += 1
 
-        if self.exec_time is None:
+    def restore(self, last_run: int, tick: timing.Tick):
+        """Restore the execution state from the time of the last execution."""
+        self._last_run = last_run
+        if last_run <= 0:
             return
+        ts = time.localtime(last_run)
+        if ts.tm_year == tick.year and ts.tm_yday == tick.yday:
+            self._yday_executed = tick.yday
 
-        current_time = timing.now()
+    def next_run(self, now: float | None = None) -> float | None:
+        """Return absolute time (seconds, like `time.time()`) of the next execution.
+        None if the task has no execution time.
+        """
+        if self.exec_time is None:
+            return None
 
-        if current_time >= self.exec_time and not self.is_executed:
-            logger.debug(f"Executing task: {self.name} {current_time=}")
-            self.main()
-            self._yday_executed = time.localtime().tm_yday
-            self._exec_count += 1
+        if now is None:
+            now = time.time()
+        ts = time.localtime(int(now))
+        midnight = int(now) - (ts.tm_hour * 3600 + ts.tm_min * 60 + ts.tm_sec)
+        fire_time = midnight + self.exec_time * 3600
+
+        if self._yday_executed == ts.tm_yday:
+            return fire_time + 86400  # done today, same time tomorrow
+        return max(fire_time, now)
 
     def __str__(self):
         return (
@@ -64,9 +275,152 @@ class Task:
         )
 
 
+class PeriodicTask(Task):
+    """Base for tasks that run more often than once a day.
+
+    Fire times are absolute seconds. After an execution the next fire time is
+    the first one after the tick, missed runs are skipped instead of caught up.
+    Subclasses implement `_first_after`.
+    """
+
+    __slots__ = ("_next",)
+
+    persistent = False  # runs often, saving each run would wear the flash
+
+    def __init__(self, name: str):
+        super().__init__(name, exec_time=None)
+        self._next: int | None = None
+
+    def _first_after(self, t: int) -> int:
+        """Return the first fire time after t."""
+        raise NotImplementedError  # pragma: no cover
+
+    def next_run(self, now: float | None = None) -> int:
+        """Return absolute time of the next execution."""
+        if self._next is None:
+            if now is None:
+                now = time.time()
+            self._next = self._first_after(int(now) - 1)
+        return self._next
+
+    def is_due(self, tick: timing.Tick) -> bool:
+        return tick.time >= self.next_run(tick.time)
+
+    def _mark_executed(self, tick: timing.Tick):
+        self._next = self._first_after(tick.time)
+
+    def _due_time(self, tick: timing.Tick) -> float:
+        return self.next_run(tick.time)
+
+    def __str__(self):
+        return f"{self.name} next={self._next}"
+
+
+class IntervalTask(PeriodicTask):
+    """A task that runs every `interval` seconds.
+
+    Fire times lie on a fixed grid `offset + k * interval` (absolute seconds),
+    so the time spent in the loop and in tasks does not accumulate as drift.
+    For example interval=3600 runs on the full hour, offset=300 at 5 past.
+    """
+
+    __slots__ = ("interval", "offset")
+
+    def __init__(self, name: str, interval: int, offset: int = 0):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        super().__init__(name)
+        self.interval = interval
+        self.offset = offset
+
+    def _first_after(self, t: int) -> int:
+        return self.offset + ((t - self.offset) // self.interval + 1) * self.interval
+
+
+def _parse_cron_field(field: str, lo: int, hi: int) -> list[int] | None:
+    """Parse a cron field ('*', '5', '1-5', '*/15', '0,30', '8-18/2').
+    Returns sorted allowed values, None for any value.
+    """
+    if field == "*":
+        return None
+
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/")
+            step = int(step_str)
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start_str, end_str = part.split("-")
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = start if step == 1 else hi
+        if start < lo or end > hi or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronTask(PeriodicTask):
+    """A task that runs at times given by a cron spec (UTC, like the RTC).
+
+    The spec has the usual five fields: minute, hour, day of month, month and
+    day of week (0 or 7 is Sunday). Fields support '*', values, ranges, lists
+    and steps, e.g. "*/15 6-22 * * 1-5". As in cron, a day matches either day
+    of month or day of week if both are restricted.
+    """
+
+    __slots__ = ("spec", "minutes", "hours", "days", "months", "weekdays")
+
+    MAX_DAYS = 8 * 366  # longest search, e.g. for Feb 29
+
+    def __init__(self, name: str, spec: str):
+        super().__init__(name)
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {spec}")
+        self.spec = spec
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        weekdays = _parse_cron_field(fields[4], 0, 7)
+        self.weekdays = None if weekdays is None else sorted({d % 7 for d in weekdays})
+
+    def _day_matches(self, ts) -> bool:
+        if self.months is not None and ts.tm_mon not in self.months:
+            return False
+        day_ok = self.days is None or ts.tm_mday in self.days
+        weekday_ok = self.weekdays is None or (ts.tm_wday + 1) % 7 in self.weekdays
+        if self.days is not None and self.weekdays is not None:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def _first_after(self, t: int) -> int:
+        t = t // 60 * 60 + 60  # next full minute
+        for _ in range(self.MAX_DAYS):
+            ts = time.localtime(t)
+            midnight = t - (ts.tm_hour * 3600 + ts.tm_min * 60 + ts.tm_sec)
+            if self._day_matches(ts):
+                for hour in self.hours or range(24):
+                    if hour < ts.tm_hour:
+                        continue
+                    for minute in self.minutes or range(60):
+                        fire_time = midnight + hour * 3600 + minute * 60
+                        if fire_time >= t:
+                            return fire_time
+            t = midnight + 86400
+        raise ValueError(f"Cron spec never matches: {self.spec}")
+
+
 class OpenDoorTask(Task):
     """Open the door at the specified time."""
 
+    __slots__ = ("door",)
+
     def __init__(self, exec_time: float | None, door: Door):
         super().__init__("open_door", exec_time)
         self.door = door
@@ -76,12 +430,14 @@ class OpenDoorTask(Task):
         if self.door.state == STATE_OPEN:
             return
 
-        self.door.open()
+        self.door.start_open()  # the main loop runs the move
 
 
 class CloseDoorTask(Task):
     """Close the door at the specified time."""
 
+    __slots__ = ("door",)
+
     def __init__(self, exec_time: float | None, door: Door):
         super().__init__("close_door", exec_time)
         self.door = door
@@ -91,12 +447,14 @@ class CloseDoorTask(Task):
         if self.door.state == STATE_CLOSED:
             return
 
-        self.door.close()
+        self.door.start_close()  # the main loop runs the move
 
 
 class SetClockTask(Task):
     """set clock from NTP server"""
 
+    __slots__ = ()
+
     def __init__(self, exec_time: float = 1.0):
         super().__init__("set_clock", exec_time)
 
@@ -110,14 +468,42 @@ class SetClockTask(Task):
 
 
 class UpdateDoorTimesTask(Task):
-    """Update open and close times from rise and set times"""
+    """Update open and close times from rise and set times.
+
+    Rise and set are calculated for OPEN_ZENITH and CLOSE_ZENITH settings
+    (angle in degrees or a name from `sun.ZENITHS`, e.g. "civil"), unless
+    zeniths are given explicitly.
+
+    Alternatively OPEN_ELEVATION / CLOSE_ELEVATION (degrees, e.g. "-4.0") use
+    the time the sun crosses that elevation, see `sun.elevation_time`.
+    """
+
+    __slots__ = (
+        "open_task",
+        "close_task",
+        "open_zenith",
+        "close_zenith",
+        "open_elevation",
+        "close_elevation",
+    )
 
     def __init__(
-        self, exec_time: float, open_task: OpenDoorTask, close_task: CloseDoorTask
+        self,
+        exec_time: float,
+        open_task: OpenDoorTask,
+        close_task: CloseDoorTask,
+        open_zenith: float | str | None = None,
+        close_zenith: float | str | None = None,
+        open_elevation: float | None = None,
+        close_elevation: float | None = None,
     ):
         super().__init__("update_door_times", exec_time)
         self.open_task = open_task
         self.close_task = close_task
+        self.open_zenith = open_zenith
+        self.close_zenith = close_zenith
+        self.open_elevation = open_elevation
+        self.close_elevation = close_elevation
 
     def main(self):
         """Update open and close times."""
@@ -125,15 +511,35 @@ class UpdateDoorTimesTask(Task):
         if not timing.is_rtc_set():
             raise RuntimeError("RTC not set")
 
-        ts = time.localtime()
+        tick = self._current_tick()
 
         before_sunrise = float(os.getenv("BEFORE_SUNRISE", "0.0"))
         after_sunset = float(os.getenv("AFTER_SUNSET", "0.0"))
         not_before = float(os.getenv("NOT_BEFORE", "0.0"))
+        open_zenith = self.open_zenith or os.getenv("OPEN_ZENITH", "official")
+        close_zenith = self.close_zenith or os.getenv("CLOSE_ZENITH", "official")
+
+        open_elevation = self.open_elevation
+        if open_elevation is None and os.getenv("OPEN_ELEVATION") is not None:
+            open_elevation = float(os.getenv("OPEN_ELEVATION"))
+        close_elevation = self.close_elevation
+        if close_elevation is None and os.getenv("CLOSE_ELEVATION") is not None:
+            close_elevation = float(os.getenv("CLOSE_ELEVATION"))
 
         # calculate sunrise and sunset times
-        sunrise = sun.sunrise(ts.tm_year, ts.tm_mon, ts.tm_mday)
-        sunset = sun.sunset(ts.tm_year, ts.tm_mon, ts.tm_mday)
+        if open_elevation is not None:
+            sunrise = sun.elevation_time(
+                tick.year, tick.month, tick.day, open_elevation, rising=True
+            )
+        else:
+            sunrise = sun.sunrise(tick.year, tick.month, tick.day, zenith=open_zenith)
+
+        if close_elevation is not None:
+            sunset = sun.elevation_time(
+                tick.year, tick.month, tick.day, close_elevation, rising=False
+            )
+        else:
+            sunset = sun.sunset(tick.year, tick.month, tick.day, zenith=close_zenith)
 
         logger.info(f"sunrise: {timing.hours2str(sunrise)} sunset: {timing.hours2str(sunset)}")
 
@@ -149,19 +555,207 @@ class UpdateDoorTimesTask(Task):
         self.close_task.exec_time = close_time
 
 
-def init_open_close(open_task: Task, close_task: Task):
-    """Initialize the open and close tasks."""
+class TruncateLogTask(CronTask):
+    """Keep the log file short."""
+
+    __slots__ = ()
+
+    def __init__(self, spec: str = "0 * * * *"):
+        super().__init__("truncate_log", spec)
+
+    def main(self):
+        """Truncate the log file."""
+        try:
+            logger.truncate_log()
+        except OSError as e:
+            logger.debug("Could not truncate log: %s", e)
+
+
+class Scheduler:
+    """Run tasks by deadline instead of polling all of them.
+
+    Tasks are kept in a queue sorted by their next absolute fire time. The main
+    loop asks `time_until_next` how long it may wait and calls `run_due`, which
+    executes only the tasks whose time has come. Periodic tasks are pushed back
+    alone. A daily task can change the execution time of other tasks
+    (`UpdateDoorTimesTask`), so after one ran the queue is rebuilt and the
+    state saved, otherwise explicitly with `reschedule`.
+    """
+
+    def __init__(self, tasks: list[Task], state_file: str | None = None):
+        self.tasks = tasks
+        self.state_file = state_file
+        self._queue: list[tuple[float, int, Task]] = []  # (fire time, index, task)
+        self._saved_state = b""
+        self._last_gc = 0
+        self.mem = MemTrend()
+        self.reschedule()
+
+    def collect_garbage(
+        self, min_idle: float = GC_MIN_IDLE, interval: int = GC_INTERVAL, now: float | None = None
+    ) -> bool:
+        """Run the garbage collector at an idle point: at most every interval
+        seconds and only if no task is due within min_idle seconds, so the
+        pause does not delay a task. Records mem_free. Returns True if collected.
+        """
+        if now is None:
+            now = time.time()
+        if now - self._last_gc < interval:
+            return False
+        wait = self.time_until_next(now)
+        if wait is not None and wait < min_idle:
+            return False
+
+        gc.collect()
+        self._last_gc = now
+        self.mem.record(int(now), gc.mem_free())  # type: ignore
+        return True
+
+    def _state_record(self) -> bytes:
+        """Pack the last run times of the persistent tasks into one record."""
+        last_runs = [task._last_run for task in self.tasks if task.persistent]
+        return struct.pack(f"<4sH{len(last_runs)}I", TASK_STATE_MAGIC, len(last_runs), *last_runs)
+
+    def save_state(self):
+        """Write the execution state to state_file, only if it changed."""
+        if self.state_file is None:
+            return
+        record = self._state_record()
+        if record == self._saved_state:
+            return
+
+        try:
+            # write and rename, a reset while writing keeps the old record
+            with open(self.state_file + ".tmp", "wb") as f:
+                f.write(record)
+            os.rename(self.state_file + ".tmp", self.state_file)
+            self._saved_state = record
+        except OSError as e:
+            logger.debug("Could not save task state: %s", e)
+
+    def load_state(self, tick: timing.Tick | None = None) -> bool:
+        """Restore the execution state saved by `save_state`. Returns True if restored."""
+        if self.state_file is None:
+            return False
+        if tick is None:
+            tick = timing.Tick()
+
+        tasks = [task for task in self.tasks if task.persistent]
+        try:
+            with open(self.state_file, "rb") as f:
+                record = f.read()
+            magic, count = struct.unpack_from("<4sH", record)
+            if magic != TASK_STATE_MAGIC or count != len(tasks):
+                raise ValueError("task state does not match tasks")
+            last_runs = struct.unpack_from(f"<{count}I", record, 6)
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug("Could not load task state: %s", e)
+            return False
+
+        for task, last_run in zip(tasks, last_runs):
+            task.restore(last_run, tick)
+        self._saved_state = record
+        self.reschedule(tick.time)
+        return True
+
+    def _push(self, fire_time: float, idx: int, task: Task):
+        """Insert into the sorted queue, earliest deadline first."""
+        pos = len(self._queue)
+        while pos > 0 and self._queue[pos - 1][0] > fire_time:
+            pos -= 1
+        self._queue.insert(pos, (fire_time, idx, task))
+
+    def reschedule(self, now: float | None = None):
+        """Recalculate fire times of all tasks."""
+        if now is None:
+            now = time.time()
+        self._queue = []
+        for idx, task in enumerate(self.tasks):
+            fire_time = task.next_run(now)
+            if fire_time is not None:
+                self._push(fire_time, idx, task)
+
+    def add(self, task: Task, now: float | None = None):
+        """Add a task and schedule it."""
+        self.tasks.append(task)
+        fire_time = task.next_run(now)
+        if fire_time is not None:
+            self._push(fire_time, len(self.tasks) - 1, task)
+
+    def time_until_next(self, now: float | None = None) -> float | None:
+        """Seconds until the next deadline (0 if overdue), None if nothing is scheduled."""
+        if not self._queue:
+            return None
+        if now is None:
+            now = time.time()
+        return max(self._queue[0][0] - now, 0.0)
+
+    def wait_time(self, min_wait: float, max_wait: float, now: float | None = None) -> float:
+        """Time to wait for the next deadline, clamped to [min_wait, max_wait]."""
+        wait = self.time_until_next(now)
+        if wait is None:
+            return max_wait
+        return max(min_wait, min(wait, max_wait))
+
+    def run_due(self, tick: timing.Tick | None = None) -> int:
+        """Execute tasks that are due at tick (default: now). Returns the number of tasks run."""
+        if tick is None:
+            tick = timing.Tick()
+
+        count = 0
+        persistent_ran = False
+        while self._queue and self._queue[0][0] <= tick.time:
+            _, idx, task = self._queue.pop(0)
+            task.execute(tick)
+            count += 1
+            if task.persistent:
+                persistent_ran = True
+            else:
+                # periodic tasks only move themselves, no rebuild or state save
+                self._push(task.next_run(tick.time), idx, task)
+
+        if persistent_ran:
+            # daily tasks are persisted and may change other tasks' times
+            self.reschedule(tick.time)
+            self.save_state()
+        return count
+
+
+def create_tasks(
+    door: Door,
+) -> tuple[OpenDoorTask, CloseDoorTask, SetClockTask, UpdateDoorTimesTask]:
+    """Create the daily tasks of the door controller."""
+    open_task = OpenDoorTask(exec_time=None, door=door)
+    close_task = CloseDoorTask(exec_time=None, door=door)
+    set_clock_task = SetClockTask(exec_time=1.0)
+    set_door_timing_task = UpdateDoorTimesTask(0.1, open_task, close_task)
+    return open_task, close_task, set_clock_task, set_door_timing_task
+
+
+def init_open_close(
+    open_task: Task, close_task: Task, tick: timing.Tick | None = None, door_reset: bool = False
+):
+    """Initialize the open and close tasks.
+
+    Tasks restored by `Scheduler.load_state` keep their executed flag, so a
+    reset does not undo a manual command. With door_reset (the door was
+    opened to recalibrate at start up) the close task runs again.
+    """
 
     if not timing.is_rtc_set():
         raise RuntimeError("RTC not set")
 
-    now = timing.now()
+    if tick is None:
+        tick = timing.Tick()
 
     if open_task.exec_time is None or close_task.exec_time is None:
         raise ValueError("Open and close times must be set")
 
-    if open_task.exec_time <= now < close_task.exec_time:
-        open_task.execute()
-    if now >= close_task.exec_time:
-        open_task.is_executed = True  # skip open task
-        close_task.execute()
+    # execute() only runs a task that has not run today
+    if open_task.exec_time <= tick.hours < close_task.exec_time:
+        open_task.execute(tick)
+    if tick.hours >= close_task.exec_time:
+        open_task._mark_executed(tick)  # skip open task
+        if door_reset:
+            close_task.is_executed = False
+        close_task.execute(tick)
@@ -1,22 +1,26 @@
 """Manage the door for CircuitPython."""
 
+import json
 import os
+import time
 import board
-import json
 
-from timing import time_str
-from uln2003 import Stepper, FULL_ROTATION
+from journal import Journal
+from uln2003 import FULL_ROTATION, Ramp, Stepper
 import logger
 
-STATE_FILE = "door_state.json"
+STATE_FILE = "door_state.bin"
+LEGACY_STATE_FILE = "door_state.json"  # before the journal, migrated once
 
 DRIVE_PINS = [board.D0, board.D1, board.D2, board.D3]  # type: ignore
 
 MM_PER_REV = 19.6  # mm travel per revolution of the motor
 TRAVEL_MM = int(os.getenv("TRAVEL_MM", "330"))  # door travel distance in mm
 OPEN_EXTRA_MM = 10  # extra mm to open door, push against mechanical stop
+SLICE_STEPS = int(os.getenv("DOOR_SLICE_STEPS", "1024"))  # steps per slice of a non-blocking move
+CHECKPOINT_REVS = int(os.getenv("DOOR_CHECKPOINT_REVS", "4"))  # revolutions between position saves, 0: off
 
-logger.debug(f"Door travel distance: {TRAVEL_MM} mm")
+logger.debug("Door travel distance: %d mm", TRAVEL_MM)
 
 # Door states
 STATE_OPEN = "open"
@@ -24,16 +28,45 @@ STATE_CLOSED = "closed"
 STATE_MOVING = "moving"
 STATE_UNKNOWN = "unknown"
 
+# state codes in the journal, target 0 is none
+_STATE_NAMES = (STATE_UNKNOWN, STATE_OPEN, STATE_CLOSED, STATE_MOVING)
+NO_POSITION = -0x80000000
+
+# journal entry: sequence, saved at, position, state, target, checksum -> 16 bytes
+_journal = Journal(STATE_FILE, "IiBB")
+
 # Door directions
 DIRECTION_OPEN = -1
 DIRECTION_CLOSE = 1
 
 
+def _drive_preset(name: str, mode: str) -> tuple[str, int | None]:
+    """Drive mode and cruise delay (us per half step, None: default) of a direction."""
+    cruise = os.getenv(f"DOOR_{name}_CRUISE_US")
+    return os.getenv(f"DOOR_{name}_MODE", mode), None if cruise is None else int(cruise)
+
+
+# opening lifts the door, full step has the most torque and half the phases;
+# closing is helped by gravity, half step runs smoother into the bottom
+DRIVE_PRESETS = {
+    DIRECTION_OPEN: _drive_preset("OPEN", "full"),
+    DIRECTION_CLOSE: _drive_preset("CLOSE", "half"),
+}
+
+
 class State:
-    """Represents the door state."""
+    """Represents the door state.
+
+    While moving, `position` is the last checkpoint of the door height in
+    steps (0 is closed) and `target` the state the move ends in.
+    """
+
+    __slots__ = ("name", "position", "target")
 
-    def __init__(self, name: str = STATE_UNKNOWN):
+    def __init__(self, name: str = STATE_UNKNOWN, position: int | None = None, target: str | None = None):
         self.name = name
+        self.position = position
+        self.target = target
 
     def __str__(self):
         return self.name
@@ -43,35 +76,103 @@ class State:
 
     @classmethod
     def load(cls) -> "State":
-        """Load state from file."""
-        try:
-            with open(STATE_FILE, "r") as f:
-                data = json.load(f)
-                logger.debug(f"Loaded state: {data}")
-                return cls(data.get("state", STATE_UNKNOWN))
-        except OSError:
+        """Load the latest state from the journal."""
+        record = _journal.load()
+        if record is None:
+            legacy = cls._load_legacy()
+            if legacy is not None:
+                return legacy
             logger.debug("Failed to load state, returning unknown state")
             return cls(STATE_UNKNOWN)
 
+        saved_at, position, name, target = record
+        logger.debug("Loaded state: %s %s %s, saved at %d", name, position, target, saved_at)
+        return cls(
+            _STATE_NAMES[name] if name < len(_STATE_NAMES) else STATE_UNKNOWN,
+            None if position == NO_POSITION else position,
+            _STATE_NAMES[target] if 0 < target < len(_STATE_NAMES) else None,
+        )
+
+    @classmethod
+    def _load_legacy(cls) -> "State | None":
+        """Move the state of LEGACY_STATE_FILE into the journal, None if there is none."""
+        try:
+            with open(LEGACY_STATE_FILE, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        names = set(_STATE_NAMES)
+        name = data.get("state")
+        target = data.get("target")
+        position = data.get("position")
+        state = cls(
+            name if name in names else STATE_UNKNOWN,
+            position if isinstance(position, int) else None,
+            target if target in names else None,
+        )
+        logger.info(f"Migrating door state from {LEGACY_STATE_FILE}: {state}")
+        state.save()
+        try:
+            os.remove(LEGACY_STATE_FILE)
+        except OSError as e:
+            logger.debug("Could not remove %s: %s", LEGACY_STATE_FILE, e)
+        return state
+
     def save(self):
-        """Save state to file."""
-        logger.debug(f"Saving state: {self.name}")
-        data = {"state": self.name, "time": time_str()}
-        with open(STATE_FILE, "w") as f:
-            json.dump(data, f)
+        """Append the state to the journal."""
+        logger.debug("Saving state: %s %s", self.name, self.position)
+        _journal.append(
+            int(time.time()),
+            NO_POSITION if self.position is None else self.position,
+            _STATE_NAMES.index(self.name),
+            0 if self.target is None else _STATE_NAMES.index(self.target),
+        )
+
+
+def mm_to_steps(distance_mm: float) -> int:
+    """Motor steps for a door travel."""
+    return int(distance_mm / MM_PER_REV * FULL_ROTATION)
 
 
 class Door:
-    """Door interface for open/close actions."""
+    """Door interface for open/close actions.
+
+    `open` and `close` block until the door is in place. `start_open` and
+    `start_close` only start a move, `step_motion` then advances it by one
+    slice, so the caller can serve MQTT and the watchdog between slices.
+
+    The door height is tracked in steps. During a move it is checkpointed to
+    flash every CHECKPOINT_REVS revolutions, after a reset the interrupted
+    move is finished from the last checkpoint.
+    """
 
     def __init__(self, auto_reset: bool = True):
         self.stepper = Stepper(DRIVE_PINS)
         self._state = State.load()
-        logger.debug(f"Initial door state: {self._state}")
+        logger.debug("Initial door state: %s", self._state)
 
-        if self.state in {STATE_UNKNOWN, STATE_MOVING} and auto_reset:
+        self._motion = None  # generator of the running move
+        self._pause = False  # the caller pauses after the next slice
+        self.progress: float | None = None  # fraction of the running move
+        self.recalibrated = False  # opened at start up, the state was lost
+        self.position: int | None = self._end_position(self.state)  # steps above closed
+        if self.position is None:
+            self.position = self._state.position
+
+        if not auto_reset:
+            return
+        target = self._state.target
+        if self.state == STATE_MOVING and self.position is not None and target in {STATE_OPEN, STATE_CLOSED}:
+            logger.info(f"Resuming interrupted move at {self.position_mm:.0f} mm")
+            direction = DIRECTION_OPEN if target == STATE_OPEN else DIRECTION_CLOSE
+            if self._start(direction, None, target, None):
+                self.finish()
+        elif self.state in {STATE_UNKNOWN, STATE_MOVING}:
             logger.debug("Resetting door")
+            self.position = None
             self.open()
+            self.recalibrated = True
 
     @property
     def state(self) -> str:
@@ -81,52 +182,182 @@ class Door:
     @state.setter
     def state(self, new_state: str):
         """Set a new door state and save it if needed."""
-        self._state = State(new_state)
+        self._state = State(new_state, self.position)
         self._state.save()
 
-    def move(self, direction: int, distance_mm: float):
-        """Move the door in the specified direction with feedback after each revolution."""
-        revolutions = distance_mm / MM_PER_REV
-        logger.debug(
-            f"Moving: distance_mm={distance_mm}, direction={direction}, revolutions={revolutions:.2f}"
-        )
+    @property
+    def moving(self) -> bool:
+        """True while a move is running."""
+        return self._motion is not None
 
-        full_revs = int(revolutions)
-        for i in range(full_revs):
-            self.stepper.step(FULL_ROTATION, direction)
-            logger.debug(f"Completed revolution {i + 1}")
+    @property
+    def position_mm(self) -> float | None:
+        """Height of the door above closed, None if not known."""
+        if self.position is None:
+            return None
+        return self.position * MM_PER_REV / FULL_ROTATION
+
+    @staticmethod
+    def _end_position(state: str) -> int | None:
+        """Height of the door in steps in a state, None if not known."""
+        if state == STATE_OPEN:
+            return mm_to_steps(TRAVEL_MM)
+        if state == STATE_CLOSED:
+            return 0
+        return None
+
+    def _checkpoint(self, target: str):
+        """Save the position of a running move."""
+        self._state = State(STATE_MOVING, self.position, target)
+        self._state.save()
 
-        remainder = revolutions - full_revs
-        if remainder > 0:
-            steps = int(remainder * FULL_ROTATION)
-            self.stepper.step(steps, direction)
-            logger.debug(f"Completed remainder: {remainder:.2f}")
+    def _motion_steps(self, direction: int, total: int, slice_steps: int | None, target: str | None = None):
+        """Generator moving the door by total steps, yields between slices.
+
+        Slices run back to back on one speed ramp over the whole move, unless
+        the caller asks step_motion() to pause after a slice: that slice
+        slows down to rest and the next one starts a new ramp. The coils stay
+        energized until the move ends. With slice_steps None the move is a
+        single slice. With a target, the position is checkpointed every
+        CHECKPOINT_REVS, independent of the slices.
+        """
+        if slice_steps is None or slice_steps > total:
+            slice_steps = total
+        checkpoint_steps = CHECKPOINT_REVS * FULL_ROTATION
+        if target is None or self.position is None or checkpoint_steps <= 0:
+            checkpoint_steps = total
+        checkpoint_at = checkpoint_steps  # steps into the move of the next checkpoint
+        ramp = None
+        run_start = 0  # step of the move where the motor last started from rest
+        mode, cruise_delay = DRIVE_PRESETS[direction]
+        self.stepper.set_mode(mode)
+        logger.debug(
+            "Moving: direction=%s, mode=%s, steps=%d, slices of %d, checkpoints every %d",
+            direction,
+            mode,
+            total,
+            slice_steps,
+            checkpoint_steps,
+        )
 
-    def open(self, distance_mm: float = TRAVEL_MM + OPEN_EXTRA_MM):
-        """Open the door."""
+        done = 0
+        self.progress = 0.0
+        while done < total:
+            if done:
+                yield done
+            count = min(slice_steps, total - done)
+            run_end = done + count if self._pause else total  # at rest
+            if ramp is None or ramp.total_steps != run_end - run_start:
+                ramp = Ramp(run_end - run_start, cruise_delay=cruise_delay)
+
+            # the ramp and the phase sequence continue across the checkpoints
+            # and slices, the coils hold the door between slices and are
+            # released at the end of the move
+            offset = 0
+            while offset < count:
+                n = min(checkpoint_at - done, count) - offset
+                self.stepper.step(n, direction, ramp, done + offset - run_start, hold=done + offset + n < total)
+                offset += n
+                if self.position is not None:
+                    self.position -= direction * n
+                if done + offset == checkpoint_at:
+                    if checkpoint_at < total:
+                        self._checkpoint(target)
+                    checkpoint_at += checkpoint_steps
+
+            done += count
+            if done == run_end:
+                run_start = done
+            self.progress = done / total
+            logger.debug("Moved %d of %d steps", done, total)
+
+    def _run(self, direction: int, steps: int, final_state: str, slice_steps: int | None):
+        """Generator of a complete open or close move, sets the door state."""
+        action = "Opening" if final_state == STATE_OPEN else "Closing"
+        logger.info(f"{action} door")
+        self._checkpoint(final_state)  # before holding the journal, always on flash
+        _journal.hold()
+        try:
+            yield from self._motion_steps(direction, steps, slice_steps, final_state)
+        finally:
+            _journal.release()
+        self.position = self._end_position(final_state)
+        self.state = final_state
+        self.progress = None
+        logger.info(f"Door is {final_state}")
+
+    def _start(self, direction: int, distance_mm: float | None, final_state: str, slice_steps: int | None) -> bool:
+        if self._motion is None and self.state == final_state:
+            logger.debug("Door is already %s", final_state)
+            return False
+
+        if self._motion is not None:
+            logger.debug("Interrupting running move")
+            self._motion.close()
+            self._motion = None
+            self.stepper.reset()
+
+        steps = self._steps_to(final_state) if distance_mm is None else mm_to_steps(distance_mm)
+        self._motion = self._run(direction, steps, final_state, slice_steps)
+        return True
+
+    def _steps_to(self, final_state: str) -> int:
+        """Steps to the end position, from the tracked position if known."""
+        travel = mm_to_steps(TRAVEL_MM)
+        if final_state == STATE_OPEN:
+            height = 0 if self.position is None else self.position
+            return max(travel - height, 0) + mm_to_steps(OPEN_EXTRA_MM)
+        return travel if self.position is None else max(self.position, 0)
+
+    def start_open(self, distance_mm: float | None = None, slice_steps: int | None = SLICE_STEPS) -> bool:
+        """Start opening the door, False if it is open already.
+
+        distance_mm defaults to the distance from the tracked position, or
+        the full travel if the position is unknown. A running close is
+        interrupted.
+        """
         logger.debug("Attempting to open door")
-        if self.state == STATE_OPEN:
-            logger.debug("Door is already open")
-            return
-
-        logger.info("Opening door")
-        self.state = STATE_MOVING
-        self.move(DIRECTION_OPEN, distance_mm)
-        self.state = STATE_OPEN
-        logger.info("Door is open")
+        return self._start(DIRECTION_OPEN, distance_mm, STATE_OPEN, slice_steps)
 
-    def close(self, distance_mm: float = TRAVEL_MM):
-        """Close the door."""
+    def start_close(self, distance_mm: float | None = None, slice_steps: int | None = SLICE_STEPS) -> bool:
+        """Start closing the door, False if it is closed already."""
         logger.debug("Attempting to close door")
-        if self.state == STATE_CLOSED:
-            logger.debug("Door is already closed")
-            return
+        return self._start(DIRECTION_CLOSE, distance_mm, STATE_CLOSED, slice_steps)
 
-        logger.info("Closing door")
-        self.state = STATE_MOVING
-        self.move(DIRECTION_CLOSE, distance_mm)
-        self.state = STATE_CLOSED
-        logger.info("Door is closed")
+    def step_motion(self, pause: bool = False) -> bool:
+        """Advance the running move by one slice, return True while it is running.
+
+        With pause, the slice ends at rest because the caller does not run the
+        next one right away, e.g. while it serves mqtt.
+        """
+        if self._motion is None:
+            return False
+        self._pause = pause
+        try:
+            next(self._motion)
+        except StopIteration:
+            self._motion = None
+        except Exception:
+            self._motion = None
+            self.progress = None
+            self.stepper.reset()
+            raise
+        return self._motion is not None
+
+    def finish(self):
+        """Run the current move to its end."""
+        while self.step_motion():
+            pass
+
+    def open(self, distance_mm: float | None = None):
+        """Open the door, blocking."""
+        if self.start_open(distance_mm, slice_steps=None):
+            self.finish()
+
+    def close(self, distance_mm: float | None = None):
+        """Close the door, blocking."""
+        if self.start_close(distance_mm, slice_steps=None):
+            self.finish()
 
 
 def test():
@@ -0,0 +1,133 @@
+"""Append-only journal of fixed-size binary records in a preallocated file.
+
+Each entry is a sequence number, the record and a 16 bit checksum. Entry n
+is written to slot n % slots, so the writes rotate over the whole region
+and the file never changes size. Flash is erased in 4 kB sectors, the
+region spans JOURNAL_SIZE (8 sectors) so each sector is rewritten only
+every slots / 8 entries. At load the file is read one sector at a time and
+the valid entry with the highest sequence number wins, a torn or corrupt
+last write falls back to the entry before it.
+"""
+
+import binascii
+import struct
+
+import logger
+
+ERASE_BLOCK = 4096  # flash erase sector, bytes
+JOURNAL_SIZE = 8 * ERASE_BLOCK  # bytes, 2048 entries of 16 bytes
+
+
+class Journal:
+    """Journal of records with the struct format `record_format` (without byte order).
+
+    slots defaults to the entries that fit in JOURNAL_SIZE.
+    """
+
+    def __init__(self, path: str, record_format: str, slots: int | None = None):
+        self.path = path
+        self._format = "<I" + record_format + "H"
+        self._payload_size = struct.calcsize("<I" + record_format)
+        self.entry_size = struct.calcsize(self._format)
+        self.slots = JOURNAL_SIZE // self.entry_size if slots is None else slots
+        self._seq: int | None = None  # last sequence number, None until loaded
+        self._file = None  # open between `hold` and `release`
+
+    def _checksum(self, data) -> int:
+        return binascii.crc32(data) & 0xFFFF
+
+    def load(self) -> tuple | None:
+        """Return the latest valid record, None if there is none."""
+        self._seq = 0
+        size = self.entry_size
+        per_read = min(max(ERASE_BLOCK // size, 1), self.slots)
+        buffer = bytearray(per_read * size)
+        latest = None
+        try:
+            with open(self.path, "rb") as f:
+                for first in range(0, self.slots, per_read):
+                    n = f.readinto(buffer) or 0
+                    end = min(n, (self.slots - first) * size)
+                    for offset in range(0, end - size + 1, size):
+                        entry = memoryview(buffer)[offset : offset + size]
+                        values = struct.unpack(self._format, entry)
+                        seq = values[0]
+                        if seq <= self._seq or values[-1] != self._checksum(entry[: self._payload_size]):
+                            continue  # older, empty (seq 0) or corrupt
+                        self._seq = seq
+                        latest = values[1:-1]
+                    if n != len(buffer):
+                        break
+        except OSError as e:
+            logger.debug("No journal %s: %s", self.path, e)
+            return None
+        return latest
+
+    def _preallocate(self):
+        """Create the region, zero entries are empty."""
+        logger.debug("Creating journal %s, %d x %d bytes", self.path, self.slots, self.entry_size)
+        size = self.slots * self.entry_size
+        block = bytes(min(size, ERASE_BLOCK))
+        with open(self.path, "wb") as f:
+            for offset in range(0, size, len(block)):
+                f.write(block[: size - offset])
+
+    def _open(self):
+        try:
+            return open(self.path, "r+b")
+        except OSError:
+            self._preallocate()
+            return open(self.path, "r+b")
+
+    def hold(self):
+        """Keep the file open for the following appends, until `release`.
+
+        Each close (or flush) of a FAT file rewrites its directory entry. A
+        held journal is flushed once, at release; its entries reach the flash
+        when the file system writes out its sector buffer, so a power loss
+        may drop the last entries and load falls back to an earlier one.
+        """
+        if self._file is None:
+            self._file = self._open()
+
+    def release(self):
+        """Close the file held by `hold`."""
+        if self._file is not None:
+            f, self._file = self._file, None
+            f.close()
+
+    def append(self, *record):
+        """Write a record as the next entry."""
+        if self._seq is None:
+            self.load()
+        seq = self._seq + 1
+        entry = bytearray(struct.pack(self._format, seq, *record, 0))
+        struct.pack_into("<H", entry, self._payload_size, self._checksum(entry[: self._payload_size]))
+
+        if self._file is None:
+            with self._open() as f:
+                f.seek((seq % self.slots) * self.entry_size)
+                f.write(entry)
+        else:
+            self._file.seek((seq % self.slots) * self.entry_size)
+            self._file.write(entry)
+        self._seq = seq
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last entry, 0 if empty."""
+        return self._seq or 0
+
+
+# ----------------- testing ----------------------------
+def test() -> None:
+    journal = Journal("test_journal.bin", "i", slots=4)
+    for value in range(10):
+        journal.append(value)
+
+    journal = Journal("test_journal.bin", "i", slots=4)
+    print(f"latest: {journal.load()}, seq: {journal.seq}")
+
+
+if __name__ == "__main__":
+    test()
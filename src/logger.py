@@ -4,6 +4,8 @@ import os
 import time
 
 LOG_FILE = "log.txt"
+# print debug messages, off by default; settings.toml may give an int or a string
+DEBUG = str(os.getenv("LOG_DEBUG", 0)) not in ("0", "")
 
 
 def _log_string(message: str, level: str = "INFO") -> str:
@@ -36,8 +38,16 @@ def error(message):
     log_to_file(message, "ERROR")
 
 
-def debug(message):
-    """log debug message to console, not to file"""
+def debug(message, *args):
+    """log debug message to console, not to file.
+
+    With args, the message is formatted with `message % args` only if DEBUG
+    is enabled, so hot paths do not build strings for nothing.
+    """
+    if not DEBUG:
+        return
+    if args:
+        message = message % args
     print(_log_string(message, "DEBUG"))
 
 
@@ -4,7 +4,6 @@ main module for coop_door
 
 """
 
-import gc
 import json
 import os
 import time
@@ -16,14 +15,18 @@ import wifi
 
 import logger
 import mqtt
+import sun_lut
 import timing
-from daily_tasks import (
-    CloseDoorTask,
-    OpenDoorTask,
-    SetClockTask,
-    UpdateDoorTimesTask,
-    init_open_close,
+from controller import (
+    MOTION_MQTT_INTERVAL,
+    MQTT_LOOP_TIMEOUT,
+    MQTT_MIN_TIMEOUT,
+    STATUS_INTERVAL,
+    create_scheduler,
+    set_clock,
+    start,
 )
+from daily_tasks import IntervalTask, TruncateLogTask
 from door import Door
 
 __version__ = "3.5.1"
@@ -32,11 +35,11 @@ __version__ = "3.5.1"
 DEVICE_NAME = os.getenv("CIRCUITPY_WEB_INSTANCE_NAME", "eggcess")
 STATUS_TOPIC = os.getenv("STATUS_TOPIC", f"/{DEVICE_NAME}/status")
 STATE_TOPIC = os.getenv("STATE_TOPIC", f"/{DEVICE_NAME}/state")
+STATS_TOPIC = os.getenv("STATS_TOPIC", f"/{DEVICE_NAME}/stats")
 
 _mqtt_error_logged = False
 
-# set time
-timing.update_ntp_time()
+set_clock()
 
 # check that clock is set
 if not timing.is_rtc_set():
@@ -47,9 +50,10 @@ if not timing.is_rtc_set():
 T_START = time.time()
 
 # show topics
-logger.debug(f"{DEVICE_NAME=}")
-logger.debug(f"{STATUS_TOPIC=}")
-logger.debug(f"{STATE_TOPIC=}")
+logger.debug("DEVICE_NAME=%r", DEVICE_NAME)
+logger.debug("STATUS_TOPIC=%r", STATUS_TOPIC)
+logger.debug("STATE_TOPIC=%r", STATE_TOPIC)
+logger.debug("STATS_TOPIC=%r", STATS_TOPIC)
 
 logger.info(f"*** system start  v{__version__}***")
 
@@ -70,12 +74,8 @@ led = door.stepper.pins[0]
 
 
 # create tasks
-open_task = OpenDoorTask(exec_time=None, door=door)
-close_task = CloseDoorTask(exec_time=None, door=door)
-set_clock_task = SetClockTask(exec_time=1.0)
-set_door_timing_task = UpdateDoorTimesTask(0.1, open_task, close_task)
-
-all_tasks = [open_task, close_task, set_clock_task, set_door_timing_task]
+tasks, scheduler = create_scheduler(door)
+open_task, close_task, _, _ = tasks
 
 
 def command_callback(client, topic, command):  # pylint: disable=unused-argument
@@ -83,10 +83,20 @@ def command_callback(client, topic, command):  # pylint: disable=unused-argument
 
     if command == "open":
         logger.info("opening by command")
-        door.open()
+        door.start_open()
     elif command == "close":
         logger.info("closing by command")
-        door.close()
+        door.start_close()
+    elif command == "append_lut":
+        logger.info("appending LUT chunk by command")
+        try:
+            added = sun_lut.append_chunk()
+            logger.info(f"added {added} days to {sun_lut.BIN_FILE}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not append LUT chunk: {e}")
+    elif command == "dump_stats":
+        logger.info("dumping task stats by command")
+        client.publish(STATS_TOPIC, stats_msg())
     elif command == "reset":
         logger.info("resetting by command")
         microcontroller.reset()
@@ -100,51 +110,85 @@ def flash_led():
     led.value = 0
 
 
-def status_msg() -> str:
-    """generate status string"""
-
-    # Pre-initialize the message dictionary with static values
-    msg = {
-        "name": DEVICE_NAME,
-        "door_state": door.state,  # assuming door.state is static, remove if it changes
-    }
-
-    network = wifi.radio.ap_info
-
-    # Update dynamic values
-    utc_time = time.localtime()
-    uptime = time.time() - T_START
-
-    msg.update(
-        {
-            "ip": str(wifi.radio.ipv4_address),
-            "uptime_h": round(uptime / 3600, 3),  # type: ignore
-            "mem_free": gc.mem_free(),  # type: ignore
-            "rssi": network.rssi,  # type: ignore
-            "date": timing.date(),
-            "time": f"{utc_time[3]:02}:{utc_time[4]:02}:{utc_time[5]:02}",
-            "open": (
-                timing.hours2str(open_task.exec_time) if open_task.exec_time else "None"
-            ),
-            "close": (
-                timing.hours2str(close_task.exec_time)
-                if close_task.exec_time
-                else "None"
-            ),
-            "door_state": door.state,  # update door state in case it changes
-        }
-    )
+# status message, preallocated and updated in place
+_status = {
+    "name": DEVICE_NAME,
+    "ip": "",
+    "uptime_h": 0.0,
+    "mem": scheduler.mem.summary(),
+    "rssi": 0,
+    "date": "",
+    "time": "",
+    "open": "None",
+    "close": "None",
+    "door_state": door.state,
+    "door_progress": None,
+    "door_position_mm": None,
+    "tasks": {},
+}
+_status_exec_times = [None, None]  # open and close time of the cached strings
+
+
+def status_msg(tick: timing.Tick) -> str:
+    """generate status string for the time of tick"""
+
+    msg = _status
+    msg["ip"] = str(wifi.radio.ipv4_address)
+    msg["uptime_h"] = round((tick.time - T_START) / 3600, 3)
+    msg["mem"] = scheduler.mem.summary()
+    msg["rssi"] = wifi.radio.ap_info.rssi  # type: ignore
+    msg["date"] = tick.date
+    msg["time"] = tick.clock
+    msg["door_state"] = door.state
+    msg["door_progress"] = None if door.progress is None else round(door.progress, 2)
+    msg["door_position_mm"] = None if door.position_mm is None else round(door.position_mm)
+
+    # open and close strings change once a day
+    for idx, (key, task) in enumerate((("open", open_task), ("close", close_task))):
+        if task.exec_time != _status_exec_times[idx]:
+            _status_exec_times[idx] = task.exec_time
+            msg[key] = timing.hours2str(task.exec_time) if task.exec_time else "None"
+
+    tasks = msg["tasks"]
+    for task in scheduler.tasks:
+        tasks[task.name] = task.stats.summary()
+
     status = json.dumps(msg)
-    logger.debug(f"status: {status}")
+    logger.debug("status: %s", status)
     return status
 
 
-def handle_mqtt(client):
+def stats_msg() -> str:
+    """generate full task telemetry string, with stepper timing if instrumented"""
+    stats = {task.name: task.stats.dump() for task in scheduler.tasks}
+    if door.stepper.timer is not None:
+        stats["stepper_overrun_us"] = door.stepper.timer.summary()
+    return json.dumps(stats)
+
+
+class PublishStatusTask(IntervalTask):
+    """publish the status message every `interval` seconds"""
+
+    __slots__ = ("client",)
+
+    def __init__(self, client, interval: int = STATUS_INTERVAL):
+        super().__init__("publish_status", interval)
+        self.client = client
+
+    def main(self):
+        try:
+            if self.client.is_connected():
+                self.client.publish(STATUS_TOPIC, status_msg(self.tick))
+        except Exception as e:  # reconnecting is done by handle_mqtt
+            logger.debug("Could not publish status: %s: %s", type(e).__name__, e)
+
+
+def handle_mqtt(client, timeout: float = MQTT_LOOP_TIMEOUT):
+    """wait up to timeout for messages, reconnect if needed"""
     global _mqtt_error_logged
     try:
         if client.is_connected():
-            client.loop(timeout=5.0)
-            client.publish(STATUS_TOPIC, status_msg())
+            client.loop(timeout=timeout)
 
         else:
             logger.debug("MQTT not connected, reconnecting")
@@ -154,35 +198,60 @@ def handle_mqtt(client):
                 _mqtt_error_logged = False
 
     except Exception as e:
-        logger.debug(f"MQTT error: {type(e).__name__}: {e}")
+        logger.debug("MQTT error: %s: %s", type(e).__name__, e)
         if not _mqtt_error_logged:
             logger.error(f"MQTT error: {type(e).__name__}: {e}")
             _mqtt_error_logged = True
 
         res = client.reconnect()
-        logger.debug(f"Reconnect result: {res}")
+        logger.debug("Reconnect result: %s", res)
         time.sleep(5)
 
 
 def main():
     """main function"""
 
-    set_door_timing_task.execute()
+    # resume after a reset without redoing today's tasks
+    start(door, tasks, scheduler)
 
-    logger.info(f"Door state: {door.state}")
+    mqtt_client = mqtt.get_client(on_message=command_callback)
 
-    init_open_close(open_task, close_task)
+    # housekeeping, each on its own cadence
+    scheduler.add(PublishStatusTask(mqtt_client))
+    scheduler.add(TruncateLogTask())
 
-    mqtt_client = mqtt.get_client(on_message=command_callback)
+    tick = timing.Tick()
+    next_mqtt_poll = 0.0  # monotonic time of the next mqtt poll during a move
 
     try:
         while True:
             flash_led()
-            handle_mqtt(mqtt_client)
+
+            # one time snapshot per iteration, shared by all tasks
+            tick.update()
+
+            # execute tasks that are due
+            scheduler.run_due(tick)
+            wdt.feed()
+
+            if door.moving:
+                # slices run back to back on one speed ramp, every
+                # MOTION_MQTT_INTERVAL a slice ends at rest and mqtt is served
+                poll = time.monotonic() >= next_mqtt_poll
+                door.step_motion(poll)
+                wdt.feed()
+                if door.moving and not poll:
+                    continue
+                timeout = MQTT_MIN_TIMEOUT
+            else:
+                # collect garbage while idle, instead of at a random allocation
+                scheduler.collect_garbage()
+                # wait for mqtt messages until the next deadline
+                timeout = scheduler.wait_time(MQTT_MIN_TIMEOUT, MQTT_LOOP_TIMEOUT)
+
+            handle_mqtt(mqtt_client, timeout)
+            next_mqtt_poll = time.monotonic() + MOTION_MQTT_INTERVAL
             wdt.feed()
-            # execute tasks
-            for task in all_tasks:
-                task.execute()
 
     except WatchDogTimeout:
         logger.error("Watchdog timeout")
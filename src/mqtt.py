@@ -13,7 +13,7 @@ def on_connect(mqtt_client, userdata, flags, rc):
     # successfully to the broker.
     logger.info(f"Connected to MQTT Broker. {flags=}, {rc=}")
     if CMD_TOPIC is not None:
-        logger.debug(f"Subscribing to {CMD_TOPIC}")
+        logger.debug("Subscribing to %s", CMD_TOPIC)
         mqtt_client.subscribe(CMD_TOPIC)
 
 
@@ -66,7 +66,7 @@ def get_client(on_message=None):
 
 # ------------------testing functions------------------
 def echo_message(client, topic, message):
-    logger.debug(f"New message on {topic}: {message}")
+    logger.debug("New message on %s: %s", topic, message)
     client.publish("/test/echo", message)
 
 
@@ -81,7 +81,7 @@ def test() -> None:
     client = get_client(on_message=echo_message)
     client.connect()
 
-    logger.debug(f"{client.is_connected()=}")
+    logger.debug("client.is_connected()=%r", client.is_connected())
 
     # check disconnect
     client.disconnect()
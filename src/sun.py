@@ -2,12 +2,51 @@
 
 Location is read from the LOCATION_LATLON environment variable,
 which is expected to be a list like [lat, lon]. Works on CircuitPython.
+
+Parsed location and calculated times are cached, call `clear_cache` after
+changing settings.
+
+Set `SUN_ENGINE = "fixed"` to use the integer-only engine from `sun_fixed`
+on boards without an FPU, or `SUN_ENGINE = "fit"` to evaluate harmonic
+coefficients from `sun_coefs.json` (see `calculations/fit_sun.py`). If the
+coefficients were fitted for another location than LOCATION_LATLON, or
+the file is missing or corrupt, an error is logged and the float engine is
+used.
+
+Times can be calculated for other zenith angles than official sunrise/sunset,
+for example civil twilight: `sunrise(2024, 3, 1, zenith="civil")`. `sunrises`
+and `sunsets` calculate several angles in one pass.
+
+`sun_times` is a host-side batch version of the same algorithm, it needs numpy.
 """
 
+import json
 import math
 import os
+from collections import OrderedDict
+
+import logger
+import sun_fixed
 
 ZENITH: float = 90.8
+ZENITHS: dict[str, float] = {
+    "official": ZENITH,
+    "civil": 96.0,
+    "nautical": 102.0,
+    "astronomical": 108.0,
+}
+
+ENGINE: str = os.getenv("SUN_ENGINE", "float")  # "float", "fixed" or "fit"
+
+COEF_FILE = "sun_coefs.json"
+YEAR_DAYS: float = 365.2422  # period of the fitted harmonics, in days of the year
+COEF_LOCATION_TOLERANCE = 0.01  # degrees, between LOCATION_LATLON and the fitted location
+
+CACHE_SIZE = 8  # number of (year, month, day, rise/set, zenith) results to keep
+
+_location: tuple[float, float] | None = None
+_cache: OrderedDict = OrderedDict()
+_coefs: dict | None = None
 
 
 def forceRange(v: float, max_value: int) -> float:
@@ -20,25 +59,158 @@ def forceRange(v: float, max_value: int) -> float:
 
 
 def _get_location() -> tuple[float, float]:
-    """Retrieve the location (lat, lon) from the LOCATION_LATLON environment variable. Stored as csv."""
+    """Retrieve the location (lat, lon) from the LOCATION_LATLON environment variable. Stored as csv.
+    Parsed only once, use `clear_cache` to re-read.
+    """
+    global _location
+    if _location is not None:
+        return _location
+
     # os.getenv("LOCATION_LATLON") already produces a correct list.
     loc = os.getenv("LOCATION_LATLON")
     if loc is None:
         raise ValueError("LOCATION_LATLON environment variable is not set")
     lat, lon = [float(val) for val in loc.strip().strip("[]").split(",")]
 
-    return lat, lon
+    _location = (lat, lon)
+    return _location
 
 
-def _calc_sun_time(
+def clear_cache() -> None:
+    """Forget parsed location, coefficients and cached sun times, e.g. after settings change."""
+    global _location, _coefs
+    _location = None
+    _coefs = None
+    _cache.clear()
+
+
+def _get_coefs() -> dict | None:
+    """Load fitted coefficients from COEF_FILE, only once.
+    None if the file is missing or corrupt, or was fitted for another
+    location than LOCATION_LATLON.
+    """
+    global _coefs
+    if _coefs is None:
+        try:
+            with open(COEF_FILE, "r") as f:
+                coefs = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load {COEF_FILE}: {e}, using the float engine")
+            _coefs = {}  # checked once, until clear_cache
+            return None
+        lat, lon = _get_location()
+        fit_lat, fit_lon = coefs.get("lat"), coefs.get("lon")
+        if (
+            fit_lat is None
+            or fit_lon is None
+            or abs(fit_lat - lat) > COEF_LOCATION_TOLERANCE
+            or abs(fit_lon - lon) > COEF_LOCATION_TOLERANCE
+        ):
+            logger.error(
+                f"{COEF_FILE} is fitted for {fit_lat},{fit_lon}, not for LOCATION_LATLON {lat},{lon}, "
+                "using the float engine"
+            )
+            coefs = {}  # checked once, until clear_cache
+        _coefs = coefs
+    return _coefs or None
+
+
+def fitted_sun_time(coefs: list[float], yday: int) -> float:
+    """Evaluate harmonic coefficients [a0, a1, b1, a2, b2, ...] for a day of the year.
+
+    Higher harmonics are built with the angle addition formula, so only one
+    sin/cos pair is needed, the rest are multiply-adds.
+    """
+    x = 2 * math.pi * (yday - 1) / YEAR_DAYS
+    c1 = math.cos(x)
+    s1 = math.sin(x)
+
+    ck, sk = 1.0, 0.0
+    value = coefs[0]
+    for i in range(1, len(coefs) - 1, 2):
+        ck, sk = ck * c1 - sk * s1, sk * c1 + ck * s1
+        value += coefs[i] * ck + coefs[i + 1] * sk
+
+    return value % 24
+
+
+def _resolve_zenith(zenith: float | str) -> float:
+    """Return zenith angle in degrees, accepts names from ZENITHS."""
+    if isinstance(zenith, str):
+        return ZENITHS[zenith] if zenith in ZENITHS else float(zenith)
+    return zenith
+
+
+def _engine_sun_times(
+    isRiseTime: bool, year: int, month: int, day: int, zeniths: list[float]
+) -> list[float]:
+    """Calculate sun times for several zeniths with the selected ENGINE.
+
+    The fitted coefficients are for the official zenith only, other zeniths
+    are calculated with the float engine.
+    """
+    if ENGINE == "fit" and all(zenith == ZENITH for zenith in zeniths):
+        coefs = _get_coefs()
+        if coefs is not None:
+            curve = coefs["rise" if isRiseTime else "set"]
+            return [fitted_sun_time(curve, sun_fixed.day_of_year(year, month, day))] * len(zeniths)
+
+    lat, lon = _get_location()
+    if ENGINE == "fixed":
+        return [
+            sun_fixed.calc_sun_time(isRiseTime, year, month, day, lat, lon, zenith)
+            for zenith in zeniths
+        ]
+    return _calc_sun_times(isRiseTime, year, month, day, lat, lon, zeniths)
+
+
+def _cached_sun_times(
+    isRiseTime: bool, year: int, month: int, day: int, zeniths: list
+) -> list[float]:
+    """Return sun times from cache, missing zeniths are calculated in one pass and stored
+    (evicting the oldest entries)."""
+    zeniths = [_resolve_zenith(zenith) for zenith in zeniths]
+    missing = [z for z in zeniths if (year, month, day, isRiseTime, z) not in _cache]
+    computed = {}
+    if missing:
+        computed = dict(zip(missing, _engine_sun_times(isRiseTime, year, month, day, missing)))
+
+    result = []
+    for zenith in zeniths:
+        key = (year, month, day, isRiseTime, zenith)
+        value = computed[zenith] if zenith in computed else _cache[key]
+        _cache_put(key, value)
+        result.append(value)
+    return result
+
+
+def _cache_put(key: tuple, value) -> None:
+    """Store value as most recently used, evict the oldest entry if the cache is full."""
+    _cache.pop(key, None)
+    if len(_cache) >= CACHE_SIZE:
+        del _cache[next(iter(_cache))]
+    _cache[key] = value
+
+
+def _calc_sun_terms(
     isRiseTime: bool,
     year: int,
     month: int,
     day: int,
-    lat: float,
     lon: float,
-) -> float:
-    """Calculate sunrise or sunset time using the given date and location."""
+) -> tuple[float, float, float, float, float]:
+    """Zenith-independent part of the calculation: (t, RA, sinDec, cosDec, lngHour)."""
+    return _sun_terms_at(year, month, day, lon, 6 if isRiseTime else 18)
+
+
+def _sun_terms_at(
+    year: int,
+    month: int,
+    day: int,
+    lon: float,
+    hour: float,
+) -> tuple[float, float, float, float, float]:
+    """Sun position terms at approximate local time `hour`: (t, RA, sinDec, cosDec, lngHour)."""
     TO_RAD: float = math.pi / 180
 
     # Calculate day of the year
@@ -49,7 +221,7 @@ def _calc_sun_time(
 
     # Convert longitude to hour value and calculate approximate time
     lngHour: float = lon / 15
-    t: float = N + ((6 - lngHour) / 24 if isRiseTime else (18 - lngHour) / 24)
+    t: float = N + (hour - lngHour) / 24
 
     # Calculate the Sun's mean anomaly
     M: float = (0.9856 * t) - 3.289
@@ -79,8 +251,21 @@ def _calc_sun_time(
     sinDec: float = 0.39782 * math.sin(TO_RAD * L)
     cosDec: float = math.cos(math.asin(sinDec))
 
+    return t, RA, sinDec, cosDec, lngHour
+
+
+def _sun_time_from_terms(
+    isRiseTime: bool,
+    terms: tuple[float, float, float, float, float],
+    lat: float,
+    zenith: float,
+) -> float:
+    """Finish the calculation for one zenith angle."""
+    TO_RAD: float = math.pi / 180
+    t, RA, sinDec, cosDec, lngHour = terms
+
     # Calculate the Sun's local hour angle
-    cosH: float = (math.cos(TO_RAD * ZENITH) - (sinDec * math.sin(TO_RAD * lat))) / (
+    cosH: float = (math.cos(TO_RAD * zenith) - (sinDec * math.sin(TO_RAD * lat))) / (
         cosDec * math.cos(TO_RAD * lat)
     )
 
@@ -107,16 +292,227 @@ def _calc_sun_time(
     return UT  # decimal hours
 
 
-def sunrise(year: int, month: int, day: int) -> float:
-    """Calculate sunrise time for the given date using location from LOCATION_LATLON."""
-    lat, lon = _get_location()
-    return _calc_sun_time(True, year, month, day, lat, lon)
+def _calc_sun_times(
+    isRiseTime: bool,
+    year: int,
+    month: int,
+    day: int,
+    lat: float,
+    lon: float,
+    zeniths: list[float],
+) -> list[float]:
+    """Calculate sunrise or sunset times for several zenith angles, sharing the expensive terms."""
+    terms = _calc_sun_terms(isRiseTime, year, month, day, lon)
+    return [_sun_time_from_terms(isRiseTime, terms, lat, zenith) for zenith in zeniths]
 
 
-def sunset(year: int, month: int, day: int) -> float:
-    """Calculate sunset time for the given date using location from LOCATION_LATLON."""
-    lat, lon = _get_location()
-    return _calc_sun_time(False, year, month, day, lat, lon)
+def _calc_sun_time(
+    isRiseTime: bool,
+    year: int,
+    month: int,
+    day: int,
+    lat: float,
+    lon: float,
+    zenith: float = ZENITH,
+) -> float:
+    """Calculate sunrise or sunset time using the given date and location."""
+    terms = _calc_sun_terms(isRiseTime, year, month, day, lon)
+    return _sun_time_from_terms(isRiseTime, terms, lat, zenith)
+
+
+def sunrise(year: int, month: int, day: int, zenith: float | str = ZENITH) -> float:
+    """Calculate sunrise time for the given date using location from LOCATION_LATLON.
+    zenith is an angle in degrees or a name from ZENITHS, e.g. "civil" for dawn.
+    """
+    return _cached_sun_times(True, year, month, day, [zenith])[0]
+
+
+def sunset(year: int, month: int, day: int, zenith: float | str = ZENITH) -> float:
+    """Calculate sunset time for the given date using location from LOCATION_LATLON.
+    zenith is an angle in degrees or a name from ZENITHS, e.g. "civil" for dusk.
+    """
+    return _cached_sun_times(False, year, month, day, [zenith])[0]
+
+
+def sunrises(year: int, month: int, day: int, zeniths: list) -> list[float]:
+    """Calculate sunrise times for several zenith angles in one pass."""
+    return _cached_sun_times(True, year, month, day, zeniths)
+
+
+def sunsets(year: int, month: int, day: int, zeniths: list) -> list[float]:
+    """Calculate sunset times for several zenith angles in one pass."""
+    return _cached_sun_times(False, year, month, day, zeniths)
+
+
+def _day_terms(year: int, month: int, day: int, lat: float, lon: float) -> tuple:
+    """Per-day terms for `solar_elevation`, cached.
+
+    Sun position at 0 and 24 h UT, in between RA and declination are
+    interpolated linearly, so evaluating the elevation needs no extra trig
+    apart from the hour angle.
+    """
+    key = (year, month, day, "terms", lat, lon)
+    if key in _cache:
+        terms = _cache[key]
+    else:
+        t0, RA0, sinDec0, _, lngHour = _sun_terms_at(year, month, day, lon, lon / 15)
+        _, RA1, sinDec1, _, _ = _sun_terms_at(year, month, day, lon, 24 + lon / 15)
+        dRA = RA1 - RA0
+        if dRA < -12:  # RA wrapped around 24 h
+            dRA += 24
+        terms = (t0, RA0, dRA, sinDec0, sinDec1 - sinDec0, lngHour)
+    _cache_put(key, terms)
+    return terms
+
+
+def _sin_elevation(terms: tuple, hours: float, lat: float) -> tuple[float, float]:
+    """Return (sin(elevation), d sin(elevation) / d hour) at UT `hours`."""
+    TO_RAD: float = math.pi / 180
+    t0, RA0, dRA, sinDec0, dSinDec, lngHour = terms
+
+    frac = hours / 24
+    RA = RA0 + dRA * frac
+    sinDec = sinDec0 + dSinDec * frac
+    cosDec = math.sqrt(1 - sinDec * sinDec)
+    t = t0 + frac
+
+    # local hour angle, inverse of T = H + RA - 0.06571 * t - 6.622
+    H = TO_RAD * 15 * (hours + lngHour - RA + 0.06571 * t + 6.622)
+    cosLatCosDec = math.cos(TO_RAD * lat) * cosDec
+
+    value = sinDec * math.sin(TO_RAD * lat) + cosLatCosDec * math.cos(H)
+    slope = -cosLatCosDec * math.sin(H) * TO_RAD * 15
+    return value, slope
+
+
+def solar_elevation(
+    year: int, month: int, day: int, hours: float, lat: float | None = None, lon: float | None = None
+) -> float:
+    """Sun elevation in degrees at UT `hours` of the given date, location from LOCATION_LATLON by default.
+    hours may be outside 0..24 to refer to the previous or next day."""
+    if lat is None or lon is None:
+        lat, lon = _get_location()
+    value, _ = _sin_elevation(_day_terms(year, month, day, lat, lon), hours, lat)
+    return math.degrees(math.asin(max(-1.0, min(1.0, value))))
+
+
+def elevation_time(
+    year: int,
+    month: int,
+    day: int,
+    elevation: float,
+    rising: bool = True,
+    lat: float | None = None,
+    lon: float | None = None,
+    max_iter: int = 10,
+) -> float:
+    """Time (decimal hours UT) at which the sun crosses `elevation` degrees.
+
+    Newton iterations on the cached per-day terms, starting from 6:00 / 18:00
+    local time. Usually converges in 3-4 steps. Result is wrapped to 0..24 h,
+    same as `sunrise` and `sunset`.
+    """
+    if lat is None or lon is None:
+        lat, lon = _get_location()
+    terms = _day_terms(year, month, day, lat, lon)
+    target = math.sin(math.radians(elevation))
+
+    hours = (6 if rising else 18) - lon / 15
+    for _ in range(max_iter):
+        value, slope = _sin_elevation(terms, hours, lat)
+        if (slope > 0) != rising or slope == 0:
+            # wrong half of the day (or noon/midnight), try the other side
+            step = 3.0 if (slope > 0) != (value < target) else -3.0
+        else:
+            step = max(-3.0, min(3.0, (target - value) / slope))
+        hours += step
+        if abs(step) < 1e-4:
+            return hours % 24
+
+    raise ValueError(f"the sun does not reach {elevation} degrees on this location (on the specified date)")
+
+
+def _force_range_np(np, v, max_value: int):
+    """Vectorized `forceRange`."""
+    return np.where(v < 0, v + max_value, np.where(v >= max_value, v - max_value, v))
+
+
+def _calc_sun_time_np(
+    np, isRiseTime: bool, year, month, day, lat: float, lon: float, zenith: float = ZENITH
+):
+    """Vectorized `_calc_sun_time`, date parts are integer arrays.
+
+    Follows the scalar implementation step by step, so results are identical.
+    Days where the sun never rises or sets are returned as NaN.
+    """
+    TO_RAD: float = math.pi / 180
+
+    # Calculate day of the year
+    N1 = np.floor(275 * month / 9)
+    N2 = np.floor((month + 9) / 12)
+    N3 = 1 + np.floor((year - 4 * np.floor(year / 4) + 2) / 3)
+    N = N1 - (N2 * N3) + day - 30
+
+    lngHour: float = lon / 15
+    t = N + ((6 - lngHour) / 24 if isRiseTime else (18 - lngHour) / 24)
+
+    M = (0.9856 * t) - 3.289
+
+    L = M + (1.916 * np.sin(TO_RAD * M)) + (0.020 * np.sin(TO_RAD * 2 * M)) + 282.634
+    L = _force_range_np(np, L, 360)
+
+    RA = (1 / TO_RAD) * np.arctan(0.91764 * np.tan(TO_RAD * L))
+    RA = _force_range_np(np, RA, 360)
+
+    Lquadrant = np.floor(L / 90) * 90
+    RAquadrant = np.floor(RA / 90) * 90
+    RA = (RA + (Lquadrant - RAquadrant)) / 15
+
+    sinDec = 0.39782 * np.sin(TO_RAD * L)
+    cosDec = np.cos(np.arcsin(sinDec))
+
+    cosH = (math.cos(TO_RAD * zenith) - (sinDec * math.sin(TO_RAD * lat))) / (
+        cosDec * math.cos(TO_RAD * lat)
+    )
+    # polar day / night, mask out before acos
+    cosH = np.where((cosH > 1) | (cosH < -1), np.nan, cosH)
+
+    H = (1 / TO_RAD) * np.arccos(cosH)
+    if isRiseTime:
+        H = 360 - H
+    H = H / 15
+
+    T = H + RA - (0.06571 * t) - 6.622
+
+    UT = T - lngHour
+    return _force_range_np(np, UT, 24)
+
+
+def sun_times(
+    start_date, end_date, lat: float, lon: float, zenith: float | str = ZENITH
+) -> tuple:
+    """Calculate sunrise and sunset for every day from start_date to end_date (inclusive).
+
+    Host-side helper for generating lookup tables, requires numpy.
+    Returns (dates, rise, set) arrays, times in decimal hours UTC.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    dates = np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + 1,
+        dtype="datetime64[D]",
+    )
+    months = dates.astype("datetime64[M]")
+    year = months.astype("datetime64[Y]").astype(int) + 1970
+    month = months.astype(int) % 12 + 1
+    day = (dates - months).astype(int) + 1
+
+    zenith = _resolve_zenith(zenith)
+    rise = _calc_sun_time_np(np, True, year, month, day, lat, lon, zenith)
+    set_ = _calc_sun_time_np(np, False, year, month, day, lat, lon, zenith)
+
+    return dates, rise, set_
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,182 @@
+"""Fixed-point sunrise and sunset calculation for boards without an FPU.
+
+Same algorithm as `sun._calc_sun_time`, but with integer arithmetic only:
+
+* angles are in millidegrees, time in seconds
+* sin/cos/atan are interpolated from small tables, values in Q14 (1.0 = 16384)
+* intermediate values stay within small-int range of a 32 bit port
+
+Select it with `SUN_ENGINE = "fixed"` in settings.toml.
+"""
+
+Q = 14
+ONE = 1 << Q
+
+# sin(0..90 deg) in 1 deg steps, Q14
+SIN_TABLE = (
+    0, 286, 572, 857, 1143, 1428, 1713, 1997, 2280, 2563,
+    2845, 3126, 3406, 3686, 3964, 4240, 4516, 4790, 5063, 5334,
+    5604, 5872, 6138, 6402, 6664, 6924, 7182, 7438, 7692, 7943,
+    8192, 8438, 8682, 8923, 9162, 9397, 9630, 9860, 10087, 10311,
+    10531, 10749, 10963, 11174, 11381, 11585, 11786, 11982, 12176, 12365,
+    12551, 12733, 12911, 13085, 13255, 13421, 13583, 13741, 13894, 14044,
+    14189, 14330, 14466, 14598, 14726, 14849, 14968, 15082, 15191, 15296,
+    15396, 15491, 15582, 15668, 15749, 15826, 15897, 15964, 16026, 16083,
+    16135, 16182, 16225, 16262, 16294, 16322, 16344, 16362, 16374, 16382,
+    16384,
+)
+
+# atan(0..1) in 1/64 steps, millidegrees
+ATAN_TABLE = (
+    0, 895, 1790, 2684, 3576, 4467, 5356, 6242, 7125, 8005,
+    8881, 9752, 10620, 11482, 12339, 13191, 14036, 14876, 15709, 16535,
+    17354, 18166, 18970, 19767, 20556, 21337, 22109, 22874, 23629, 24376,
+    25115, 25844, 26565, 27277, 27979, 28673, 29358, 30033, 30700, 31357,
+    32005, 32645, 33275, 33896, 34509, 35112, 35707, 36293, 36870, 37439,
+    37999, 38550, 39094, 39629, 40156, 40675, 41186, 41689, 42184, 42672,
+    43152, 43625, 44091, 44549, 45000,
+)
+ATAN_SHIFT = Q - 6  # Q14 ratio -> table index (64 steps)
+
+
+def sin_q14(angle_md: int) -> int:
+    """Sine of angle in millidegrees, Q14."""
+    a = angle_md % 360000
+    quadrant = a // 90000
+    r = a % 90000
+    if quadrant & 1:
+        r = 90000 - r
+
+    i = r // 1000
+    frac = r % 1000
+    value = SIN_TABLE[i]
+    if frac:
+        value += (SIN_TABLE[i + 1] - value) * frac // 1000
+
+    return -value if quadrant >= 2 else value
+
+
+def cos_q14(angle_md: int) -> int:
+    """Cosine of angle in millidegrees, Q14."""
+    return sin_q14(angle_md + 90000)
+
+
+def _atan_unit(ratio_q14: int) -> int:
+    """atan of ratio in [0, 1] (Q14), millidegrees."""
+    i = ratio_q14 >> ATAN_SHIFT
+    frac = ratio_q14 & ((1 << ATAN_SHIFT) - 1)
+    value = ATAN_TABLE[i]
+    if frac:
+        value += ((ATAN_TABLE[i + 1] - value) * frac) >> ATAN_SHIFT
+    return value
+
+
+def atan2_md(y: int, x: int) -> int:
+    """atan2 in millidegrees, range (-180000, 180000]."""
+    ax = abs(x)
+    ay = abs(y)
+    if ax == 0 and ay == 0:
+        return 0
+
+    if ay <= ax:
+        angle = _atan_unit((ay << Q) // ax)
+    else:
+        angle = 90000 - _atan_unit((ax << Q) // ay)
+
+    if x < 0:
+        angle = 180000 - angle
+    if y < 0:
+        angle = -angle
+    return angle
+
+
+def isqrt(n: int) -> int:
+    """Integer square root."""
+    if n <= 0:
+        return 0
+    x = n
+    y = (x + 1) // 2
+    while y < x:
+        x = y
+        y = (x + n // x) // 2
+    return x
+
+
+def day_of_year(year: int, month: int, day: int) -> int:
+    """Day of the year, same formula as `sun._calc_sun_time`."""
+    N1 = 275 * month // 9
+    N2 = (month + 9) // 12
+    N3 = 1 + (year - 4 * (year // 4) + 2) // 3
+    return N1 - (N2 * N3) + day - 30
+
+
+def calc_sun_time_s(
+    isRiseTime: bool,
+    year: int,
+    month: int,
+    day: int,
+    lat_md: int,
+    lon_md: int,
+    zenith_md: int = 90800,
+) -> int:
+    """Calculate sunrise or sunset, location and zenith in millidegrees. Returns seconds UTC."""
+    N = day_of_year(year, month, day)
+
+    # approximate time, minutes past midnight of day N. lngHour = lon / 15 -> lon_md / 250 minutes
+    t_min = (360 if isRiseTime else 1080) - lon_md // 250
+
+    # Sun's mean anomaly: 0.9856 * t - 3.289 deg
+    M = (9856 * N) // 10 + (t_min * 6844) // 10000 - 3289
+
+    # Sun's true longitude
+    L = M + (1916 * sin_q14(M) >> Q) + (20 * sin_q14(2 * M) >> Q) + 282634
+    L %= 360000
+
+    # right ascension, atan2 keeps RA in the same quadrant as L
+    RA = atan2_md((15035 * sin_q14(L)) >> Q, cos_q14(L)) % 360000  # 0.91764 in Q14
+
+    # declination
+    sinDec = (6518 * sin_q14(L)) >> Q  # 0.39782 in Q14
+    cosDec = isqrt((ONE << Q) - sinDec * sinDec)
+
+    # local hour angle
+    num = cos_q14(zenith_md) - ((sinDec * sin_q14(lat_md)) >> Q)
+    den = (cosDec * cos_q14(lat_md)) >> Q
+    cosH = (num << Q) // den
+
+    if cosH > ONE:
+        raise ValueError("the sun never rises on this location (on the specified date)")
+    if cosH < -ONE:
+        raise ValueError("the sun never sets on this location (on the specified date)")
+
+    H = atan2_md(isqrt((ONE << Q) - cosH * cosH), cosH)  # acos
+    if isRiseTime:
+        H = 360000 - H
+
+    # local mean time, 1 deg = 240 s. 0.06571 h/day = 236.556 s, 6.622 h = 23839 s
+    T = (H + RA) * 6 // 25 - (N * 236556) // 1000 - (t_min * 236556) // 1440000 - 23839
+
+    # adjust back to UTC
+    return (T - lon_md * 6 // 25) % 86400
+
+
+def calc_sun_time(
+    isRiseTime: bool,
+    year: int,
+    month: int,
+    day: int,
+    lat: float,
+    lon: float,
+    zenith: float = 90.8,
+) -> float:
+    """Drop-in replacement for `sun._calc_sun_time`, returns decimal hours."""
+    seconds = calc_sun_time_s(
+        isRiseTime,
+        year,
+        month,
+        day,
+        int(round(lat * 1000)),
+        int(round(lon * 1000)),
+        int(round(zenith * 1000)),
+    )
+    return seconds / 3600
@@ -0,0 +1,114 @@
+"""Binary sun lookup table with O(1) day lookup.
+
+File layout (little endian):
+
+* header: magic `b"SLUT"`, epoch day of the first record (uint32),
+  record count (uint16), scale (uint16)
+* records: open and close time (uint16 each), stored as `round(hours * scale)`
+
+Record for a date lives at `HEADER_SIZE + (day - epoch_day) * RECORD_SIZE`,
+so a lookup is one seek and one small read, regardless of the date.
+
+A LUT is extended by uploading a chunk (a LUT file with only the new days)
+and calling `append_chunk`, instead of uploading the whole table again.
+"""
+
+import struct
+
+BIN_FILE = "sun_lut.bin"
+CHUNK_FILE = "sun_lut_chunk.bin"
+
+MAGIC = b"SLUT"
+HEADER_FORMAT = "<4sIHH"
+RECORD_FORMAT = "<HH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+DEFAULT_SCALE = 100  # same 0.01 h resolution as the csv
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """Return number of days since 1970-01-01, integer math only."""
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def parse_date(date_str: str) -> int:
+    """Convert 'YYYY-MM-DD' to epoch day."""
+    year, month, day = [int(v) for v in date_str.split("-")]
+    return days_from_civil(year, month, day)
+
+
+def pack_header(epoch_day: int, count: int, scale: int = DEFAULT_SCALE) -> bytes:
+    """Pack the file header."""
+    return struct.pack(HEADER_FORMAT, MAGIC, epoch_day, count, scale)
+
+
+def pack_record(open_time: float, close_time: float, scale: int = DEFAULT_SCALE) -> bytes:
+    """Pack a single (open, close) record."""
+    return struct.pack(
+        RECORD_FORMAT, int(round(open_time * scale)), int(round(close_time * scale))
+    )
+
+
+def read_header(f) -> tuple[int, int, int]:
+    """Read and validate header, returns (epoch_day, count, scale)."""
+    f.seek(0)
+    magic, epoch_day, count, scale = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+    if magic != MAGIC:
+        raise ValueError("Not a sun LUT file")
+    return epoch_day, count, scale
+
+
+def lookup(target_date: str, file_path: str = BIN_FILE) -> tuple[float, float]:
+    """Return (open, close) times for 'YYYY-MM-DD' from the binary LUT."""
+    with open(file_path, "rb") as f:
+        epoch_day, count, scale = read_header(f)
+
+        idx = parse_date(target_date) - epoch_day
+        if idx < 0 or idx >= count:
+            raise ValueError("Date not found in file")
+
+        f.seek(HEADER_SIZE + idx * RECORD_SIZE)
+        open_raw, close_raw = struct.unpack(RECORD_FORMAT, f.read(RECORD_SIZE))
+
+    return open_raw / scale, close_raw / scale
+
+
+def append_chunk(chunk_path: str = CHUNK_FILE, file_path: str = BIN_FILE) -> int:
+    """Append records from a chunk LUT to file_path. Returns number of days added.
+
+    Days already present in file_path are skipped, so a chunk can be applied twice.
+    """
+    with open(chunk_path, "rb") as chunk:
+        chunk_epoch, chunk_count, chunk_scale = read_header(chunk)
+
+        with open(file_path, "r+b") as f:
+            epoch_day, count, scale = read_header(f)
+            if chunk_scale != scale:
+                raise ValueError("Chunk scale does not match")
+
+            next_day = epoch_day + count
+            if chunk_epoch > next_day:
+                raise ValueError("Gap between LUT and chunk")
+
+            skip = next_day - chunk_epoch
+            added = max(chunk_count - skip, 0)
+            if added == 0:
+                return 0
+
+            # copy record by record, keeps memory use constant
+            chunk.seek(HEADER_SIZE + skip * RECORD_SIZE)
+            f.seek(HEADER_SIZE + count * RECORD_SIZE)
+            for _ in range(added):
+                f.write(chunk.read(RECORD_SIZE))
+
+            # header last, an interrupted append leaves a valid table
+            f.seek(0)
+            f.write(pack_header(epoch_day, count + added, scale))
+
+    return added
@@ -11,6 +11,7 @@ import rtc
 import socketpool
 import wifi
 import logger
+import sun_lut
 
 DATA_FILE = "sun_lut.csv"
 
@@ -22,8 +23,13 @@ class MaxRetriesExceeded(Exception):
 def extract_floats_from_file(
     target_date: str, file_path: str = DATA_FILE
 ) -> tuple[float, float]:
-    """extract the open and close times from the csv file for the target date"""
+    """extract the open and close times from the csv file for the target date.
+    Binary LUT files (`.bin`) are looked up directly by `sun_lut`.
+    """
     print(f"extracting floats from file {file_path} for date {target_date}")
+    if file_path.endswith(".bin"):
+        return sun_lut.lookup(target_date, file_path)
+
     with open(file_path, "r") as file:
         for line in file:
             parts = line.strip().split(",")
@@ -45,7 +51,7 @@ def update_ntp_time(max_attempts=10, retry_delay=5):
     attempts = 0
 
     while attempts < max_attempts:
-        logger.debug(f"Updating time attempt {attempts + 1}")
+        logger.debug("Updating time attempt %d", attempts + 1)
         try:
             rtc.RTC().datetime = ntp.datetime
 
@@ -55,8 +61,8 @@ def update_ntp_time(max_attempts=10, retry_delay=5):
             attempts = 0  # reset attempts
         except Exception as e:
             attempts += 1
-            logger.debug(f"Error updating time:  {type(e).__name__}: {e}")
-            logger.debug(f"Sleeping for {retry_delay} seconds")
+            logger.debug("Error updating time:  %s: %s", type(e).__name__, e)
+            logger.debug("Sleeping for %s seconds", retry_delay)
             time.sleep(retry_delay)
         return
 
@@ -95,22 +101,67 @@ def hours2str(hours: float) -> str:
     return f"{whole_hours:02}:{minutes:02}:{seconds:02}"
 
 
-def date() -> str:
-    """Return the current date as string"""
+def date(ts=None) -> str:
+    """Return the date of ts (default: now) as string"""
 
-    ts = time.localtime()
+    if ts is None:
+        ts = time.localtime()
 
     return f"{ts.tm_year:04d}-{ts.tm_mon:02d}-{ts.tm_mday:02d}"
 
 
-def now() -> float:
-    """Return the current time as decimal hours"""
+def now(ts=None) -> float:
+    """Return the time of ts (default: now) as decimal hours"""
 
-    ts = time.localtime()
+    if ts is None:
+        ts = time.localtime()
 
     return ts.tm_hour + ts.tm_min / 60 + ts.tm_sec / 3600
 
 
+class Tick:
+    """Snapshot of the clock, taken once per main loop iteration.
+
+    Tasks and the status message read the time from the same snapshot, so
+    they agree on the day, also when the loop crosses midnight, and
+    `time.localtime()` is called only once per iteration. The main loop
+    reuses one instance with `update`, date and clock strings are only built
+    when used.
+    """
+
+    __slots__ = ("time", "year", "month", "day", "yday", "hour", "minute", "second", "hours")
+
+    def __init__(self, t: int | None = None):
+        self.update(t)
+
+    def update(self, t: int | None = None) -> "Tick":
+        """Take a new snapshot of t (default: now)."""
+        if t is None:
+            t = time.time()
+        self.time = int(t)  # seconds, like time.time()
+        ts = time.localtime(self.time)
+        self.year = ts.tm_year
+        self.month = ts.tm_mon
+        self.day = ts.tm_mday
+        self.yday = ts.tm_yday
+        self.hour = ts.tm_hour
+        self.minute = ts.tm_min
+        self.second = ts.tm_sec
+        self.hours = now(ts)
+        return self
+
+    @property
+    def date(self) -> str:
+        return f"{self.year:04d}-{self.month:02d}-{self.day:02d}"
+
+    @property
+    def clock(self) -> str:
+        return f"{self.hour:02}:{self.minute:02}:{self.second:02}"
+
+    def __str__(self):
+        return f"{self.date} {self.clock}"
+
+
 # ------------------------------ testing --------------------------------
 def test() -> None:
     """basic testing function"""
@@ -121,12 +172,13 @@ def test() -> None:
     print(f"Today: {today}, Now: {now_time}")
 
     test_dates = [today, "2030-02-27"]
-    for test_date in test_dates:
-        print(f"Testing date: {test_date}")
-        t_start = time.monotonic()
-        open_time, close_time = extract_floats_from_file(test_date)
-        print(f"Time to read file: {time.monotonic() - t_start:.3f} s")
-        print(f"Open time: {open_time}, Close time: {close_time}")
+    for file_path in [DATA_FILE, sun_lut.BIN_FILE]:
+        for test_date in test_dates:
+            print(f"Testing date: {test_date}")
+            t_start = time.monotonic()
+            open_time, close_time = extract_floats_from_file(test_date, file_path)
+            print(f"Time to read file: {time.monotonic() - t_start:.3f} s")
+            print(f"Open time: {open_time}, Close time: {close_time}")
 
 
 if __name__ == "__main__":
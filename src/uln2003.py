@@ -1,17 +1,31 @@
 # modified from https://github.com/IDWizard/uln2003  (c) IDWizard 2017
 # MIT License.
 
+import math
+import os
 import time
+from array import array
 import board
 import digitalio
+import microcontroller
 from microcontroller import delay_us
 
 # Constants
 LOW = False
 HIGH = True
-FULL_ROTATION = 512  # steps per rotation
+FULL_ROTATION = 512  # steps (phase sequences) per rotation, in every drive mode
 
-STEP_DELAY_US = 950
+STEP_DELAY_US = 950  # delay per half step, also the start speed of ramps
+
+# trapezoidal ramps: accelerate from STEP_DELAY_US to CRUISE_DELAY_US over RAMP_STEPS
+CRUISE_DELAY_US = int(os.getenv("STEPPER_CRUISE_US", "850"))
+RAMP_STEPS = int(os.getenv("STEPPER_RAMP_STEPS", "128"))
+
+# "digitalio" (any board) or "register" (ESP32-C3 GPIO registers)
+PIN_WRITER = os.getenv("STEPPER_PIN_WRITER", "digitalio")
+
+# phase intervals kept for timing statistics, 0: not instrumented
+TIMING_SAMPLES = int(os.getenv("STEPPER_TIMING_SAMPLES", "0"))
 
 HALF_STEP = [
     [LOW, LOW, LOW, HIGH],
@@ -24,51 +38,336 @@ HALF_STEP = [
     [HIGH, LOW, LOW, HIGH],
 ]
 
+# one coil at a time: least current and torque
+WAVE = [
+    [LOW, LOW, LOW, HIGH],
+    [LOW, LOW, HIGH, LOW],
+    [LOW, HIGH, LOW, LOW],
+    [HIGH, LOW, LOW, LOW],
+]
 
-class Stepper:
-    def __init__(self, pins, delay=STEP_DELAY_US):
-        self.mode = HALF_STEP
+# two coils at a time: most torque
+FULL_STEP = [
+    [LOW, LOW, HIGH, HIGH],
+    [LOW, HIGH, HIGH, LOW],
+    [HIGH, HIGH, LOW, LOW],
+    [HIGH, LOW, LOW, HIGH],
+]
+
+# A sequence moves the motor by the same angle in every mode. A phase of the
+# 4 phase modes is two half steps long, so it waits twice the delay.
+DRIVE_MODES = {"wave": WAVE, "full": FULL_STEP, "half": HALF_STEP}
+
+
+class DigitalioPinWriter:
+    """Write coil patterns through one `DigitalInOut` per pin, works on any board.
+
+    Only the pins that change between two phases are written, in half step
+    mode that is one pin per phase instead of four.
+    """
+
+    def __init__(self, pins):
         self.pins = [digitalio.DigitalInOut(pin) for pin in pins]
         for pin in self.pins:
             pin.direction = digitalio.Direction.OUTPUT
+
+    def compile(self, prev, bits) -> tuple:
+        """Return the write operation for going from pattern prev to bits."""
+        return tuple(
+            (pin, value)
+            for pin, old, value in zip(self.pins, prev, bits)
+            if old != value
+        )
+
+    def write(self, op: tuple):
+        for pin, value in op:
+            pin.value = value
+
+    def reset(self):
+        for pin in self.pins:
+            pin.value = LOW
+
+    def deinit(self):
+        for pin in self.pins:
+            pin.deinit()
+
+
+class RegisterPinWriter(DigitalioPinWriter):
+    """Write coils through the ESP32-C3 GPIO set/clear registers.
+
+    The pins are configured as outputs with `digitalio`, then the coils that
+    change in a phase are written at once, as bit masks to GPIO_OUT_W1TS /
+    GPIO_OUT_W1TC with `memorymap`. Raises ImportError or ValueError if the
+    port does not support it.
+    """
+
+    GPIO_BASE = 0x60004000
+    OUT_W1TS = 0x0008  # write 1 to set
+    OUT_W1TC = 0x000C  # write 1 to clear
+
+    def __init__(self, pins):
+        import memorymap  # pylint: disable=import-outside-toplevel
+
+        self._bits = [1 << _gpio_number(pin) for pin in pins]
+        super().__init__(pins)
+        self._set = memorymap.AddressRange(start=self.GPIO_BASE + self.OUT_W1TS, length=4)
+        self._clear = memorymap.AddressRange(start=self.GPIO_BASE + self.OUT_W1TC, length=4)
+        self._all_coils = sum(self._bits).to_bytes(4, "little")
+
+    def compile(self, prev, bits) -> tuple:
+        set_mask = 0
+        clear_mask = 0
+        for bit, old, value in zip(self._bits, prev, bits):
+            if value and not old:
+                set_mask |= bit
+            elif old and not value:
+                clear_mask |= bit
+        return tuple(
+            (register, mask.to_bytes(4, "little"))
+            for register, mask in ((self._set, set_mask), (self._clear, clear_mask))
+            if mask
+        )
+
+    def write(self, op: tuple):
+        for register, mask in op:
+            register[0:4] = mask
+
+    def reset(self):
+        self._clear[0:4] = self._all_coils
+
+
+def _gpio_number(pin) -> int:
+    """Return the GPIO number of a board pin."""
+    for number in range(32):
+        if getattr(microcontroller.pin, f"GPIO{number}", None) is pin:
+            return number
+    raise ValueError(f"No GPIO number for {pin}")
+
+
+def make_pin_writer(pins, kind: str = PIN_WRITER):
+    """Create a pin writer, falls back to digitalio if kind is not supported."""
+    if kind == "register":
+        try:
+            return RegisterPinWriter(pins)
+        except (ImportError, ValueError) as e:
+            print("Register pin writer not available, using digitalio:", e)
+    return DigitalioPinWriter(pins)
+
+
+class StepTable:
+    """Precompiled pin writes of a phase sequence for one direction.
+
+    A move starts from all coils off: `first` energizes phase 0 of the first
+    step, `wrap` goes from the last phase back to phase 0 for the following
+    steps, `tail` holds the transitions to phases 1..n-1.
+    """
+
+    def __init__(self, writer, phases):
+        off = [LOW] * len(phases[0])
+        self.first = writer.compile(off, phases[0])
+        self.wrap = writer.compile(phases[-1], phases[0])
+        self.tail = tuple(writer.compile(phases[i - 1], phases[i]) for i in range(1, len(phases)))
+
+
+class Ramp:
+    """Trapezoidal speed profile of a move: accelerate, cruise, decelerate.
+
+    The delays of the acceleration steps are computed once per move, for a
+    constant acceleration from `start_delay` to `cruise_delay` (us per half
+    step) over `ramp_steps`. Deceleration mirrors them. Moves shorter than two ramps
+    decelerate from half the distance, without reaching cruise speed.
+    """
+
+    def __init__(
+        self,
+        total_steps: int,
+        start_delay: int = STEP_DELAY_US,
+        cruise_delay: int | None = None,
+        ramp_steps: int = RAMP_STEPS,
+    ):
+        if cruise_delay is None:
+            cruise_delay = CRUISE_DELAY_US
+        self.total_steps = total_steps
+        self.cruise_delay = cruise_delay
+        n = max(min(ramp_steps, (total_steps + 1) // 2), 0)
+
+        # speed at step i: v_i^2 = v_0^2 + (v_n^2 - v_0^2) * i / n
+        v0_sq = 1 / (start_delay * start_delay)
+        dv_sq = 1 / (cruise_delay * cruise_delay) - v0_sq
+        self.ramp = array(
+            "H", (int(1 / math.sqrt(v0_sq + dv_sq * i / n)) for i in range(n))
+        )
+
+    def delay(self, i: int) -> int:
+        """Delay per half step (us) of step i of the move."""
+        n = len(self.ramp)
+        if i < n:
+            return self.ramp[i]
+        j = self.total_steps - 1 - i
+        if j < n:
+            return self.ramp[j]
+        return self.cruise_delay
+
+    def step_delays_us(self, start: int = 0, count: int | None = None) -> int:
+        """Sum of the delays per half step of steps start..start+count-1."""
+        total = self.total_steps
+        end = total if count is None else min(start + count, total)
+        n = len(self.ramp)
+
+        accel = sum(self.ramp[start:min(end, n)]) if start < n else 0
+        decel_start = max(start, total - n, n)
+        decel = sum(self.ramp[total - end : total - decel_start]) if end > decel_start else 0
+        cruise = max(min(end, total - n) - max(start, n), 0) * self.cruise_delay
+        return accel + decel + cruise
+
+
+class PhaseTimer:
+    """Timing statistics of the phases of `Stepper.step`.
+
+    Replaces `delay_us` in the step loop: it takes one timestamp per phase
+    and keeps the overrun of each interval over its requested delay (us) in
+    a ring buffer, the Python time spent per phase. Intervals across two
+    `step` calls are not counted.
+    """
+
+    PERCENTILES = (("p50", 50), ("p90", 90), ("p99", 99))
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self.overrun = array("l", [0] * size)
+        self.count = 0
+        self.max_overrun = 0
+        self._last = 0
+        self._delay = 0
+        self._summary = {"n": 0, "min": 0, "mean": 0.0, "max": 0, "p50": 0, "p90": 0, "p99": 0}
+
+    def start(self):
+        """Start of a move, the next phase has no previous one."""
+        self._last = 0
+
+    def delay_us(self, us: int):
+        now = time.monotonic_ns()
+        if self._last:
+            overrun = (now - self._last) // 1000 - self._delay
+            self.overrun[self.count % self.size] = overrun
+            self.count += 1
+            if overrun > self.max_overrun:
+                self.max_overrun = overrun
+        self._last = now
+        self._delay = us
+        delay_us(us)
+
+    def summary(self) -> dict:
+        """Min, mean, max and percentiles of the kept overruns (us), the max
+        is over all phases. The same dict is updated each call.
+        """
+        summary = self._summary
+        n = min(self.count, self.size)
+        summary["n"] = self.count
+        if n == 0:
+            return summary
+        samples = sorted(self.overrun[:n])
+        summary["min"] = samples[0]
+        summary["mean"] = round(sum(samples) / n, 1)
+        summary["max"] = self.max_overrun
+        for key, p in self.PERCENTILES:
+            summary[key] = samples[min(n * p // 100, n - 1)]
+        return summary
+
+
+class Stepper:
+    def __init__(self, pins, delay=STEP_DELAY_US, writer=None, mode="half", timing_samples=TIMING_SAMPLES):
+        self.writer = make_pin_writer(pins) if writer is None else writer
+        self.pins = self.writer.pins
         self.delay = delay
+        self._mode_tables = {
+            name: {1: StepTable(self.writer, phases), -1: StepTable(self.writer, phases[::-1])}
+            for name, phases in DRIVE_MODES.items()
+        }
+        self.timer = PhaseTimer(timing_samples) if timing_samples > 0 else None
+        self._held = None  # step table of the coils held by the last step
+        self.set_mode(mode)
         self.reset()
 
-    def step(self, count, direction=1):
+    def set_mode(self, name: str):
+        """Select the drive mode, "wave", "full" or "half", falls back to half."""
+        if name not in DRIVE_MODES:
+            print("Unknown drive mode, using half:", name)
+            name = "half"
+        self.mode_name = name
+        self.mode = DRIVE_MODES[name]
+        self.tables = self._mode_tables[name]
+        self.half_steps = len(HALF_STEP) // len(self.mode)  # per phase
+
+    def step(self, count, direction=1, ramp=None, offset=0, hold=False):
+        """Step count steps. With a `Ramp`, the delay of each step is taken
+        from it, offset is the position of the first step within the ramp.
+
+        With hold the coils stay energized after the last step, and the next
+        step in the same mode and direction continues the phase sequence, so
+        a move split over several calls runs like one.
+        """
+        table = self.tables[direction]
+        write = self.writer.write
+        tail = table.tail
+        half_steps = self.half_steps
+        delay = self.delay * half_steps
+        if self._held is table:
+            op = table.wrap
+        else:
+            if self._held is not None:
+                self.reset()
+            op = table.first
+        wait = delay_us
+        if self.timer is not None:
+            self.timer.start()
+            wait = self.timer.delay_us
         try:
-            for _ in range(count):
-                for bit in self.mode[::direction]:
-                    for pin, value in zip(self.pins, bit):
-                        pin.value = value
-                    delay_us(self.delay)
+            for i in range(count):
+                if ramp is not None:
+                    delay = ramp.delay(offset + i) * half_steps
+                write(op)
+                wait(delay)
+                for op in tail:
+                    write(op)
+                    wait(delay)
+                op = table.wrap
         except Exception as e:
             print("Exception while stepping:", e)
+            hold = False
         finally:
-            self.reset()
+            if hold:
+                if count > 0:
+                    self._held = table
+            else:
+                self.reset()
 
     def reset(self):
-        for pin in self.pins:
-            pin.value = LOW
+        self.writer.reset()
+        self._held = None
 
     def release_pins(self):
         """release pins"""
         self.reset()
-        for pin in self.pins:
-            pin.deinit()
+        self.writer.deinit()
 
 
 # ----------------- testing ----------------------------
 def test() -> None:
     # Define pin connections
     DRIVE_PINS = [board.D2, board.D3, board.D4, board.D5]
-    stepper = Stepper(DRIVE_PINS)
-
-    for direction in [1, -1]:
-        print(f"Direction: {direction}")
-        t_start = time.monotonic()  # Get current time in seconds
-        stepper.step(FULL_ROTATION, direction)
-        t_end = time.monotonic()  # Get current time in seconds
-        print(f"Duration: {(t_end - t_start):.2f} s")
-        time.sleep(1)
+    stepper = Stepper(DRIVE_PINS, timing_samples=1024)
+
+    for mode in DRIVE_MODES:
+        stepper.set_mode(mode)
+        for direction in [1, -1]:
+            print(f"Mode: {mode}, direction: {direction}")
+            t_start = time.monotonic()  # Get current time in seconds
+            stepper.step(FULL_ROTATION, direction)
+            t_end = time.monotonic()  # Get current time in seconds
+            print(f"Duration: {(t_end - t_start):.2f} s")
+            print(f"Phase overrun [us]: {stepper.timer.summary()}")
+            stepper.timer = PhaseTimer(1024)
+            time.sleep(1)
 
     stepper.release_pins()
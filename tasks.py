@@ -146,9 +146,9 @@ def upload_src(ctx):
 
 
 @task
-def upload_lut(ctx):
-    """upload the sun_lut.csv file"""
-    f = Path("calculations/sun_lut.csv")
+def upload_lut(ctx, file="calculations/sun_lut.csv"):
+    """upload the sun LUT file (csv or binary .bin)"""
+    f = Path(file)
     assert f.exists(), f"File {f} does not exist"
     print(f"Uploading {f}...")
     ctx.run(f"ampy put {f}")
@@ -1,7 +1,12 @@
 # conftest.py
 import sys
+from pathlib import Path
 from unittest.mock import MagicMock
 
+# host-side tools
+sys.path.append(str(Path(__file__).resolve().parents[1] / "calculations"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "sim"))
+
 # Immediately mock hardware/time modules
 modules_to_mock = [
     "machine",
@@ -25,3 +30,13 @@ import pytest
 @pytest.fixture(autouse=True)
 def auto_mocker():
     yield
+
+
+@pytest.fixture
+def clear_sun_cache():
+    """sun results and coefficients cached by other tests, cleared before and after"""
+    import sun
+
+    sun.clear_cache()
+    yield
+    sun.clear_cache()
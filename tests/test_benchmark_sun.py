@@ -0,0 +1,13 @@
+from benchmark_sun import ENGINES, run_benchmark
+
+
+def test_benchmark_report() -> None:
+    report = run_benchmark(2024, latitudes=[52.37], longitudes=[4.89])
+
+    assert set(report["summary"]) == set(ENGINES)
+    assert len(report["results"]) == len(ENGINES)
+
+    for name, stats in report["summary"].items():
+        assert stats["max_error_min"] < 2.0, name
+        assert stats["mismatch_days"] == 0
+        assert stats["calls_per_s"] > 0
@@ -0,0 +1,73 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import door
+from door_mechanics import Mechanics, move_schedule, simulate, sweep
+from simulator import Simulation
+
+
+def test_move_time_matches_door():
+    with Simulation(datetime.datetime(2025, 1, 1)) as sim:
+        t_start = sim.clock.true_time
+        sim.boot()  # full open, blocking
+        t_open = sim.clock.true_time - t_start
+        distance = door.TRAVEL_MM + door.OPEN_EXTRA_MM
+        door_steps = door.mm_to_steps(distance)
+
+    schedule = move_schedule(distance, door.MM_PER_REV)
+    assert len(schedule) == 1
+    assert simulate(schedule, Mechanics())["time_s"] == pytest.approx(t_open)
+
+    sliced = move_schedule(distance, door.MM_PER_REV, slice_steps=door.SLICE_STEPS)
+    assert [len(s) for s in sliced[:-1]] == [door.SLICE_STEPS] * (len(sliced) - 1)
+    assert sum(len(s) for s in sliced) == door_steps
+
+
+def test_calculations_formulas():
+    mech = Mechanics(motor_torque=0.03, gear_ratio=0.04 / 0.012, d_inner=0.02)
+    assert mech.drum_force == pytest.approx(0.03 / 0.006 * 0.04 / 0.02)
+    assert mech.mm_per_rev == pytest.approx(18.85, abs=0.01)
+    assert mech.lift_time(0.4, 0.25) == pytest.approx(84.88, abs=0.01)
+
+
+def test_margin_trends():
+    schedule = move_schedule()
+    base = simulate(schedule, Mechanics(), mode="full")["min_margin"]
+
+    assert simulate(schedule, Mechanics(door_mass=1.0), mode="full")["min_margin"] < base
+    assert simulate(schedule, Mechanics(), mode="wave")["min_margin"] < base
+    assert simulate(move_schedule(cruise_delay=500), Mechanics(), mode="full")["stall"]
+    # starting at cruise speed is harder than ramping up to it
+    assert simulate(move_schedule(ramp_steps=0), Mechanics(), mode="full")["min_margin"] < base
+
+
+def test_simulate_vectorized():
+    masses = np.array([0.3, 0.7, 1.2])
+    torques = np.array([[0.02], [0.04]])
+    result = simulate(move_schedule(), Mechanics(door_mass=masses, motor_torque=torques))
+    assert result["min_margin"].shape == (2, 3)
+
+    for i, torque in enumerate(torques[:, 0]):
+        for j, mass in enumerate(masses):
+            single = simulate(move_schedule(), Mechanics(door_mass=mass, motor_torque=torque))
+            assert result["min_margin"][i, j] == pytest.approx(single["min_margin"])
+
+
+def test_sweep_rows():
+    rows = sweep(
+        {"cruise_delay": [950, 600], "ramp_steps": [0, 128]},
+        {"door_mass": [0.5, 0.7, 0.9], "gear_ratio": [3.0, 4.0]},
+        lifting=True,
+        mode="full",
+    )
+    assert len(rows) == 2 * 2 * 3 * 2
+    fast = [r for r in rows if r["cruise_delay"] == 600]
+    slow = [r for r in rows if r["cruise_delay"] == 950]
+    assert max(r["time_s"] for r in fast) < min(r["time_s"] for r in slow)
+    assert all(r["stall"] == (r["min_margin"] < 1) for r in rows)
+    # a larger gear ratio trades travel per step for torque
+    by_ratio = {r["gear_ratio"]: r for r in slow if r["door_mass"] == 0.7 and r["ramp_steps"] == 128}
+    assert by_ratio[4.0]["min_margin"] > by_ratio[3.0]["min_margin"]
+    assert by_ratio[4.0]["travel_mm"] < by_ratio[3.0]["travel_mm"]
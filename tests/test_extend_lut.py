@@ -0,0 +1,46 @@
+import datetime
+
+import sun_lut
+from extend_lut import extend_lut, last_date
+from generate_lut import lut_rows, write_lut
+
+LAT, LON = 51.365967, 6.172045
+START = datetime.date(2025, 1, 1)
+
+
+def _write(path, end: datetime.date) -> None:
+    write_lut(lut_rows(START, end, LAT, LON), path)
+
+
+def test_extend_csv(tmp_path) -> None:
+    path = tmp_path / "sun_lut.csv"
+    _write(path, datetime.date(2025, 3, 31))
+    assert last_date(path) == datetime.date(2025, 3, 31)
+
+    added = extend_lut(path, datetime.date(2025, 12, 31), LAT, LON)
+    assert added == 275
+    assert last_date(path) == datetime.date(2025, 12, 31)
+
+    # same content as full regeneration
+    full = tmp_path / "full.csv"
+    _write(full, datetime.date(2025, 12, 31))
+    assert path.read_text() == full.read_text()
+
+    assert extend_lut(path, datetime.date(2025, 12, 31), LAT, LON) == 0
+
+
+def test_extend_bin_with_chunk(tmp_path) -> None:
+    path = tmp_path / "sun_lut.bin"
+    device = tmp_path / "device.bin"
+    chunk = tmp_path / "chunk.bin"
+    _write(path, datetime.date(2025, 1, 31))
+    device.write_bytes(path.read_bytes())
+
+    added = extend_lut(path, datetime.date(2025, 2, 28), LAT, LON, chunk_path=chunk)
+    assert added == 28
+    assert last_date(path) == datetime.date(2025, 2, 28)
+
+    # device applies the chunk and ends up with the same table
+    assert sun_lut.append_chunk(str(chunk), str(device)) == 28
+    assert device.read_bytes() == path.read_bytes()
+    assert sun_lut.lookup("2025-02-28", str(device)) == sun_lut.lookup("2025-02-28", str(path))
@@ -0,0 +1,91 @@
+import datetime
+import json
+import pytest
+
+import sun
+from fit_sun import fit_location
+
+# Tolerance in decimal hours: 1 minute ~ 1/60
+TOLERANCE = 1 / 60
+
+
+pytestmark = pytest.mark.usefixtures("clear_sun_cache")
+
+
+def test_fit_error_decreases_with_harmonics() -> None:
+    start, end = datetime.date(2024, 1, 1), datetime.date(2025, 12, 31)
+    coarse = fit_location(52.37, 4.89, start, end, harmonics=2)
+    fine = fit_location(52.37, 4.89, start, end, harmonics=4)
+
+    assert len(fine["rise"]) == len(fine["set"]) == 9
+    assert fine["rise_max_error_h"] < coarse["rise_max_error_h"]
+    assert fine["rise_max_error_h"] < TOLERANCE
+    assert fine["set_max_error_h"] < TOLERANCE
+
+
+def test_fit_engine(mocker, tmp_path) -> None:
+    lat, lon = 40.7128, -74.0060
+    coefs = fit_location(lat, lon, datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+    coef_file = tmp_path / "sun_coefs.json"
+    coef_file.write_text(json.dumps(coefs))
+
+    mocker.patch("sun.ENGINE", "fit")
+    mocker.patch("sun.COEF_FILE", str(coef_file))
+    mocker.patch.dict("os.environ", {"LOCATION_LATLON": "40.71,-74.0"})
+    float_engine = mocker.spy(sun, "_calc_sun_times")
+
+    for month in range(1, 13):
+        expected = sun._calc_sun_time(False, 2024, month, 10, lat, lon)
+        assert abs(sun.sunset(2024, month, 10) - expected) < TOLERANCE
+
+    float_engine.assert_not_called()
+
+
+def test_fit_engine_other_location(mocker, tmp_path) -> None:
+    coefs = fit_location(40.7128, -74.0060, datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+    coef_file = tmp_path / "sun_coefs.json"
+    coef_file.write_text(json.dumps(coefs))
+
+    mocker.patch("sun.ENGINE", "fit")
+    mocker.patch("sun.COEF_FILE", str(coef_file))
+    mocker.patch.dict("os.environ", {"LOCATION_LATLON": "51.365967,6.172045"})
+    error = mocker.patch("sun.logger.error")
+
+    for month in (1, 6):
+        expected = sun._calc_sun_time(True, 2024, month, 10, 51.365967, 6.172045)
+        assert sun.sunrise(2024, month, 10) == pytest.approx(expected)
+
+    error.assert_called_once()  # the location is checked once
+    assert "LOCATION_LATLON" in error.call_args.args[0]
+
+
+@pytest.mark.parametrize("content", [None, "{not json"])
+def test_fit_engine_missing_or_corrupt_file(mocker, tmp_path, content) -> None:
+    coef_file = tmp_path / "sun_coefs.json"
+    if content is not None:
+        coef_file.write_text(content)
+
+    mocker.patch("sun.ENGINE", "fit")
+    mocker.patch("sun.COEF_FILE", str(coef_file))
+    mocker.patch.dict("os.environ", {"LOCATION_LATLON": "51.365967,6.172045"})
+    error = mocker.patch("sun.logger.error")
+
+    expected = sun._calc_sun_time(False, 2024, 3, 10, 51.365967, 6.172045)
+    assert sun.sunset(2024, 3, 10) == pytest.approx(expected)
+    assert sun.sunrise(2024, 3, 10)
+    error.assert_called_once()
+
+
+def test_fit_engine_other_zenith(mocker, tmp_path) -> None:
+    lat, lon = 40.7128, -74.0060
+    coef_file = tmp_path / "sun_coefs.json"
+    coef_file.write_text(json.dumps(fit_location(lat, lon, datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))))
+
+    mocker.patch("sun.ENGINE", "fit")
+    mocker.patch("sun.COEF_FILE", str(coef_file))
+    mocker.patch.dict("os.environ", {"LOCATION_LATLON": f"{lat},{lon}"})
+
+    civil = sun._calc_sun_time(False, 2024, 3, 10, lat, lon, sun.ZENITHS["civil"])
+    assert sun.sunset(2024, 3, 10, zenith="civil") == pytest.approx(civil)
+    official = sun._calc_sun_time(False, 2024, 3, 10, lat, lon)
+    assert abs(sun.sunset(2024, 3, 10) - official) < TOLERANCE
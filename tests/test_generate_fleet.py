@@ -0,0 +1,55 @@
+import datetime
+import json
+
+import sun_lut
+from generate_fleet import MANIFEST_FILE, generate_fleet, site_rows
+from generate_lut import lut_rows
+
+START = datetime.date(2025, 1, 1)
+END = datetime.date(2025, 1, 31)
+
+SITES = [
+    {"name": "coop1", "latlon": "51.365967,6.172045", "after_sunset": 0.5},
+    {"name": "coop2", "latlon": "48.1,11.5", "not_before": 7.5},
+]
+
+
+def test_generate_fleet(tmp_path) -> None:
+    result = generate_fleet(SITES, START, END, tmp_path, jobs=2)
+    assert result == {"coop1": "generated", "coop2": "generated"}
+
+    lines = (tmp_path / "coop2.csv").read_text().splitlines()
+    assert len(lines) == 31
+    assert lines[0].startswith("2025-01-01,7.50,")  # limited by not_before
+    assert set(json.loads((tmp_path / MANIFEST_FILE).read_text())) == {"coop1", "coop2"}
+
+
+def test_skip_unchanged_sites(tmp_path) -> None:
+    generate_fleet(SITES, START, END, tmp_path, fmt="bin", jobs=2)
+
+    changed = [SITES[0], dict(SITES[1], not_before=7.25)]
+    result = generate_fleet(changed, START, END, tmp_path, fmt="bin", jobs=2)
+    assert result == {"coop1": "skipped", "coop2": "generated"}
+
+    assert sun_lut.lookup("2025-01-31", str(tmp_path / "coop1.bin"))
+
+    # removed output is regenerated
+    (tmp_path / "coop1.bin").unlink()
+    result = generate_fleet(changed, START, END, tmp_path, fmt="bin", jobs=2)
+    assert result == {"coop1": "generated", "coop2": "skipped"}
+
+
+def test_polar_site_fails_alone(tmp_path) -> None:
+    sites = [*SITES, {"name": "svalbard", "latlon": "78.2,15.6"}]
+    result = generate_fleet(sites, START, END, tmp_path, fmt="bin", jobs=2)
+
+    assert result["coop1"] == result["coop2"] == "generated"
+    assert result["svalbard"].startswith("failed: no sunrise or sunset on 2025-01-01")
+    assert not (tmp_path / "svalbard.bin").exists()
+    assert "svalbard" not in json.loads((tmp_path / MANIFEST_FILE).read_text())
+
+
+def test_site_rows_match_lut_rows() -> None:
+    rows = site_rows(SITES[1], START, END)
+    assert rows == lut_rows(START, END, 48.1, 11.5, not_before=7.5)
+    assert rows[0][1] == 7.5
@@ -0,0 +1,95 @@
+import pytest
+
+import journal as journal_module
+from journal import Journal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.bin")
+
+
+def test_empty(path):
+    journal = Journal(path, "i", slots=4)
+    assert journal.load() is None
+    assert journal.seq == 0
+
+
+@pytest.mark.parametrize("count", [1, 4, 9])
+def test_latest_after_rotation(path, count):
+    journal = Journal(path, "iB", slots=4)
+    for value in range(count):
+        journal.append(-value, value % 3)
+
+    with open(path, "rb") as f:
+        assert len(f.read()) == 4 * journal.entry_size  # preallocated, fixed size
+
+    reloaded = Journal(path, "iB", slots=4)
+    assert reloaded.load() == (1 - count, (count - 1) % 3)
+    assert reloaded.seq == count
+
+    reloaded.append(100, 1)  # continues the sequence
+    assert Journal(path, "iB", slots=4).load() == (100, 1)
+
+
+def test_corrupt_entry_falls_back(path):
+    journal = Journal(path, "i", slots=4)
+    for value in range(6):
+        journal.append(value)
+
+    # torn write of the latest entry, seq 6 in slot 2
+    with open(path, "r+b") as f:
+        f.seek(2 * journal.entry_size + 5)
+        f.write(b"\xff")
+
+    reloaded = Journal(path, "i", slots=4)
+    assert reloaded.load() == (4,)
+    assert reloaded.seq == 5
+
+    reloaded.append(7)  # overwrites the corrupt slot
+    assert Journal(path, "i", slots=4).load() == (7,)
+
+
+def test_garbage_file(path):
+    with open(path, "wb") as f:
+        f.write(b"\x5a" * 100)
+    assert Journal(path, "i", slots=4).load() is None
+
+
+def test_default_region_spans_erase_blocks(path):
+    journal = Journal(path, "IiBB")
+    assert journal.entry_size == 16
+    assert journal.slots * journal.entry_size == journal_module.JOURNAL_SIZE >= 4 * journal_module.ERASE_BLOCK
+
+    for value in range(journal.slots + 300):  # across the read blocks and one rotation
+        journal.append(value, -value, 1, 2)
+    with open(path, "rb") as f:
+        assert len(f.read()) == journal_module.JOURNAL_SIZE
+
+    reloaded = Journal(path, "IiBB")
+    last = journal.slots + 299
+    assert reloaded.load() == (last, -last, 1, 2)
+    assert reloaded.seq == last + 1
+
+
+def test_entries_past_region_ignored(path):
+    journal = Journal(path, "i", slots=8)
+    for value in range(7):
+        journal.append(value)  # seq 1..7 in slots 1..7
+
+    assert Journal(path, "i", slots=6).load() == (4,)  # seq 5 in slot 5
+
+
+def test_hold_keeps_file_open(path, mocker):
+    journal = Journal(path, "i", slots=4)
+    journal.append(0)  # creates the region
+    opened = mocker.patch("builtins.open", wraps=open)
+
+    journal.hold()
+    for value in range(1, 6):
+        journal.append(value)
+    journal.release()
+    journal.release()  # no-op
+
+    assert opened.call_count == 1
+    assert Journal(path, "i", slots=4).load() == (5,)
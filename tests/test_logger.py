@@ -0,0 +1,43 @@
+import importlib
+
+import pytest
+
+import logger
+
+
+def test_debug_formats_only_when_enabled(mocker, capsys):
+    mocker.patch("logger.DEBUG", True)
+    logger.debug("value: %s %d", "a", 5)
+    assert capsys.readouterr().out.endswith("[DEBUG] value: a 5\n")
+
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted while disabled")
+
+    mocker.patch("logger.DEBUG", False)
+    logger.debug("value: %s", Unformattable())
+    assert capsys.readouterr().out == ""
+
+
+def test_debug_off_by_default(monkeypatch):
+    monkeypatch.delenv("LOG_DEBUG", raising=False)
+    try:
+        assert not importlib.reload(logger).DEBUG
+        monkeypatch.setenv("LOG_DEBUG", "1")
+        assert importlib.reload(logger).DEBUG
+        monkeypatch.setenv("LOG_DEBUG", "0")
+        assert not importlib.reload(logger).DEBUG
+    finally:
+        monkeypatch.undo()
+        importlib.reload(logger)
+
+
+@pytest.mark.parametrize("value, enabled", [(0, False), (1, True), ("", False)])
+def test_debug_setting_int(mocker, value, enabled):
+    """settings.toml gives ints for unquoted values on CircuitPython"""
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: value if key == "LOG_DEBUG" else default)
+    try:
+        assert importlib.reload(logger).DEBUG is enabled
+    finally:
+        mocker.stopall()
+        importlib.reload(logger)
@@ -0,0 +1,250 @@
+import datetime
+import os
+
+import door
+import sun
+from simulator import MOTION_MQTT_INTERVAL, Simulation
+
+START = datetime.datetime(2025, 1, 1)
+LATLON = "51.365967,6.172045"
+
+
+def _hours(stamp: str) -> float:
+    hh, mm, ss = (int(v) for v in stamp[11:].split(":"))
+    return hh + mm / 60 + ss / 3600
+
+
+def test_year_timeline() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(days=365))
+
+    events = sim.door_events()[1:]  # skip state at boot
+    assert len(events) == 2 * 365 - 1  # door is open at boot
+
+    by_day: dict[str, list[tuple[float, str]]] = {}
+    for stamp, state in events:
+        by_day.setdefault(stamp[:10], []).append((_hours(stamp), state))
+
+    assert len(by_day) == 365
+    lat, lon = (float(v) for v in LATLON.split(","))
+    for day, moves in by_day.items():
+        states = [state for _, state in moves]
+        assert states in (["open", "closed"], ["closed"]), day
+
+        y, m, d = (int(v) for v in day.split("-"))
+        close_hours = moves[-1][0]
+        assert 0 < close_hours - sun._calc_sun_time(False, y, m, d, lat, lon) < 0.05, day
+
+
+def test_reboot_does_not_move_door() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(hours=12))
+        assert sim.door.state == door.STATE_OPEN
+
+        sim.reboot()
+        sim.run_until(START + datetime.timedelta(hours=23))
+
+    states = [state for _, state in sim.door_events()]
+    assert states == ["open", "open", "closed"]  # boot, reboot, close in the evening
+
+
+def test_reboot_during_move_recovers() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(hours=20))
+        sim.door.state = door.STATE_MOVING  # power lost while moving
+
+        sim.reboot()
+        assert sim.door.state == door.STATE_OPEN  # opened to recalibrate
+        assert sim.door.moving  # closing started by init, run by the main loop
+
+        sim.run_until(START + datetime.timedelta(hours=20, minutes=5))
+        assert sim.door.state == door.STATE_CLOSED
+
+
+def test_ntp_failure_drift() -> None:
+    with Simulation(START, LATLON, drift_s_per_day=30.0) as sim:
+        sim.ntp_fail = True
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(days=10))
+
+    fails = [e for e in sim.events if e[1] == "ntp_fail"]
+    assert len(fails) == 10  # each day, the RTC is set at boot
+    assert sim.clock.offset > 290  # no corrections
+
+
+def test_loop_period() -> None:
+    with Simulation(START, LATLON, loop_period=5.0) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(days=1))
+
+    # one iteration per 5 s, door moves take longer
+    assert 17000 < sim.iterations <= 86400 / 5
+    assert sim.loop_cpu_s > 0
+
+
+def test_reboot_resumes_task_state() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(hours=12))
+        n_events = len(sim.events)
+
+        sim.reboot()
+        sim.run_until(START + datetime.timedelta(hours=14))
+
+    after_reset = sim.events[n_events:]
+    # the restored open task is not repeated, the RTC is still set: no NTP sync
+    assert [e[2] for e in after_reset if e[1] == "task"] == []
+    assert [e[1] for e in after_reset].count("ntp_sync") == 0
+    assert [e[2] for e in after_reset if e[1] == "info"] == [
+        "Restored task state",
+        "sunrise: 07:40:44 sunset: 15:37:17",
+        "Updated door times: 07:40:44, 15:37:17",
+        "Door state: open",
+    ]
+
+
+def test_door_move_ramped() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens the door, the state is unknown
+        moves = [e for e in sim.events if e[1] == "info" and e[2].startswith(("Opening", "Door is open"))]
+
+    t_start, t_end = (_hours(stamp) * 3600 for stamp, _, _ in moves)
+    constant_speed = (door.TRAVEL_MM + door.OPEN_EXTRA_MM) / door.MM_PER_REV * 512 * 8 * 950e-6
+    assert t_end - t_start < 0.95 * constant_speed
+
+
+def test_checkpoints_keep_coils_energized() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens
+        stepper = sim.door.stepper
+        starts = stepper.starts
+        seq = door._journal.seq
+
+        sim.door.close()  # blocking, checkpointed every CHECKPOINT_REVS
+        checkpoints = (door.mm_to_steps(door.TRAVEL_MM) - 1) // (door.CHECKPOINT_REVS * 512)
+        assert door._journal.seq - seq == checkpoints + 2  # and start and end
+        sim.door.start_open()
+        sim.door.finish()
+
+        # checkpoints and slices neither restart the phases nor release the coils
+        assert stepper.starts == starts + 2
+        assert not stepper.held
+
+
+def test_door_move_non_blocking() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()
+        sim.run_until(START + datetime.timedelta(hours=15, minutes=37, seconds=19))
+        assert sim.door.moving  # close task started the move
+
+        progress = []
+        held = []
+        while sim.door.moving:
+            sim.step()
+            progress.append((sim.door.progress, sim.door.position_mm))
+            held.append(sim.door.stepper.held)
+
+    # one slice of 1024 steps per loop iteration, mqtt served every few slices
+    slices = int(door.TRAVEL_MM / door.MM_PER_REV * 512 / door.SLICE_STEPS) + 1
+    assert sim.motion_iterations == slices
+    slice_s = door.SLICE_STEPS * 8 * 950e-6  # at most
+    assert 0 < sim.motion_polls <= slices * slice_s / MOTION_MQTT_INTERVAL + 1
+    assert all(held[:-1]) and not held[-1]  # coils released at the end only
+    assert progress[-1] == (None, 0.0)
+    fractions = [p for p, _ in progress[:-1]]
+    assert fractions == sorted(fractions) and 0 < fractions[0] < 1
+    heights = [h for _, h in progress[:-1]]
+    assert heights == sorted(heights, reverse=True) and heights[0] < door.TRAVEL_MM
+
+
+def test_slices_share_one_ramp() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens
+        total = sim.door.position
+        cruise_delay = door.DRIVE_PRESETS[door.DIRECTION_CLOSE][1]
+
+        sim.door.start_close()
+        t_start = sim.clock.true_time
+        sim.door.step_motion()
+        sim.door.step_motion()  # back to back: no slow down between the slices
+        ramp = door.Ramp(total, cruise_delay=cruise_delay)
+        continuous_s = sim.clock.true_time - t_start
+        assert abs(continuous_s - ramp.step_delays_us(0, 2048) * 8 / 1e6) < 1e-3
+        sim.door.start_open()
+        sim.door.finish()
+
+        sim.door.start_close()
+        t_start = sim.clock.true_time
+        sim.door.step_motion(pause=True)
+        sim.door.step_motion(pause=True)  # each slice ramps up and down
+        ramp = door.Ramp(1024, cruise_delay=cruise_delay)
+        paused_s = sim.clock.true_time - t_start
+        assert abs(paused_s - 2 * ramp.step_delays_us() * 8 / 1e6) < 1e-3
+        assert paused_s > continuous_s
+
+
+def test_door_reverse_from_position() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens
+        stepper = sim.door.stepper
+
+        assert sim.door.start_close()
+        sim.door.step_motion()
+        sim.door.step_motion()  # two slices down
+        height = sim.door.position_mm
+        assert sim.door.position == door.mm_to_steps(door.TRAVEL_MM) - 2 * 1024
+
+        position = stepper.position
+        assert sim.door.start_open()  # interrupts the close
+        sim.door.finish()
+
+        assert sim.door.state == door.STATE_OPEN
+        assert sim.door.position == door.mm_to_steps(door.TRAVEL_MM)
+        opened_mm = (position - stepper.position) * door.MM_PER_REV / 512
+        assert abs(opened_mm - (door.TRAVEL_MM - height + door.OPEN_EXTRA_MM)) < 0.1
+
+
+def test_legacy_state_migrated() -> None:
+    with Simulation(START, LATLON) as sim:
+        with open(door.LEGACY_STATE_FILE, "w") as f:
+            f.write('{"state": "closed", "time": "2024-12-31 17:00:00"}')
+        sim.boot()
+        assert sim.door.state == door.STATE_CLOSED
+        assert sim.door.position == 0
+        assert sim.door.stepper.total_steps == 0  # not opened to recalibrate
+
+        assert not os.path.exists(door.LEGACY_STATE_FILE)
+        assert door.State.load().name == door.STATE_CLOSED  # from the journal
+
+
+def test_reboot_finishes_interrupted_move() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens
+        sim.door.start_close()
+        for _ in range(4):
+            sim.door.step_motion()
+        position = sim.door.position
+        assert position == door.mm_to_steps(door.TRAVEL_MM) - 4 * 1024
+
+        sim.reboot()  # power lost after the fourth slice, at the second checkpoint
+        assert sim.door.state == door.STATE_CLOSED
+        assert sim.door.stepper.total_steps == position  # only the remaining distance
+
+        sim.door.start_open()
+        for _ in range(3):
+            sim.door.step_motion()
+        sim.reboot()  # 3 slices up, resumed from the checkpoint after 2
+        assert sim.door.state == door.STATE_OPEN
+        remaining = door.mm_to_steps(door.TRAVEL_MM) - 2048 + door.mm_to_steps(door.OPEN_EXTRA_MM)
+        assert sim.door.stepper.total_steps == remaining
+
+
+def test_drive_presets() -> None:
+    with Simulation(START, LATLON) as sim:
+        sim.boot()  # opens
+        assert sim.door.stepper.mode_name == door.DRIVE_PRESETS[door.DIRECTION_OPEN][0] == "full"
+        sim.door.close()
+        assert sim.door.stepper.mode_name == door.DRIVE_PRESETS[door.DIRECTION_CLOSE][0] == "half"
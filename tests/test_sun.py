@@ -1,7 +1,8 @@
 import datetime
 import math
 import pytest
-from sun import sunrise, sunset
+import sun
+from sun import sunrise, sunset, sun_times, _calc_sun_time
 from astral import LocationInfo
 from astral.sun import sun as a_sun
 from datetime import timezone
@@ -10,6 +11,9 @@ from datetime import timezone
 TOLERANCE = 1 / 60
 
 
+pytestmark = pytest.mark.usefixtures("clear_sun_cache")
+
+
 @pytest.mark.parametrize(
     "lat,lon,test_date",
     [
@@ -60,3 +64,130 @@ def test_sunset(mocker, lat: float, lon: float, test_date: datetime.date) -> Non
     assert math.isclose(
         calculated_decimal, expected_decimal, abs_tol=TOLERANCE
     ), f"Sunset: calculated {calculated_decimal}, expected {expected_decimal}"
+
+
+def test_sun_times_matches_scalar() -> None:
+    lat, lon = 52.37, 4.89
+    dates, rise, set_ = sun_times(
+        datetime.date(2023, 12, 25), datetime.date(2025, 1, 5), lat, lon
+    )
+
+    assert len(dates) == len(rise) == len(set_) == 378
+    assert str(dates[0]) == "2023-12-25"
+    assert str(dates[-1]) == "2025-01-05"
+
+    for d, r, s in zip(dates, rise, set_):
+        year, month, day = (int(v) for v in str(d).split("-"))
+        assert math.isclose(r, _calc_sun_time(True, year, month, day, lat, lon), abs_tol=1e-9)
+        assert math.isclose(s, _calc_sun_time(False, year, month, day, lat, lon), abs_tol=1e-9)
+
+
+def test_sun_times_polar_is_nan() -> None:
+    _, rise, set_ = sun_times(datetime.date(2023, 6, 21), datetime.date(2023, 6, 21), 80.0, 0.0)
+    assert math.isnan(rise[0])
+    assert math.isnan(set_[0])
+
+
+def test_location_parsed_once(mocker) -> None:
+    getenv = mocker.patch("os.getenv", return_value="[52.37,4.89]")
+
+    sunrise(2023, 6, 21)
+    sunset(2023, 6, 21)
+    sunrise(2023, 6, 22)
+    assert getenv.call_count == 1
+
+    # new settings are picked up after clearing the cache
+    getenv.return_value = "[40.7128,-74.0060]"
+    sun.clear_cache()
+    assert sunrise(2023, 6, 21) == _calc_sun_time(True, 2023, 6, 21, 40.7128, -74.0060)
+    assert getenv.call_count == 2
+
+
+def test_sun_time_cache(mocker) -> None:
+    mocker.patch("os.getenv", return_value="[52.37,4.89]")
+    calc = mocker.spy(sun, "_calc_sun_terms")
+
+    first = sunrise(2023, 6, 21)
+    assert sunrise(2023, 6, 21) == first
+    assert calc.call_count == 1
+
+    # cache is bounded, oldest entries are evicted
+    for day in range(1, sun.CACHE_SIZE + 2):
+        sunset(2023, 7, day)
+    assert len(sun._cache) == sun.CACHE_SIZE
+    assert (2023, 6, 21, True, sun.ZENITH) not in sun._cache
+
+    sunrise(2023, 6, 21)
+    assert calc.call_count == sun.CACHE_SIZE + 3
+
+
+@pytest.mark.parametrize("zenith,astral_depression", [("civil", 6), ("nautical", 12), (96.0, 6)])
+def test_twilight(mocker, zenith, astral_depression: float) -> None:
+    lat, lon, test_date = 52.37, 4.89, datetime.date(2023, 3, 21)
+    mocker.patch("os.getenv", return_value=f"[{lat},{lon}]")
+
+    location = LocationInfo("Test", "Test", "UTC", lat, lon)
+    s = a_sun(location.observer, date=test_date, tzinfo=timezone.utc, dawn_dusk_depression=astral_depression)
+
+    for calculated, expected in [
+        (sunrise(test_date.year, test_date.month, test_date.day, zenith=zenith), s["dawn"]),
+        (sunset(test_date.year, test_date.month, test_date.day, zenith=zenith), s["dusk"]),
+    ]:
+        expected_decimal = expected.hour + expected.minute / 60 + expected.second / 3600
+        assert math.isclose(calculated, expected_decimal, abs_tol=2 * TOLERANCE)
+
+
+def test_multiple_zeniths_share_terms(mocker) -> None:
+    lat, lon = 52.37, 4.89
+    mocker.patch("os.getenv", return_value=f"[{lat},{lon}]")
+    terms = mocker.spy(sun, "_calc_sun_terms")
+
+    zeniths = ["official", "civil", 100.0, "nautical"]
+    times = sun.sunrises(2023, 3, 21, zeniths)
+    assert terms.call_count == 1
+    assert times == sorted(times, reverse=True)  # larger zenith -> earlier dawn
+
+    for zenith, value in zip(zeniths, times):
+        expected = _calc_sun_time(True, 2023, 3, 21, lat, lon, sun._resolve_zenith(zenith))
+        assert value == expected
+
+    # served from cache
+    terms.reset_mock()
+    assert sun.sunrises(2023, 3, 21, zeniths) == times
+    terms.assert_not_called()
+
+
+@pytest.mark.parametrize("lat,lon", [(52.37, 4.89), (40.7128, -74.0060), (-33.87, 151.21)])
+@pytest.mark.parametrize("elevation", [-0.8, -4.0, -6.0, 3.0])
+def test_elevation_time(lat: float, lon: float, elevation: float) -> None:
+    for month in range(1, 13):
+        for rising in (True, False):
+            calculated = sun.elevation_time(2024, month, 15, elevation, rising, lat, lon)
+            expected = _calc_sun_time(rising, 2024, month, 15, lat, lon, 90 - elevation)
+            diff = abs(calculated - expected)
+            assert min(diff, 24 - diff) < TOLERANCE
+
+
+@pytest.mark.parametrize("elevation", [-0.8, -4.0, 3.0])
+def test_elevation_time_consistent(elevation: float) -> None:
+    lat, lon = 52.37, 4.89  # no wrap around midnight UT
+    for month in range(1, 13):
+        for rising in (True, False):
+            hours = sun.elevation_time(2024, month, 15, elevation, rising, lat, lon)
+            assert sun.solar_elevation(2024, month, 15, hours, lat, lon) == pytest.approx(
+                elevation, abs=0.01
+            )
+
+
+def test_elevation_time_unreachable() -> None:
+    with pytest.raises(ValueError):
+        sun.elevation_time(2024, 6, 21, 60.0, True, 70.0, 0.0)  # max is ~43 deg
+    with pytest.raises(ValueError):
+        sun.elevation_time(2024, 12, 21, -0.8, True, 80.0, 0.0)  # polar night
+
+
+def test_solar_elevation_location(mocker) -> None:
+    mocker.patch("os.getenv", return_value="[52.37,4.89]")
+    noon = sun.solar_elevation(2024, 6, 21, 11.7)
+    assert noon == pytest.approx(90 - 52.37 + 23.44, abs=0.5)
+    assert sun.solar_elevation(2024, 6, 21, 23.7) < 0
@@ -0,0 +1,80 @@
+import datetime
+import math
+import pytest
+from astral import LocationInfo
+from astral.sun import sun as a_sun
+from datetime import timezone
+
+import sun
+import sun_fixed
+
+# Tolerance in decimal hours: 1 minute ~ 1/60
+TOLERANCE = 1 / 60
+
+
+@pytest.mark.parametrize("angle", range(-720, 721, 29))
+def test_trig_tables(angle: int) -> None:
+    angle_md = angle * 1000 + 123
+    rad = math.radians(angle_md / 1000)
+    assert sun_fixed.sin_q14(angle_md) == pytest.approx(math.sin(rad) * 16384, abs=3)
+    assert sun_fixed.cos_q14(angle_md) == pytest.approx(math.cos(rad) * 16384, abs=3)
+
+    y, x = math.sin(rad) * 10000, math.cos(rad) * 10000
+    expected = math.degrees(math.atan2(y, x)) * 1000
+    assert sun_fixed.atan2_md(int(y), int(x)) == pytest.approx(expected, abs=15)
+
+
+def test_isqrt() -> None:
+    for n in [0, 1, 2, 15, 16, 17, 1 << 28, 123456789]:
+        assert sun_fixed.isqrt(n) == math.isqrt(n)
+
+
+@pytest.mark.parametrize("isRiseTime", [True, False])
+@pytest.mark.parametrize(
+    "lat,lon,test_date",
+    [
+        (52.37, 4.89, datetime.date(2023, 6, 21)),  # Amsterdam on June 21
+        (40.7128, -74.0060, datetime.date(2023, 12, 21)),  # New York on Dec 21
+    ],
+)
+def test_against_astral(isRiseTime: bool, lat: float, lon: float, test_date: datetime.date) -> None:
+    calculated = sun_fixed.calc_sun_time(
+        isRiseTime, test_date.year, test_date.month, test_date.day, lat, lon
+    )
+
+    location = LocationInfo("Test", "Test", "UTC", lat, lon)
+    s = a_sun(location.observer, date=test_date, tzinfo=timezone.utc)
+    expected = s["sunrise" if isRiseTime else "sunset"]
+    expected_decimal = expected.hour + expected.minute / 60 + expected.second / 3600
+
+    assert math.isclose(calculated, expected_decimal, abs_tol=TOLERANCE)
+
+
+@pytest.mark.parametrize("lat,lon", [(52.37, 4.89), (40.7128, -74.0060), (-33.87, 151.21)])
+def test_matches_float_engine(lat: float, lon: float) -> None:
+    d = datetime.date(2024, 1, 1)
+    while d.year == 2024:
+        for isRiseTime in (True, False):
+            expected = sun._calc_sun_time(isRiseTime, d.year, d.month, d.day, lat, lon)
+            calculated = sun_fixed.calc_sun_time(isRiseTime, d.year, d.month, d.day, lat, lon)
+            diff = abs(calculated - expected)
+            assert min(diff, 24 - diff) < TOLERANCE / 4, f"{d} {isRiseTime}"
+        d += datetime.timedelta(days=1)
+
+
+def test_polar() -> None:
+    with pytest.raises(ValueError):
+        sun_fixed.calc_sun_time(True, 2023, 12, 21, 80.0, 0.0)
+    with pytest.raises(ValueError):
+        sun_fixed.calc_sun_time(True, 2023, 6, 21, 80.0, 0.0)
+
+
+def test_engine_selection(mocker) -> None:
+    mocker.patch("os.getenv", return_value="[52.37,4.89]")
+    mocker.patch("sun.ENGINE", "fixed")
+    fixed = mocker.spy(sun_fixed, "calc_sun_time")
+    sun.clear_cache()
+
+    sun.sunrise(2023, 6, 21)
+    assert fixed.call_count == 1
+    sun.clear_cache()
@@ -0,0 +1,81 @@
+import datetime
+import pytest
+import sun_lut
+import timing
+
+
+@pytest.fixture
+def lut_file(tmp_path):
+    """binary LUT with three days starting 2024-01-15"""
+    rows = [(7.91, 16.50), (7.89, 16.53), (7.88, 16.55)]
+    path = tmp_path / "sun_lut.bin"
+    with open(path, "wb") as f:
+        f.write(sun_lut.pack_header(sun_lut.parse_date("2024-01-15"), len(rows)))
+        for open_time, close_time in rows:
+            f.write(sun_lut.pack_record(open_time, close_time))
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "d",
+    [
+        datetime.date(1970, 1, 1),
+        datetime.date(2000, 2, 29),
+        datetime.date(2024, 3, 1),
+        datetime.date(2030, 12, 31),
+    ],
+)
+def test_days_from_civil(d: datetime.date) -> None:
+    expected = (d - datetime.date(1970, 1, 1)).days
+    assert sun_lut.days_from_civil(d.year, d.month, d.day) == expected
+
+
+def test_lookup(lut_file) -> None:
+    assert sun_lut.lookup("2024-01-15", lut_file) == (7.91, 16.50)
+    assert sun_lut.lookup("2024-01-17", lut_file) == (7.88, 16.55)
+
+
+def test_lookup_out_of_range(lut_file) -> None:
+    with pytest.raises(ValueError):
+        sun_lut.lookup("2024-01-14", lut_file)
+    with pytest.raises(ValueError):
+        sun_lut.lookup("2024-01-18", lut_file)
+
+
+def test_bad_magic(tmp_path) -> None:
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"\x00" * 32)
+    with pytest.raises(ValueError):
+        sun_lut.lookup("2024-01-15", str(path))
+
+
+def test_extract_floats_dispatches_on_extension(lut_file) -> None:
+    assert timing.extract_floats_from_file("2024-01-16", lut_file) == (7.89, 16.53)
+
+
+def _write_lut(path, first_date: str, rows) -> None:
+    with open(path, "wb") as f:
+        f.write(sun_lut.pack_header(sun_lut.parse_date(first_date), len(rows)))
+        for open_time, close_time in rows:
+            f.write(sun_lut.pack_record(open_time, close_time))
+
+
+def test_append_chunk(lut_file, tmp_path) -> None:
+    chunk = str(tmp_path / "chunk.bin")
+    # overlaps one day with the LUT
+    _write_lut(chunk, "2024-01-17", [(7.88, 16.55), (7.86, 16.58), (7.85, 16.61)])
+
+    assert sun_lut.append_chunk(chunk, lut_file) == 2
+    assert sun_lut.lookup("2024-01-19", lut_file) == (7.85, 16.61)
+    assert sun_lut.lookup("2024-01-15", lut_file) == (7.91, 16.50)
+
+    # applying again does nothing
+    assert sun_lut.append_chunk(chunk, lut_file) == 0
+
+
+def test_append_chunk_with_gap(lut_file, tmp_path) -> None:
+    chunk = str(tmp_path / "chunk.bin")
+    _write_lut(chunk, "2024-01-20", [(7.85, 16.61)])
+
+    with pytest.raises(ValueError):
+        sun_lut.append_chunk(chunk, lut_file)
@@ -1,6 +1,7 @@
 import pytest
 import time
 import daily_tasks
+import timing
 import door
 from unittest.mock import Mock
 import logging
@@ -89,6 +90,22 @@ def test_reset_on_new_day(mocker):
     tsk.execute()
     assert tsk.exec_count == 2
 
+def test_is_executed_after_midnight(mocker):
+    mocker.patch("time.localtime", return_value=fake_localtime(100))
+    open_task = DummyTask(0.0)
+    daily_tasks.init_open_close(open_task, DummyTask(23.99))  # throwaway tick of day 100
+    assert open_task.executed_flag
+    assert open_task.is_executed
+
+    # past midnight, nobody updates the tick the task ran at
+    mocker.patch("time.localtime", return_value=fake_localtime(101))
+    assert not open_task.is_executed
+    assert open_task.executed_on(timing.Tick(0)) is False
+    assert open_task.tick is None  # only set while main() runs
+    open_task.is_executed = True
+    assert open_task._yday_executed == 101
+
+
 def test_reset_flag():
 
     tsk = DummyTask(5.0)
@@ -279,8 +296,46 @@ def test_open_should_not_run_after_close(mocker):
     assert not open_task.executed_flag
     assert close_task.executed_flag
 
+def test_init_open_close_keeps_restored_flags(mocker, utc_localtime):
+    mocker.patch("time.time", return_value=1735732800)
+    tick = timing.Tick()  # 12:00 UTC
+    mocker.patch("daily_tasks.timing.now", return_value=tick.hours)
+
+    open_task = DummyTask(exec_time=6.0)
+    close_task = DummyTask(exec_time=11.0)
+    close_task.restore(tick.time - 60, tick)  # closed before the reset
+    daily_tasks.init_open_close(open_task, close_task, tick)
+    assert close_task.is_executed and not close_task.executed_flag
+    assert open_task.is_executed and not open_task.executed_flag
+
+    # the door was opened to recalibrate, close it again
+    daily_tasks.init_open_close(open_task, close_task, tick, door_reset=True)
+    assert close_task.executed_flag
+    assert not open_task.executed_flag
+
+    open_task = DummyTask(exec_time=6.0)
+    open_task.restore(tick.time - 60, tick)
+    daily_tasks.init_open_close(open_task, DummyTask(exec_time=18.0), tick)
+    assert not open_task.executed_flag
+
+
 # -----------------------test sun times calculation-----------------------
 
+def test_sun_times_use_task_tick(mocker):
+    sunrise = mocker.patch("sun.sunrise", return_value=5.0)
+    sunset = mocker.patch("sun.sunset", return_value=19.0)
+    localtime = mocker.spy(time, "localtime")
+
+    tick = timing.Tick(1735732800)  # 2025-01-01 12:00 UTC
+    tsk = daily_tasks.UpdateDoorTimesTask(exec_time=1.0, open_task=DummyTask(6.0), close_task=DummyTask(18.0))
+    localtime.reset_mock()
+    tsk.execute(tick)
+
+    assert sunrise.call_args.args == (tick.year, tick.month, tick.day)
+    assert sunset.call_args.args == (tick.year, tick.month, tick.day)
+    assert localtime.call_count == 0
+
+
 def test_sun_times_calculation(mocker):
 
     mocker.patch("sun.sunrise", return_value=5.0)
@@ -316,3 +371,368 @@ def test_sun_times_calculation(mocker):
     assert open_tsk.exec_time == 7.0
     assert close_tsk.exec_time == 19.5
 
+
+
+def test_sun_times_zenith(mocker):
+    sunrise = mocker.patch("sun.sunrise", return_value=5.0)
+    sunset = mocker.patch("sun.sunset", return_value=19.0)
+    mocker.patch.dict(os.environ, {"OPEN_ZENITH": "civil", "CLOSE_ZENITH": "nautical"})
+
+    open_tsk = DummyTask(exec_time=6.0)
+    close_tsk = DummyTask(exec_time=18.0)
+    tsk = daily_tasks.UpdateDoorTimesTask(exec_time=1.0, open_task=open_tsk, close_task=close_tsk)
+    tsk.execute()
+
+    assert sunrise.call_args.kwargs["zenith"] == "civil"
+    assert sunset.call_args.kwargs["zenith"] == "nautical"
+
+    # explicit zenith overrides settings
+    tsk = daily_tasks.UpdateDoorTimesTask(1.0, open_tsk, close_tsk, open_zenith=98.0)
+    tsk.execute()
+    assert sunrise.call_args.kwargs["zenith"] == 98.0
+    assert sunset.call_args.kwargs["zenith"] == "nautical"
+
+
+def test_sun_times_elevation(mocker):
+    mocker.patch("sun.sunrise", return_value=5.0)
+    sunset = mocker.patch("sun.sunset", return_value=19.0)
+    elevation_time = mocker.patch("sun.elevation_time", return_value=4.5)
+    mocker.patch.dict(os.environ, {"OPEN_ELEVATION": "-4.0", "BEFORE_SUNRISE": "0.0", "NOT_BEFORE": "0.0"})
+
+    open_tsk = DummyTask(exec_time=6.0)
+    close_tsk = DummyTask(exec_time=18.0)
+    tsk = daily_tasks.UpdateDoorTimesTask(exec_time=1.0, open_task=open_tsk, close_task=close_tsk)
+    tsk.execute()
+
+    assert elevation_time.call_args.args[3] == -4.0
+    assert elevation_time.call_args.kwargs["rising"] is True
+    sunset.assert_called_once()
+    assert open_tsk.exec_time == 4.5
+
+
+# -----------------------scheduler-----------------------
+T_MIDNIGHT = 1735689600  # 2025-01-01 00:00:00 UTC
+
+
+@pytest.fixture
+def utc_localtime(mocker):
+    """localtime in UTC, so test timestamps do not depend on the host timezone"""
+    real_gmtime = time.gmtime
+    mocker.patch(
+        "time.localtime",
+        side_effect=lambda t=None: real_gmtime(time.time() if t is None else t),
+    )
+
+
+def test_next_run(utc_localtime):
+    task = DummyTask(5.0)
+    assert task.next_run(T_MIDNIGHT + 3600) == T_MIDNIGHT + 5 * 3600
+
+    # overdue: now
+    assert task.next_run(T_MIDNIGHT + 6 * 3600) == T_MIDNIGHT + 6 * 3600
+
+    # done today: tomorrow
+    task._yday_executed = 1
+    assert task.next_run(T_MIDNIGHT + 6 * 3600) == T_MIDNIGHT + 29 * 3600
+
+    assert DummyTask(None).next_run(T_MIDNIGHT) is None
+
+
+def test_scheduler_runs_only_due_tasks(mocker, utc_localtime):
+    now = T_MIDNIGHT + 3600
+    mocker.patch("time.time", return_value=now)
+
+    early = DummyTask(2.0)
+    late = DummyTask(10.0)
+    unset = DummyTask(None)
+    scheduler = daily_tasks.Scheduler([late, unset, early])
+
+    assert scheduler.time_until_next(now) == 3600
+    assert scheduler.run_due(timing.Tick(now)) == 0
+
+    now += 3600
+    mocker.patch("time.time", return_value=now)
+    mocker.patch("daily_tasks.timing.now", return_value=2.0)
+    assert scheduler.run_due(timing.Tick(now)) == 1
+    assert early.executed_flag
+    assert not late.executed_flag
+    assert scheduler.time_until_next(now) == 8 * 3600
+
+
+def test_scheduler_picks_up_changed_exec_time(mocker, utc_localtime):
+    now = T_MIDNIGHT + 3600
+    mocker.patch("time.time", return_value=now)
+    mocker.patch("daily_tasks.timing.now", return_value=1.0)
+    mocker.patch("sun.sunrise", return_value=7.0)
+    mocker.patch("sun.sunset", return_value=17.0)
+    mocker.patch.dict(os.environ, {"BEFORE_SUNRISE": "0.0", "AFTER_SUNSET": "0.0", "NOT_BEFORE": "0.0"})
+
+    open_tsk = DummyTask(exec_time=None)
+    close_tsk = DummyTask(exec_time=None)
+    update = daily_tasks.UpdateDoorTimesTask(1.0, open_tsk, close_tsk)
+    scheduler = daily_tasks.Scheduler([open_tsk, close_tsk, update])
+
+    assert scheduler.run_due(timing.Tick(now)) == 1
+    assert scheduler.time_until_next(now) == 6 * 3600  # open task now scheduled
+
+
+def test_scheduler_periodic_run_does_not_rebuild(mocker, utc_localtime, tmp_path):
+    now = T_MIDNIGHT + 12 * 3600
+    mocker.patch("time.time", return_value=now)
+    daily = DummyTask(13.0)
+    periodic = DummyIntervalTask(60)
+    scheduler = daily_tasks.Scheduler([daily, periodic], str(tmp_path / "task_state.bin"))
+    reschedule = mocker.spy(scheduler, "reschedule")
+    save_state = mocker.spy(scheduler, "save_state")
+
+    for k in range(1, 4):
+        assert scheduler.run_due(timing.Tick(now + k * 60)) == 1
+    assert reschedule.call_count == save_state.call_count == 0
+    assert scheduler.time_until_next(now + 180) == 60
+    assert [task for _, _, task in scheduler._queue] == [periodic, daily]
+
+    mocker.patch("daily_tasks.timing.now", return_value=13.0)
+    assert scheduler.run_due(timing.Tick(now + 3600)) == 2  # both due
+    assert reschedule.call_count == save_state.call_count == 1
+
+
+def test_scheduler_empty():
+    scheduler = daily_tasks.Scheduler([DummyTask(None)])
+    assert scheduler.time_until_next() is None
+    assert scheduler.run_due() == 0
+
+
+def test_tick(utc_localtime):
+    tick = timing.Tick(T_MIDNIGHT + 13 * 3600 + 30 * 60 + 15)
+    assert tick.yday == 1
+    assert tick.hours == pytest.approx(13.504166, abs=1e-6)
+    assert tick.date == "2025-01-01"
+    assert str(tick) == "2025-01-01 13:30:15"
+
+
+def test_execute_uses_tick_across_midnight(mocker, utc_localtime):
+    """A tick taken before midnight decides for the whole loop iteration."""
+    mocker.patch("time.time", return_value=T_MIDNIGHT + 1)  # clock moved on
+    tick = timing.Tick(T_MIDNIGHT - 1)
+
+    task = DummyTask(23.0)
+    task.execute(tick)
+    assert task.executed_flag
+    assert task._yday_executed == 366  # 2024-12-31
+
+    task.executed_flag = False
+    task.execute(tick)
+    assert not task.executed_flag
+
+
+class DummyIntervalTask(daily_tasks.IntervalTask):
+    def __init__(self, interval: int, offset: int = 0):
+        super().__init__("dummy_interval", interval, offset)
+        self.runs = []
+
+    def main(self):
+        self.runs.append(self.tick.time)
+
+
+class DummyCronTask(daily_tasks.CronTask):
+    def main(self):
+        pass
+
+
+def test_interval_task_on_grid(utc_localtime):
+    task = DummyIntervalTask(60, offset=5)
+    assert task.next_run(T_MIDNIGHT + 10) == T_MIDNIGHT + 65
+
+    # late executions do not shift the grid
+    for t in (T_MIDNIGHT + 70, T_MIDNIGHT + 127, T_MIDNIGHT + 185):
+        task.execute(timing.Tick(t))
+    assert task.runs == [T_MIDNIGHT + 70, T_MIDNIGHT + 127, T_MIDNIGHT + 185]
+    assert task.next_run() == T_MIDNIGHT + 245
+
+    # missed runs are skipped, not caught up
+    task.execute(timing.Tick(T_MIDNIGHT + 1000))
+    task.execute(timing.Tick(T_MIDNIGHT + 1001))
+    assert task.runs[-1] == T_MIDNIGHT + 1000
+    assert task.exec_count == 4
+    assert task.next_run() == T_MIDNIGHT + 1025
+
+
+def test_interval_task_invalid():
+    with pytest.raises(ValueError):
+        DummyIntervalTask(0)
+
+
+@pytest.mark.parametrize(
+    "spec, now, expected",
+    [
+        ("0 * * * *", 0, 0),  # matches now
+        ("0 * * * *", 1, 3600),
+        ("*/15 * * * *", 16 * 60, 30 * 60),
+        ("30 6 * * *", 7 * 3600, 30.5 * 3600),
+        ("0 8-18/5 * * *", 9 * 3600, 13 * 3600),
+        ("0 0 * * 0", 0, 4 * 86400),  # 2025-01-01 is a Wednesday, next Sunday
+        ("0 0 * * 7", 0, 4 * 86400),
+        ("0 12 15 * *", 0, 14 * 86400 + 12 * 3600),
+        ("0 0 1 3 *", 0, 59 * 86400),
+        ("0 0 29 2 *", 0, (365 + 365 + 365 + 31 + 28) * 86400),  # 2028-02-29
+    ],
+)
+def test_cron_next_run(utc_localtime, spec, now, expected):
+    task = DummyCronTask("cron", spec)
+    assert task.next_run(T_MIDNIGHT + now) == T_MIDNIGHT + expected
+
+
+def test_cron_day_of_month_or_weekday(utc_localtime):
+    # 1st of month or any Sunday, whichever comes first
+    task = DummyCronTask("cron", "0 0 1 * 0")
+    task.execute(timing.Tick(T_MIDNIGHT))
+    assert task.exec_count == 1
+    assert task.next_run() == T_MIDNIGHT + 4 * 86400
+
+
+@pytest.mark.parametrize("spec", ["* * * *", "60 * * * *", "5-1 * * * *", "*/0 * * * *", "x * * * *"])
+def test_cron_invalid_spec(spec):
+    with pytest.raises(ValueError):
+        DummyCronTask("cron", spec)
+
+
+def test_scheduler_add(mocker, utc_localtime):
+    now = T_MIDNIGHT + 3600
+    mocker.patch("time.time", return_value=now)
+
+    scheduler = daily_tasks.Scheduler([DummyTask(10.0)])
+    task = DummyIntervalTask(600, offset=300)
+    scheduler.add(task)
+    assert scheduler.time_until_next(now) == 300
+
+    assert scheduler.run_due(timing.Tick(now + 300)) == 1
+    assert task.runs == [now + 300]
+    assert scheduler.time_until_next(now + 300) == 600
+
+
+def test_task_stats_ring_buffer():
+    stats = daily_tasks.TaskStats(size=4)
+    assert stats.samples() == []
+    assert stats.summary()["late_avg"] == 0.0
+
+    for i in range(6):
+        stats.record(float(i), 10.0 * i)
+    assert stats.samples() == [(2.0, 20.0), (3.0, 30.0), (4.0, 40.0), (5.0, 50.0)]
+    assert stats.summary() == {"runs": 6, "fail": 0, "late_max": 5.0, "late_avg": 3.5, "exec_max": 50.0}
+
+
+def test_execute_records_lateness_and_failure(mocker, utc_localtime):
+    now = T_MIDNIGHT + 10 * 3600 + 90  # 90 s after exec_time
+    mocker.patch("time.time", return_value=now)
+
+    task = DummyTask(10.0)
+    task.execute(timing.Tick(now))
+    assert task.stats.runs == 1
+    assert task.stats.samples()[0][0] == pytest.approx(90.0)
+
+    interval = DummyIntervalTask(60)
+    interval.next_run(now - 30)
+    interval.execute(timing.Tick(now))
+    assert interval.stats.samples()[0][0] == 30.0
+
+    failing = DummyTask(10.0)
+    failing.main = Mock(side_effect=RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        failing.execute(timing.Tick(now))
+    assert failing.stats.failures == 1
+    assert failing.stats.last_error == "RuntimeError: boom"
+    assert not failing.is_executed
+
+
+def test_scheduler_persists_task_state(mocker, utc_localtime, tmp_path):
+    now = T_MIDNIGHT + 12 * 3600
+    mocker.patch("time.time", return_value=now)
+    state_file = str(tmp_path / "task_state.bin")
+    rename = mocker.spy(daily_tasks.os, "rename")
+
+    tasks = [DummyTask(1.0), DummyTask(13.0), DummyIntervalTask(60)]
+    scheduler = daily_tasks.Scheduler(tasks, state_file)
+    assert not scheduler.load_state(timing.Tick(now))  # no file yet
+
+    assert scheduler.run_due(timing.Tick(now)) == 2
+    assert rename.call_count == 1
+
+    # only the interval task ran, nothing persistent changed
+    assert scheduler.run_due(timing.Tick(now + 60)) == 1
+    assert rename.call_count == 1
+    assert (tmp_path / "task_state.bin").stat().st_size == 4 + 2 + 2 * 4
+
+    # after a reset, the task done today is not repeated
+    tasks = [DummyTask(1.0), DummyTask(13.0), DummyIntervalTask(60)]
+    scheduler = daily_tasks.Scheduler(tasks, state_file)
+    assert scheduler.load_state(timing.Tick(now + 120))
+    assert tasks[0].is_executed
+    assert not tasks[1].is_executed
+    assert scheduler.time_until_next(now + 120) == 0  # interval task
+    assert scheduler.run_due(timing.Tick(now + 120)) == 1
+    assert not tasks[0].executed_flag
+
+    # next day the state is stale
+    tasks = [DummyTask(1.0), DummyTask(13.0)]
+    scheduler = daily_tasks.Scheduler(tasks, state_file)
+    mocker.patch("time.time", return_value=now + 86400)
+    assert scheduler.load_state(timing.Tick(now + 86400))
+    assert not tasks[0].is_executed
+
+
+def test_scheduler_ignores_mismatched_state(tmp_path):
+    state_file = tmp_path / "task_state.bin"
+    state_file.write_bytes(b"TSK1\x05\x00")
+    scheduler = daily_tasks.Scheduler([DummyTask(1.0)], str(state_file))
+    assert not scheduler.load_state(timing.Tick(T_MIDNIGHT))
+
+    state_file.write_bytes(b"garbage")
+    assert not scheduler.load_state(timing.Tick(T_MIDNIGHT))
+
+
+def test_tick_update_reuses_instance(utc_localtime):
+    tick = timing.Tick(T_MIDNIGHT)
+    assert tick.update(T_MIDNIGHT + 86400 + 61) is tick
+    assert (tick.yday, tick.hour, tick.minute, tick.second) == (2, 0, 1, 1)
+    assert tick.date == "2025-01-02"
+    assert not hasattr(tick, "__dict__")
+
+
+def test_task_slots():
+    task = daily_tasks.SetClockTask()
+    assert not hasattr(task, "__dict__")
+    assert not hasattr(task.stats, "__dict__")
+    assert not hasattr(door.State(), "__dict__")
+
+
+def test_stats_summary_is_reused():
+    stats = daily_tasks.TaskStats()
+    summary = stats.summary()
+    stats.record(3.0, 1.0)
+    assert stats.summary() is summary
+    assert summary["runs"] == 1
+
+
+def test_mem_trend():
+    trend = daily_tasks.MemTrend(size=4)
+    assert trend.summary() == {"free": 0, "min": 0, "trend_h": 0}
+
+    for i, free in enumerate([50_000, 40_000, 48_000, 46_000, 44_000, 42_000]):
+        trend.record(T_MIDNIGHT + i * 1800, free)
+    # kept: 48000, 46000, 44000, 42000 over 1.5 h
+    assert trend.summary() == {"free": 42_000, "min": 42_000, "trend_h": -4000}
+
+
+def test_collect_garbage_at_idle_points(mocker):
+    gc = mocker.patch("daily_tasks.gc")
+    gc.mem_free.return_value = 12345
+    now = T_MIDNIGHT + 3600
+    task = DummyIntervalTask(60, offset=1)
+    task.next_run(now)  # due at now + 1
+    scheduler = daily_tasks.Scheduler([task])
+
+    assert not scheduler.collect_garbage(min_idle=2.0, interval=60, now=now)  # task due soon
+    assert scheduler.collect_garbage(min_idle=0.5, interval=60, now=now)
+    assert not scheduler.collect_garbage(min_idle=0.5, interval=60, now=now + 30)  # too early
+    assert gc.collect.call_count == 1
+    assert scheduler.mem.summary()["free"] == 12345
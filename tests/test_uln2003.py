@@ -0,0 +1,188 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def bench(mocker):
+    """benchmark_stepper with the real uln2003 instead of the conftest mock"""
+    mocker.patch.dict(sys.modules)
+    sys.modules.pop("uln2003", None)
+    sys.modules.pop("benchmark_stepper", None)
+    import benchmark_stepper
+
+    return benchmark_stepper
+
+
+def _record_phases(bench, stepper, read_state):
+    phases = []
+    bench.uln2003.delay_us = lambda us: phases.append(read_state())
+    return phases
+
+
+@pytest.mark.parametrize("kind", ["digitalio", "register"])
+@pytest.mark.parametrize("direction", [1, -1])
+def test_step_sequence(bench, kind, direction):
+    uln2003 = bench.uln2003
+    stepper = uln2003.Stepper(bench.PINS, writer=uln2003.make_pin_writer(bench.PINS, kind))
+
+    if kind == "register":
+        assert isinstance(stepper.writer, uln2003.RegisterPinWriter)
+        bits = [1 << n for n in (2, 3, 4, 5)]
+        read_state = lambda: [bool(bench.MockAddressRange.gpio_out & bit) for bit in bits]  # noqa: E731
+    else:
+        read_state = lambda: [pin.value for pin in stepper.pins]  # noqa: E731
+
+    for count in (1, 3):
+        phases = _record_phases(bench, stepper, read_state)
+        stepper.step(count, direction)
+        assert phases == uln2003.HALF_STEP[::direction] * count
+    assert not any(pin.value for pin in stepper.pins)  # reset
+
+    stepper.step(0)
+
+
+def test_register_writer_fallback(bench, mocker):
+    mocker.patch.object(bench.uln2003, "_gpio_number", side_effect=ValueError("no gpio"))
+    writer = bench.uln2003.make_pin_writer(bench.PINS, "register")
+    assert type(writer) is bench.uln2003.DigitalioPinWriter
+
+
+def test_benchmark_stepper(bench):
+    results = {r["name"]: r for r in bench.run_benchmark(steps=64)}
+    assert results["legacy"]["writes_per_phase"] == 4.0
+    assert results["table/digitalio"]["writes_per_phase"] == 1.0
+    assert results["table/register"]["writes_per_phase"] == 1.0
+    assert results["full/register"]["writes_per_phase"] == pytest.approx(2.0, abs=0.01)  # set and clear
+    assert results["full/register"]["phases_per_step"] == 4
+
+
+@pytest.mark.parametrize("total", [0, 1, 7, 100, 256, 1000])
+def test_ramp_profile(bench, total):
+    ramp = bench.uln2003.Ramp(total, start_delay=950, cruise_delay=700, ramp_steps=128)
+    delays = [ramp.delay(i) for i in range(total)]
+
+    assert delays == delays[::-1]  # decelerate like accelerate
+    n = min(128, (total + 1) // 2)
+    assert all(a >= b for a, b in zip(delays[:n], delays[1:n]))
+    if delays:
+        assert delays[0] == 950
+        assert min(delays) >= 700
+    if total >= 256:
+        assert delays[128 : total - 128] == [700] * (total - 256)
+
+    assert ramp.step_delays_us() == sum(delays)
+    for start, count in ((0, 5), (3, 200), (120, 600), (total - 10, 10), (500, 512)):
+        start = max(start, 0)
+        assert ramp.step_delays_us(start, count) == sum(delays[start : start + count])
+
+
+def test_step_with_ramp(bench):
+    uln2003 = bench.uln2003
+    stepper = uln2003.Stepper(bench.PINS)
+    ramp = uln2003.Ramp(300, start_delay=950, cruise_delay=700, ramp_steps=100)
+
+    delays = []
+    uln2003.delay_us = delays.append
+    stepper.step(150, -1, ramp, 0, hold=True)
+    stepper.step(150, -1, ramp, 150)
+
+    phases = len(stepper.mode)
+    assert delays == [ramp.delay(i) for i in range(300) for _ in range(phases)]
+    assert sum(delays) == ramp.step_delays_us() * phases
+
+
+@pytest.mark.parametrize("kind", ["digitalio", "register"])
+@pytest.mark.parametrize("mode", ["full", "half"])
+def test_step_hold(bench, mocker, kind, mode):
+    uln2003 = bench.uln2003
+    stepper = uln2003.Stepper(bench.PINS, writer=uln2003.make_pin_writer(bench.PINS, kind), mode=mode)
+    phases = uln2003.DRIVE_MODES[mode]
+    read_state = lambda: [pin.value for pin in stepper.pins]  # noqa: E731
+    if kind == "register":
+        bits = [1 << n for n in (2, 3, 4, 5)]
+        read_state = lambda: [bool(bench.MockAddressRange.gpio_out & bit) for bit in bits]  # noqa: E731
+    reset = mocker.spy(stepper.writer, "reset")
+
+    recorded = _record_phases(bench, stepper, read_state)
+    stepper.step(3, -1, hold=True)
+    assert read_state() == phases[0]  # last phase of a backward step, still energized
+    stepper.step(0, -1, hold=True)
+    stepper.step(2, -1, hold=True)
+    assert reset.call_count == 0
+    stepper.step(1, -1)
+
+    # one continuous sequence, the held calls neither restart nor release it
+    assert recorded == phases[::-1] * 6
+    assert reset.call_count == 1
+    assert not any(read_state())
+
+    # the held phase does not carry over to the other direction
+    stepper.step(1, -1, hold=True)
+    recorded.clear()
+    stepper.step(1, 1)
+    assert reset.call_count == 3
+    assert recorded == phases
+
+
+@pytest.mark.parametrize("mode", ["wave", "full", "half"])
+@pytest.mark.parametrize("direction", [1, -1])
+def test_drive_modes(bench, mode, direction):
+    uln2003 = bench.uln2003
+    stepper = uln2003.Stepper(bench.PINS, delay=900, mode="wave")
+    stepper.set_mode(mode)
+    phases = uln2003.DRIVE_MODES[mode]
+
+    recorded = []
+    uln2003.delay_us = lambda us: recorded.append(([pin.value for pin in stepper.pins], us))
+    stepper.step(2, direction)
+
+    # same angle per step, the 4 phase modes wait twice as long per phase
+    half_steps = 8 // len(phases)
+    assert recorded == [(bits, 900 * half_steps) for bits in phases[::direction] * 2]
+
+
+def test_drive_mode_phases(bench):
+    uln2003 = bench.uln2003
+    assert uln2003.WAVE == uln2003.HALF_STEP[0::2]
+    assert uln2003.FULL_STEP == uln2003.HALF_STEP[1::2]
+
+
+def test_unknown_drive_mode(bench):
+    stepper = bench.uln2003.Stepper(bench.PINS, mode="micro")
+    assert stepper.mode_name == "half"
+
+
+def test_phase_timer(bench, mocker):
+    uln2003 = bench.uln2003
+    stamps = iter(t * 1000 for t in (1000, 2010, 3030, 4000, 5100, 9000, 9950))
+    mocker.patch.object(uln2003, "time", mocker.Mock(monotonic_ns=lambda: next(stamps)))
+    delays = []
+    uln2003.delay_us = delays.append
+
+    timer = uln2003.PhaseTimer(size=4)
+    for _ in range(5):
+        timer.delay_us(1000)
+    timer.start()  # new move, no interval from the last phase
+    timer.delay_us(900)
+    timer.delay_us(900)
+
+    assert delays == [1000] * 5 + [900] * 2
+    # overruns 10, 20, -30, 100, then 50 overwrites 10 in the ring
+    assert timer.count == 5
+    assert sorted(timer.overrun) == [-30, 20, 50, 100]
+    assert timer.summary() == {"n": 5, "min": -30, "mean": 35.0, "max": 100, "p50": 50, "p90": 100, "p99": 100}
+
+
+def test_step_instrumented(bench):
+    uln2003 = bench.uln2003
+    assert uln2003.Stepper(bench.PINS).timer is None  # off by default
+
+    stepper = uln2003.Stepper(bench.PINS, timing_samples=64)
+    delays = []
+    uln2003.delay_us = delays.append
+    stepper.step(2)
+    stepper.step(1)
+
+    assert delays == [uln2003.STEP_DELAY_US] * 24
+    assert stepper.timer.count == 15 + 7  # per move, phases - 1